@@ -4,49 +4,83 @@ import uvicorn
 import os
 import io
 import base64
-from PIL import Image
-import numpy as np
+import time
+from typing import Optional
 
-# メモリ節約設定
-import torch
-torch.set_num_threads(1)
+from app.monitoring import (
+    mount_metrics, MODEL_LOADED, DEBUG_TIMINGS, start_memory_tracing,
+    start_request_timings, current_timings, with_server_timing
+)
+from app.config import TRACEMALLOC_FRAMES
+from app.responses import FastJSONResponse
+from app.loop_monitor import install_loop_monitor
+from app.readiness import analysis_jobs, model_state, mount_probes, install_warmup
 
 app = FastAPI(title="Javelink YOLO Lite")
+mount_metrics(app)
+install_loop_monitor(app)
+start_memory_tracing(TRACEMALLOC_FRAMES)
 
 # グローバル変数でモデルを保持（初回のみロード）
 model = None
 
+def configure_threads():
+    # このホスト用に保存されたスレッド設定（python -m app.autotune）を適用、
+    # なければメモリ節約のため1スレッド
+    import torch
+    from app.autotune import apply_saved
+    if apply_saved() is None:
+        torch.set_num_threads(1)
+
 def get_model():
+    # torch/ultralytics はここで初めて読み込む（起動を軽くするため）
     global model
     if model is None:
         try:
-            from ultralytics import YOLO
+            configure_threads()
+            from app.services.model_registry import load_yolo
             # 最軽量のnanoモデルを使用
-            model = YOLO('yolov8n-pose.pt')
+            model = load_yolo('yolov8n-pose.pt')
+            MODEL_LOADED.set(1)
             print("YOLOv8n loaded successfully")
         except Exception as e:
             print(f"Failed to load YOLO: {e}")
             model = "failed"
     return model
 
+def warm_up_model():
+    if get_model() in (None, "failed"):
+        raise RuntimeError("YOLO model unavailable")
+
+# 起動後にバックグラウンドでロード（/ready はロード完了まで503）
+install_warmup(app, warm_up_model)
+mount_probes(app, lambda: model_state.ready)
+
 def analyze_image(image_bytes):
     """画像から姿勢を検出（最小処理）"""
+    from PIL import Image
+    import numpy as np
+
     try:
         # モデル取得
         yolo_model = get_model()
         if yolo_model == "failed" or yolo_model is None:
             return None
         
-        # PILで画像を開く
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # サイズを縮小（メモリ節約）
-        max_size = 640
-        if image.width > max_size or image.height > max_size:
-            image.thumbnail((max_size, max_size))
+        timings = current_timings()
+        with timings.measure("decode"):
+            # PILで画像を開く
+            image = Image.open(io.BytesIO(image_bytes))
+            
+            # サイズを縮小（メモリ節約）
+            max_size = 640
+            if image.width > max_size or image.height > max_size:
+                image.thumbnail((max_size, max_size))
         
         # YOLO推論（1フレームのみ）
+        start = time.perf_counter()
         results = yolo_model(image, verbose=False)
+        timings.add_frame(time.perf_counter() - start)
         
         if results and len(results) > 0:
             # キーポイントを取得
@@ -157,14 +191,22 @@ async def root():
     ''')
 
 @app.post("/analyze")
-async def analyze(file: UploadFile = File(...)):
+async def analyze(file: UploadFile = File(...), debug: Optional[str] = Form(None)):
+    timings = start_request_timings(frame_detail=debug == DEBUG_TIMINGS)
     # ファイルサイズ制限（2MB）
-    contents = await file.read()
+    with timings.measure("upload"):
+        contents = await file.read()
     if len(contents) > 2 * 1024 * 1024:
         return HTMLResponse("<h1>ファイルが大きすぎます（最大2MB）</h1>")
     
     # 画像分析
-    result = analyze_image(contents)
+    analysis_jobs.inc()
+    try:
+        result = analyze_image(contents)
+    finally:
+        analysis_jobs.dec()
+    if debug == DEBUG_TIMINGS:
+        return with_server_timing(FastJSONResponse({"result": result, "debug": timings.debug_info()}), timings)
     
     # 結果表示
     if result and result.get("detected"):
@@ -180,7 +222,7 @@ async def analyze(file: UploadFile = File(...)):
         status = "❌ 姿勢検出失敗"
         details = "<p>人物が検出できませんでした</p>"
     
-    return HTMLResponse(f'''
+    response = HTMLResponse(f'''
     <!DOCTYPE html>
     <html>
     <head>
@@ -223,20 +265,14 @@ async def analyze(file: UploadFile = File(...)):
     </body>
     </html>
     ''')
+    return with_server_timing(response, timings)
 
 @app.get("/health")
 async def health():
-    model_status = "not_loaded"
-    try:
-        m = get_model()
-        if m != "failed" and m is not None:
-            model_status = "loaded"
-    except:
-        pass
-    
+    # ここではモデルをロードしない（/ready を参照）
     return {
         "status": "healthy",
-        "model": model_status,
+        "model": "loaded" if model_state.ready else "not_loaded",
         "memory_limit": "512MB"
     }
 
@@ -1 +1,3 @@
-﻿"""Javelink Lite - """ __version__ = "0.1.0" 
\ No newline at end of file
+﻿"""Javelink Lite - javelin throw analysis application"""
+
+__version__ = "0.1.0"
@@ -0,0 +1,317 @@
+"""Admission control for the analysis pipeline"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Deque, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.monitoring import ADMISSION_REJECTED, ANALYSIS_RUNNING, QUEUE_WAIT, current_timings
+from app.readiness import available_memory_bytes
+from app.config import (
+    MAX_PROCESS_TIME_SEC, POSE_BUDGET_SHARE, DEFAULT_POSE_TIER, POSE_TIER_IDLE, POSE_TIER_BUSY, POSE_TIER_PEAK,
+    ANALYSIS_MAX_CONCURRENT, ANALYSIS_MAX_QUEUE, ANALYSIS_QUEUE_TIMEOUT_SEC,
+    ADMISSION_MEMORY_CHECK, ANALYSIS_BASE_MEMORY_MB, ANALYSIS_FRAME_BUFFERS,
+    ANALYSIS_EXPECTED_SEC, READY_MIN_FREE_MEMORY_MB,
+    SJF_SECONDS_PER_GPX, SJF_AGING, JOB_CLASS_BOUNDS_GPX, QUEUE_WAIT_HISTORY
+)
+
+if TYPE_CHECKING:
+    from app.services.video import VideoInfo
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class JobCost:
+    """Size of an analysis, from container metadata"""
+    width: int
+    height: int
+    frames: int
+    tier: float = 1.0  # relative per-pixel cost of the pose model used
+
+    @classmethod
+    def from_video(cls, info: Optional["VideoInfo"], tier: float = 1.0) -> "JobCost":
+        if info is None:
+            return cls(0, 0, 0, tier)
+        return cls(info.width, info.height, info.frame_count, tier)
+
+    @property
+    def gigapixels(self) -> float:
+        """Work in the job: resolution x frames x model tier"""
+        return self.width * self.height * self.frames * self.tier / 1e9
+
+    @property
+    def job_class(self) -> str:
+        small, medium = JOB_CLASS_BOUNDS_GPX
+        if self.gigapixels < small:
+            return "small"
+        return "medium" if self.gigapixels < medium else "large"
+
+    @property
+    def memory_bytes(self) -> int:
+        """
+        Peak memory estimate
+
+        Frames are decoded one at a time and only keypoints are kept, so
+        the peak is a fixed base plus the few frames alive at once
+        (decoder, model input, render queue); clip length barely counts.
+        """
+        frame = self.width * self.height * 3
+        return ANALYSIS_BASE_MEMORY_MB * 2**20 + frame * ANALYSIS_FRAME_BUFFERS
+
+def _reject(status: int, reason: str, detail: str, retry_after: int):
+    ADMISSION_REJECTED.labels(reason).inc()
+    logger.warning(f"Analysis rejected ({reason}): {detail}")
+    raise HTTPException(status_code=status, detail=detail, headers={"Retry-After": str(retry_after)})
+
+@dataclass
+class _Waiter:
+    cost: JobCost
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.monotonic)
+
+class Slot:
+    """An acquired analysis slot; released when its block ends unless deferred"""
+
+    def __init__(self, controller: "AdmissionController", cost: JobCost):
+        self._controller = controller
+        self._cost = cost
+        self._loop = asyncio.get_running_loop()
+        self._start = time.perf_counter()
+        self._released = False
+        self.deferred = False
+
+    def defer(self) -> Callable[[], None]:
+        """
+        Keep the slot past the end of the block
+
+        Returns the release; it may be called from any thread (e.g. a
+        background render's completion callback), and only once counts.
+        """
+        self.deferred = True
+        return lambda: self._loop.call_soon_threadsafe(self.release)
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(self._cost, time.perf_counter() - self._start)
+
+class AdmissionController:
+    """
+    Bounded concurrency with a bounded, shortest-job-first wait queue
+
+    At most max_concurrent analyses run; up to max_queue more wait. Past
+    that requests are turned away at once with 429, and a wait longer
+    than timeout ends in 503, both with a Retry-After estimated from
+    recent job durations. With memory_check, a job also waits until its
+    estimated peak fits in the memory that is currently available; one
+    that can't fit even on an idle instance is refused with 503.
+
+    A freed slot goes to the waiter with the least estimated run time,
+    less `aging` seconds for every second it has waited, so a long job
+    is overtaken by short ones for at most about its own run time.
+    Run-time estimates scale the job's gigapixels by a seconds-per-
+    gigapixel rate learned from finished jobs.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = ANALYSIS_MAX_CONCURRENT,
+        max_queue: int = ANALYSIS_MAX_QUEUE,
+        timeout: float = ANALYSIS_QUEUE_TIMEOUT_SEC,
+        memory_check: bool = ADMISSION_MEMORY_CHECK,
+        aging: float = SJF_AGING
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.memory_check = memory_check
+        self.running = 0
+        self.aging = aging
+        self.avg_seconds = ANALYSIS_EXPECTED_SEC  # EWMA of job durations
+        self.seconds_per_gpx = SJF_SECONDS_PER_GPX  # EWMA over jobs with a known size
+        self._waiters: List[_Waiter] = []
+        self._waits: Dict[str, Deque[float]] = {}
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def capacity(self) -> int:
+        return self.max_concurrent + self.max_queue
+
+    def retry_after(self) -> int:
+        """Seconds until the backlog ahead of a new request has drained"""
+        backlog = self.running + self.waiting + 1
+        return max(1, math.ceil(self.avg_seconds * backlog / self.max_concurrent))
+
+    def check_queue(self):
+        """Refuse up front when no slot or queue place is free"""
+        if self.running >= self.max_concurrent and self.waiting >= self.max_queue:
+            _reject(429, "queue_full", "Analysis queue is full", self.retry_after())
+
+    def _fits(self, cost: JobCost) -> bool:
+        if not self.memory_check:
+            return True
+        available = available_memory_bytes()
+        if available is None:
+            return True
+        return cost.memory_bytes + READY_MIN_FREE_MEMORY_MB * 2**20 <= available
+
+    def _start(self):
+        self.running += 1
+        ANALYSIS_RUNNING.set(self.running)
+
+    def _release(self, cost: Optional[JobCost] = None, seconds: Optional[float] = None):
+        self.running -= 1
+        ANALYSIS_RUNNING.set(self.running)
+        if seconds is not None:
+            self.avg_seconds += 0.2 * (seconds - self.avg_seconds)
+            if cost is not None and cost.gigapixels > 0:
+                self.seconds_per_gpx += 0.2 * (seconds / cost.gigapixels - self.seconds_per_gpx)
+        self._wake()
+
+    def estimated_seconds(self, cost: JobCost) -> float:
+        return cost.gigapixels * self.seconds_per_gpx
+
+    def _priority(self, waiter: _Waiter, now: float) -> float:
+        return self.estimated_seconds(waiter.cost) - self.aging * (now - waiter.enqueued)
+
+    def _record_wait(self, cost: JobCost, seconds: float):
+        QUEUE_WAIT.labels(cost.job_class).observe(seconds)
+        waits = self._waits.setdefault(cost.job_class, deque(maxlen=QUEUE_WAIT_HISTORY))
+        waits.append(seconds)
+
+    def _wake(self):
+        # A linear scan: the queue is short, and priorities change as jobs age
+        self._waiters = [w for w in self._waiters if not w.future.done()]
+        while self._waiters and self.running < self.max_concurrent:
+            now = time.monotonic()
+            waiter = min(self._waiters, key=lambda w: self._priority(w, now))
+            # A next job that doesn't fit in memory waits for a running one to
+            # finish rather than being overtaken; on an idle instance nothing
+            # would free memory, so it runs anyway
+            if self.running > 0 and not self._fits(waiter.cost):
+                return
+            self._waiters.remove(waiter)
+            self._start()
+            waiter.future.set_result(None)
+
+    async def _acquire(self, cost: JobCost):
+        self.check_queue()
+        if self.running < self.max_concurrent and not self._waiters:
+            if self._fits(cost):
+                self._start()
+                return
+            if self.running == 0:
+                _reject(
+                    503, "memory",
+                    f"Not enough memory for a {cost.width}x{cost.height} clip", self.retry_after()
+                )
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(_Waiter(cost, future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Granted the slot just as the wait ended
+                self._release()
+            else:
+                future.cancel()
+                self._waiters = [w for w in self._waiters if w.future is not future]
+            if isinstance(e, asyncio.TimeoutError):
+                _reject(503, "timeout", "Timed out waiting for an analysis slot", self.retry_after())
+            raise
+
+    @asynccontextmanager
+    async def slot(self, cost: JobCost):
+        """
+        Hold one analysis slot for the block; the wait is recorded as the queue stage
+
+        Work that outlives the block (a worker thread, a background render)
+        keeps the slot with Slot.defer() and releases it when it ends.
+        """
+        start = time.perf_counter()
+        await self._acquire(cost)
+        waited = time.perf_counter() - start
+        current_timings().add("queue", waited)
+        self._record_wait(cost, waited)
+        held = Slot(self, cost)
+        try:
+            yield held
+        finally:
+            if not held.deferred:
+                held.release()
+
+    def status(self) -> dict:
+        import numpy as np
+
+        now = time.monotonic()
+        classes = {}
+        for name, waits in self._waits.items():
+            p50, p95 = np.percentile(waits, [50, 95])
+            classes[name] = {
+                "jobs": len(waits),
+                "wait_p50_s": round(float(p50), 3),
+                "wait_p95_s": round(float(p95), 3),
+                "wait_max_s": round(max(waits), 3),
+            }
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "avg_seconds": round(self.avg_seconds, 2),
+            "seconds_per_gpx": round(self.seconds_per_gpx, 3),
+            "queue": [
+                {
+                    "job_class": w.cost.job_class,
+                    "estimated_s": round(self.estimated_seconds(w.cost), 2),
+                    "waited_s": round(now - w.enqueued, 2),
+                }
+                for w in sorted(self._waiters, key=lambda w: self._priority(w, now))
+            ],
+            "wait_by_class": classes,
+        }
+
+admission = AdmissionController()
+
+def choose_pose_tier(info: Optional["VideoInfo"], deadline_seconds: float = MAX_PROCESS_TIME_SEC) -> str:
+    """
+    Pose tier for a new job under the current load
+
+    Queue depth sets a ceiling: POSE_TIER_IDLE with a slot free and nobody
+    waiting, POSE_TIER_BUSY while the queue is under half full,
+    POSE_TIER_PEAK beyond. Below the ceiling the most accurate tier whose
+    estimated run time fits the pose share of the deadline is chosen, or
+    the cheapest tier if none does. Tiers whose weights can't be loaded
+    here are never candidates.
+    """
+    # Deferred: the detectors module pulls in numpy and the model runtime
+    from app.services.detectors import POSE_TIERS, tiers_by_cost, tier_available
+
+    if admission.waiting == 0 and admission.running < admission.max_concurrent:
+        ceiling = POSE_TIERS[POSE_TIER_IDLE]
+    elif admission.waiting < admission.max_queue / 2:
+        ceiling = POSE_TIERS[POSE_TIER_BUSY]
+    else:
+        ceiling = POSE_TIERS[POSE_TIER_PEAK]
+
+    budget = deadline_seconds * POSE_BUDGET_SHARE
+    candidates = [tier for tier in tiers_by_cost() if tier.cost <= ceiling.cost and tier_available(tier.name)]
+    if not candidates:
+        # Nothing loadable: the job runs on placeholders and fails QC
+        return DEFAULT_POSE_TIER
+    chosen = candidates[0]
+    for tier in reversed(candidates):
+        if admission.estimated_seconds(JobCost.from_video(info, tier.cost)) <= budget:
+            chosen = tier
+            break
+    return chosen.name
@@ -0,0 +1,128 @@
+"""Cached, pre-compressed static assets and pages"""
+import gzip
+import hashlib
+import mimetypes
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+BASE_DIR = Path(__file__).parent
+STATIC_DIR = BASE_DIR / "static"
+TEMPLATE_DIR = BASE_DIR / "templates"
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# Below this size compression costs more than it saves
+MIN_COMPRESS_SIZE = 512
+
+@dataclass
+class CompressedBody:
+    """A response body with its encodings computed once"""
+    media_type: str
+    identity: bytes
+    etag: str = ""
+    encodings: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, content: bytes, media_type: str) -> "CompressedBody":
+        body = cls(
+            media_type=media_type,
+            identity=content,
+            etag=f'"{hashlib.sha256(content).hexdigest()[:16]}"'
+        )
+        if len(content) >= MIN_COMPRESS_SIZE:
+            if BROTLI_AVAILABLE:
+                body.encodings["br"] = brotli.compress(content, quality=11)
+            body.encodings["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+        return body
+
+    @property
+    def version(self) -> str:
+        return self.etag.strip('"')[:10]
+
+    def response(self, request: Request, cache_control: str = REVALIDATE_CACHE) -> Response:
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if self.etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        accepted = request.headers.get("accept-encoding", "")
+        for encoding in ("br", "gzip"):
+            if encoding in self.encodings and encoding in accepted:
+                headers["Content-Encoding"] = encoding
+                return Response(self.encodings[encoding], media_type=self.media_type, headers=headers)
+        return Response(self.identity, media_type=self.media_type, headers=headers)
+
+class StaticAssets:
+    """
+    Static files held in memory with strong ETags and gzip/brotli variants
+
+    Files are read and compressed once, on first request. URLs built with
+    url() carry a content version, so they are served as immutable.
+    """
+
+    def __init__(self, directory: Path = STATIC_DIR, prefix: str = "/static"):
+        self.directory = Path(directory).resolve()
+        self.prefix = prefix.rstrip("/")
+        self._cache: Dict[str, CompressedBody] = {}
+
+    def get(self, path: str) -> Optional[CompressedBody]:
+        if path in self._cache:
+            return self._cache[path]
+
+        file_path = (self.directory / path).resolve()
+        if self.directory not in file_path.parents or not file_path.is_file():
+            return None
+
+        media_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type in ("application/javascript", "application/json"):
+            media_type += "; charset=utf-8"
+        asset = CompressedBody.build(file_path.read_bytes(), media_type)
+        self._cache[path] = asset
+        return asset
+
+    def url(self, path: str) -> str:
+        asset = self.get(path)
+        if asset is None:
+            raise FileNotFoundError(path)
+        return f"{self.prefix}/{path}?v={asset.version}"
+
+    def mount(self, app: FastAPI):
+        @app.get(self.prefix + "/{path:path}", include_in_schema=False)
+        async def static_asset(path: str, request: Request):
+            asset = self.get(path)
+            if asset is None:
+                raise HTTPException(status_code=404, detail="Not found")
+            versioned = request.query_params.get("v") == asset.version
+            return asset.response(request, IMMUTABLE_CACHE if versioned else REVALIDATE_CACHE)
+
+def create_template_env(assets: StaticAssets, directory: Path = TEMPLATE_DIR) -> Environment:
+    """Jinja2 environment with asset_url() available in every template"""
+    env = Environment(
+        loader=FileSystemLoader(str(directory)),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=False,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    env.globals["asset_url"] = assets.url
+    return env
+
+def prerender_page(env: Environment, name: str, **context) -> CompressedBody:
+    """Render a context-free page once and keep it compressed in memory"""
+    html = env.get_template(name).render(**context)
+    return CompressedBody.build(html.encode("utf-8"), "text/html; charset=utf-8")
@@ -0,0 +1,26 @@
+"""Admin authentication for operational endpoints"""
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.config import ADMIN_TOKEN
+
+def require_admin(
+    authorization: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Dependency that admits requests carrying ADMIN_TOKEN
+
+    Accepts `Authorization: Bearer <token>` or `X-Admin-Token: <token>`.
+    Without a configured token the endpoints look absent (404).
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    token = x_admin_token
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    if not token or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,386 @@
+"""
+Host autotuner for inference threads, batch size and backend
+
+Measures pose inference (with the OpenCV preprocessing and NumPy work
+around it) on a synthetic frame under different settings, and saves the
+fastest per host to AUTOTUNE_FILE. Later boots on the same host apply
+the saved settings without measuring again.
+
+    python -m app.autotune              # measure, save, print the report
+    python -m app.autotune --show       # saved settings for this host
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from importlib import metadata
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import cv2
+import numpy as np
+
+from app.services.detectors import PoseDetector, POSE_TIERS, BACKENDS, backend_available, pose_runtime
+from app.services.model_registry import ChecksumMismatch, ModelUnavailable, model_registry
+from app.config import (
+    AUTOTUNE_FILE, AUTOTUNE_ON_BOOT, AUTOTUNE_SECONDS, AUTOTUNE_FRAMES, AUTOTUNE_BATCH_SIZES, AUTOTUNE_MIN_GAIN,
+    DEFAULT_POSE_TIER, POSE_BATCH_SIZE, POSE_BACKEND
+)
+
+try:
+    from threadpoolctl import threadpool_limits
+    THREADPOOLCTL_AVAILABLE = True
+except ImportError:
+    THREADPOOLCTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BLAS_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+@dataclass
+class TuneConfig:
+    """Runtime settings the tuner chooses between"""
+    torch_threads: int
+    cv2_threads: int
+    blas_threads: int
+    batch_size: int = POSE_BATCH_SIZE
+    backend: str = POSE_BACKEND
+
+def effective_cpus() -> int:
+    """CPUs this process may use: affinity mask, capped by a cgroup (v2) quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+def _version(package: str) -> Optional[str]:
+    # From the installed metadata, so torch is not imported just for this
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+def _weights_id() -> Optional[str]:
+    """The measured model's weights file and checksum, None when it's missing"""
+    weights = POSE_TIERS[DEFAULT_POSE_TIER].weights
+    try:
+        return f"{weights}:{model_registry.verify(weights).sha256}"
+    except (ModelUnavailable, ChecksumMismatch):
+        return None
+
+def host_fingerprint() -> str:
+    """
+    Identifies the host for saved settings
+
+    Instance sizes differ in CPU model, usable CPUs and memory; library
+    and inference runtime versions, and the weights measured, change what
+    the fastest settings are.
+    """
+    memory = os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 0
+    parts = {
+        "machine": platform.machine(),
+        "cpu": _cpu_model(),
+        "cpus": effective_cpus(),
+        "memory_gb": round(memory / 2**30),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "torch": _version("torch"),
+        "ultralytics": _version("ultralytics"),
+        "onnxruntime": _version("onnxruntime"),
+        "weights": _weights_id(),
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:16]
+
+_blas_limits = None
+_thread_cap: Optional[int] = None
+
+def set_thread_cap(threads: Optional[int]):
+    """
+    Limit every pool apply() sets to this many threads
+
+    Used by app.server, whose workers split the host between them; while
+    a cap is set the boot-time search is skipped, since it measures a
+    process that has the whole host.
+    """
+    global _thread_cap
+    _thread_cap = threads
+
+def capped(config: TuneConfig) -> TuneConfig:
+    if _thread_cap is None:
+        return config
+    return replace(
+        config,
+        torch_threads=min(config.torch_threads, _thread_cap),
+        cv2_threads=min(config.cv2_threads, _thread_cap),
+        blas_threads=min(config.blas_threads, _thread_cap),
+    )
+
+def apply(config: TuneConfig):
+    """
+    Set thread pools and pose runtime for the whole process
+
+    Analyses read the pose runtime once when they start, so a running
+    one keeps the batch size and backend it started with.
+    """
+    config = capped(config)
+    _apply_threads(config)
+    pose_runtime.batch_size = config.batch_size
+    pose_runtime.backend = config.backend
+
+def _apply_threads(config: TuneConfig):
+    global _blas_limits
+    cv2.setNumThreads(config.cv2_threads)
+    if find_spec("torch") is not None:
+        import torch
+        torch.set_num_threads(config.torch_threads)
+    if THREADPOOLCTL_AVAILABLE:
+        _blas_limits = threadpool_limits(limits=config.blas_threads, user_api="blas")
+    else:
+        # Only reaches BLAS libraries loaded after this point
+        for name in BLAS_ENV_VARS:
+            os.environ[name] = str(config.blas_threads)
+
+def load_saved() -> Optional[TuneConfig]:
+    """Settings saved for this host, if any"""
+    try:
+        saved = json.loads(AUTOTUNE_FILE.read_text())
+    except (OSError, ValueError):
+        return None
+    entry = saved.get("hosts", {}).get(host_fingerprint())
+    if entry is None:
+        return None
+    try:
+        return TuneConfig(**entry["config"])
+    except (KeyError, TypeError):
+        return None
+
+def save(config: TuneConfig, report: dict):
+    try:
+        saved = json.loads(AUTOTUNE_FILE.read_text())
+    except (OSError, ValueError):
+        saved = {}
+    saved.setdefault("hosts", {})[host_fingerprint()] = dict(report, config=asdict(config))
+    # Written to a temp file and renamed so a concurrent boot never reads half a file
+    fd, tmp = tempfile.mkstemp(dir=AUTOTUNE_FILE.parent, prefix=f".{AUTOTUNE_FILE.name}-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(saved, f, indent=2)
+        os.replace(tmp, AUTOTUNE_FILE)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+def apply_saved() -> Optional[TuneConfig]:
+    config = load_saved()
+    if config is not None:
+        if config.backend not in BACKENDS or not backend_available(config.backend):
+            config = replace(config, backend=POSE_BACKEND)
+        apply(config)
+        logger.info(f"Applied saved runtime settings: {asdict(capped(config))}")
+    return config
+
+def synthetic_frame(width: int = 1280, height: int = 720, seed: int = 0) -> np.ndarray:
+    """A textured frame, so codecs and filters don't hit trivial paths"""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(60, 120, (height, width, 3), dtype=np.uint8)
+    for _ in range(12):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(frame, (int(x), int(y)), (int(x) + 80, int(y) + 160), color, -1)
+    return frame
+
+def _run_workload(detector: PoseDetector, frame: np.ndarray, frames: int, batch_size: int):
+    smoothing = np.random.default_rng(1).random((256, 256))
+    for start in range(0, frames, batch_size):
+        batch = []
+        for _ in range(min(batch_size, frames - start)):
+            # Per-frame OpenCV work of the pipeline: colour, blur, resize
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            cv2.GaussianBlur(gray, (9, 9), 2)
+            batch.append(cv2.resize(frame, (640, 360), interpolation=cv2.INTER_AREA))
+            smoothing @ smoothing  # stands in for the NumPy/SciPy stages
+        detector.detect_batch(batch)
+
+def measure(config: TuneConfig, frame: np.ndarray, frames: int = AUTOTUNE_FRAMES) -> float:
+    """
+    Seconds per frame under config (best of two runs, after a warm-up)
+
+    Sets the thread pools; batch size and backend are passed to the
+    workload directly, so pose_runtime is left alone. A backend that
+    fell back to torch (or to placeholders) measures as infinitely slow,
+    so it never wins.
+    """
+    _apply_threads(config)
+    detector = PoseDetector(DEFAULT_POSE_TIER, backend=config.backend)
+    if not detector.loaded or detector.backend != config.backend:
+        return float("inf")
+    _run_workload(detector, frame, config.batch_size, config.batch_size)
+    best = float("inf")
+    for _ in range(2):
+        start = time.perf_counter()
+        _run_workload(detector, frame, frames, config.batch_size)
+        best = min(best, (time.perf_counter() - start) / frames)
+    return best
+
+def _thread_options(cpus: int) -> List[int]:
+    return sorted({n for n in (1, 2, 4, cpus // 2, cpus) if 1 <= n <= cpus})
+
+def tune(
+    seconds: float = AUTOTUNE_SECONDS,
+    frames: int = AUTOTUNE_FRAMES,
+    idle: Optional[Callable[[], bool]] = None
+) -> dict:
+    """
+    Coordinate search over the settings, within a time budget
+
+    Backend first, then torch threads, batch size, OpenCV threads and
+    BLAS threads, each time keeping the best value found so far (if it
+    beats the previous best by AUTOTUNE_MIN_GAIN). When
+    the budget runs out the remaining dimensions keep their current best.
+    With `idle`, the search also stops as soon as it returns False (work
+    arrived), and a trial that overlapped the work is discarded; the
+    report is then marked interrupted.
+
+    Returns:
+        report with the winning config, its seconds per frame and every trial
+
+    Raises:
+        RuntimeError: the pose model isn't loaded, so there is nothing to measure
+    """
+    if not PoseDetector(DEFAULT_POSE_TIER, backend="torch").loaded:
+        raise RuntimeError(f"Pose model {DEFAULT_POSE_TIER} not loaded, nothing to measure")
+    started = time.monotonic()
+    cpus = effective_cpus()
+    frame = synthetic_frame()
+    threads = _thread_options(cpus)
+    best = TuneConfig(torch_threads=cpus, cv2_threads=cpus, blas_threads=1)
+    trials = []
+
+    def trial(config: TuneConfig) -> float:
+        seconds_per_frame = measure(config, frame, frames)
+        trials.append(dict(asdict(config), ms_per_frame=round(seconds_per_frame * 1000, 3)))
+        return seconds_per_frame
+
+    interrupted = False
+    best_time = trial(best)
+    dimensions = [
+        ("backend", [b for b in BACKENDS if backend_available(b)]),
+        ("torch_threads", threads),
+        ("batch_size", list(AUTOTUNE_BATCH_SIZES)),
+        ("cv2_threads", threads),
+        ("blas_threads", threads),
+    ]
+    for name, options in dimensions:
+        for value in options:
+            if time.monotonic() - started > seconds or interrupted:
+                break
+            if value == getattr(best, name):
+                continue
+            candidate = replace(best, **{name: value})
+            candidate_time = trial(candidate)
+            if idle is not None and not idle():
+                interrupted = True
+                break
+            # Small differences are noise; only switch for a clear gain
+            if candidate_time < best_time * (1 - AUTOTUNE_MIN_GAIN):
+                best, best_time = candidate, candidate_time
+
+    apply(best)
+    return {
+        "tuned_at": datetime.now().isoformat(timespec="seconds"),
+        "interrupted": interrupted,
+        "cpus": cpus,
+        "ms_per_frame": round(best_time * 1000, 3),
+        "elapsed_s": round(time.monotonic() - started, 1),
+        "trials": trials,
+        "config": asdict(best),
+    }
+
+def tune_on_boot():
+    """
+    Apply this host's saved settings, measuring them first if there are none
+
+    Runs before the model warm-up, so /ready waits for it. With
+    AUTOTUNE_ON_BOOT off (or a worker thread cap set) and nothing saved,
+    the current settings stay, as they do when the pose model isn't
+    loaded. /ready keeps traffic away meanwhile, but a
+    request can still arrive directly: the search only runs while no
+    analysis is in flight and stops when one starts, keeping the best
+    settings measured so far without saving them (the next boot measures
+    again). Analyses pick up the result when they start.
+    """
+    if apply_saved() is not None or not AUTOTUNE_ON_BOOT or _thread_cap is not None:
+        return
+    # Deferred: readiness is imported by the apps after this module
+    from app.readiness import analysis_jobs
+
+    def idle() -> bool:
+        return analysis_jobs.value == 0
+
+    if not idle():
+        logger.info("Skipping boot-time autotune: analyses are running")
+        return
+    try:
+        report = tune(idle=idle)
+    except RuntimeError as e:
+        logger.warning(f"Skipping boot-time autotune: {e}")
+        return
+    if report["interrupted"]:
+        logger.info(f"Autotune interrupted by an analysis; using {report['config']} for now, not saved")
+        return
+    save(TuneConfig(**report["config"]), report)
+    logger.info(f"Autotuned runtime settings in {report['elapsed_s']}s: {report['config']} "
+                f"({report['ms_per_frame']} ms/frame)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the fastest inference settings for this host")
+    parser.add_argument("--seconds", type=float, default=AUTOTUNE_SECONDS, help="time budget for the search")
+    parser.add_argument("--frames", type=int, default=AUTOTUNE_FRAMES, help="frames per measurement")
+    parser.add_argument("--show", action="store_true", help="print the saved settings for this host and exit")
+    parser.add_argument("--no-save", action="store_true", help="measure only")
+    args = parser.parse_args()
+
+    if args.show:
+        config = load_saved()
+        print(json.dumps({"host": host_fingerprint(), "config": asdict(config) if config else None}, indent=2))
+        return
+
+    logging.disable(logging.INFO)
+    try:
+        report = tune(args.seconds, args.frames)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    if not args.no_save:
+        save(TuneConfig(**report["config"]), report)
+    print(json.dumps(dict(report, host=host_fingerprint()), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,135 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).parent.parent
 UPLOAD_DIR = BASE_DIR / "uploads"
 OUTPUT_DIR = BASE_DIR / "outputs"
 MODEL_DIR = BASE_DIR / "models"
+CALIBRATION_DIR = BASE_DIR / "calibration"
+KEYFRAME_DIR = OUTPUT_DIR / "keyframes"
 
 UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
 MODEL_DIR.mkdir(exist_ok=True)
+CALIBRATION_DIR.mkdir(exist_ok=True)
+KEYFRAME_DIR.mkdir(exist_ok=True)
 
 MAX_VIDEO_SIZE_MB = 100
 ALLOWED_EXTENSIONS = {".mp4", ".mov", ".avi", ".webm"}
 DEFAULT_FPS = 30
 MAX_PROCESS_TIME_SEC = 60
+# Degradation as MAX_PROCESS_TIME_SEC approaches: pose gets this share of
+# it; when it would overrun, sampling thins out (stride doubles up to the
+# max), then the model steps down to its next smaller POSE_INPUT_SIZES
+# tier, then pose stops where it is
+POSE_BUDGET_SHARE = 0.7
+DEGRADE_CHECK_FRAMES = 15  # source frames between projections
+DEGRADE_MAX_STRIDE = 4
+RENDER_COST_FACTOR = 3.0  # annotating a frame vs decoding it; annotation is skipped if it won't fit
+RENDER_QUEUE_FRAMES = 4
+CANCEL_CHECK_FRAMES = 8  # frames between cancellation checks in decode/render loops
+DISCONNECT_POLL_SEC = 0.5
+
+# "auto" (ffmpeg when installed), "ffmpeg" or "opencv"
+VIDEO_ENCODER = "auto"
+FFMPEG_PRESET = "veryfast"
+FFMPEG_CRF = 23
+FFMPEG_THREADS = 0  # 0 = let x264 decide
+
+KEYFRAME_FORMATS = ("jpg", "webp")
+KEYFRAME_HEIGHT = 480
+KEYFRAME_JPEG_QUALITY = 85
+KEYFRAME_WEBP_QUALITY = 80
+SEEK_GRAB_LIMIT = 30  # frames ahead that are cheaper to grab() than to seek
+
+COMPACT_FLOAT_DIGITS = 4  # significant digits kept in compact API responses
+
+LOG_LEVEL = os.environ.get("JAVELINK_LOG_LEVEL", "INFO")
+LOG_JSON = os.environ.get("JAVELINK_LOG_FORMAT", "json") == "json"
+LOG_RATE_LIMIT_SEC = 10.0  # min gap between hot-path messages from one call site
+
+# Admission: analyses run at once, and how many more may wait for a slot
+ANALYSIS_MAX_CONCURRENT = int(os.environ.get("JAVELINK_MAX_CONCURRENT", "2"))
+ANALYSIS_MAX_QUEUE = int(os.environ.get("JAVELINK_MAX_QUEUE", "8"))
+ANALYSIS_QUEUE_TIMEOUT_SEC = 120
+ANALYSIS_EXPECTED_SEC = 10.0  # job duration assumed for Retry-After until some have run
+# Wait (or refuse) when a clip's estimated peak memory isn't available
+ADMISSION_MEMORY_CHECK = True
+ANALYSIS_BASE_MEMORY_MB = 150  # model, buffers and Python objects per analysis
+ANALYSIS_FRAME_BUFFERS = 12  # decoded frames alive at once per analysis
+# Queued jobs run shortest first. Estimated run time is width x height x
+# frames x model tier (gigapixels) times a learned rate; every second of
+# waiting takes SJF_AGING seconds off a job's estimate so none starves
+SJF_SECONDS_PER_GPX = 3.0  # starting rate, until jobs have finished
+SJF_AGING = 1.0
+JOB_CLASS_BOUNDS_GPX = (0.25, 2.0)  # small / medium / large (720p 3s ~ 0.08)
+QUEUE_WAIT_HISTORY = 200  # waits kept per job class for percentiles
+
+# /ready fails when any of these is exceeded
+READY_QUEUE_CAPACITY = ANALYSIS_MAX_CONCURRENT + ANALYSIS_MAX_QUEUE  # requests waiting or running
+READY_MIN_FREE_DISK_MB = 2 * MAX_VIDEO_SIZE_MB  # in UPLOAD_DIR
+READY_MIN_FREE_MEMORY_MB = 256
+
+# Admin endpoints (/debug/*) are disabled unless a token is configured
+ADMIN_TOKEN = os.environ.get("JAVELINK_ADMIN_TOKEN")
+PROFILE_MAX_SECONDS = 60
+PROFILE_DEFAULT_HZ = 100
+PROFILE_MAX_HZ = 500
+
+LOOP_LAG_INTERVAL_SEC = 0.1
+LOOP_BLOCK_THRESHOLD_SEC = 0.5  # log the loop thread's stack past this stall
+LOOP_LAG_WINDOW = 3000  # lag samples kept for percentiles (5 min at 0.1s)
+LOOP_BLOCK_HISTORY = 20
+
+# Frames kept per tracemalloc traceback; 0 = Python allocations not traced
+TRACEMALLOC_FRAMES = int(os.environ.get("JAVELINK_TRACEMALLOC", "0"))
+
+# Cold start targets: importing an entry point (benchmarks.startup) and
+# process start to /ready, warm-up included (logged when exceeded)
+STARTUP_IMPORT_BUDGET_MS = 750
+STARTUP_READY_BUDGET_SEC = float(os.environ.get("JAVELINK_STARTUP_BUDGET_SEC", "45"))
+# Imported in the warm-up thread rather than by the first request
+PRELOAD_MODULES = ("scipy.signal",)
+
+# Model artifacts are loaded from MODEL_DIR only, checked against the
+# checksums in MODEL_REGISTRY_FILE; with MODEL_OFFLINE nothing is downloaded
+# (python -m app.services.model_registry fetch does it explicitly)
+MODEL_REGISTRY_FILE = MODEL_DIR / "registry.json"
+MODEL_VARIANT_DIR = MODEL_DIR / "variants"  # converted models, e.g. ONNX per input size
+MODEL_OFFLINE = os.environ.get("JAVELINK_MODEL_OFFLINE", "1") == "1"
+MODEL_REQUIRE_CHECKSUM = os.environ.get("JAVELINK_MODEL_REQUIRE_CHECKSUM", "0") == "1"  # refuse unpinned files
+POSE_HALF = False  # FP16 variants, for GPU runtimes
+
+# Pose model tiers: "<model><input size>", e.g. "n320", "s480", "m640".
+# Cost is relative per-frame inference time (~FLOPs, n at 640 = 1)
+POSE_MODELS = {
+    "n": ("yolov8n-pose.pt", 1.0),
+    "s": ("yolov8s-pose.pt", 3.3),
+    "m": ("yolov8m-pose.pt", 8.8),
+}
+POSE_INPUT_SIZES = (320, 480, 640)
+DEFAULT_POSE_TIER = "n640"
+# Defaults until the autotuner has measured this host (app.autotune)
+POSE_BATCH_SIZE = 1
+POSE_BACKEND = "torch"
+AUTOTUNE_FILE = MODEL_DIR / "autotune.json"  # best settings per host fingerprint
+AUTOTUNE_ON_BOOT = os.environ.get("JAVELINK_AUTOTUNE", "1") == "1"  # measure when nothing is saved
+AUTOTUNE_SECONDS = 20.0
+AUTOTUNE_FRAMES = 8
+AUTOTUNE_BATCH_SIZES = (1, 2, 4, 8)
+AUTOTUNE_MIN_GAIN = 0.05  # fraction faster a setting must be to replace the current best
+# Auto tier ceiling by load: idle box, jobs waiting, queue at least half full
+POSE_TIER_IDLE = "m640"
+POSE_TIER_BUSY = "n640"
+POSE_TIER_PEAK = "n320"
+
+# app.server: workers forked from one parent that has loaded the models,
+# so their weights are shared copy-on-write; each worker gets an equal
+# share of the CPUs for its thread pools
+SERVER_WORKERS = int(os.environ.get("JAVELINK_WORKERS", "2"))
+SERVER_PRELOAD_TIERS = (DEFAULT_POSE_TIER, POSE_TIER_IDLE, POSE_TIER_BUSY, POSE_TIER_PEAK)
+SERVER_RESPAWN_DELAY_SEC = 1.0  # before replacing a worker that died
+SERVER_SHUTDOWN_TIMEOUT_SEC = 30.0  # graceful stop, then SIGKILL
 
 POSE_CONFIDENCE_THRESHOLD = 0.5
 OBJECT_CONFIDENCE_THRESHOLD = 0.3
@@ -21,6 +138,9 @@ RELEASE_DISTANCE_THRESHOLD = 0.1
 
 DEFAULT_PERSON_HEIGHT = 1.75
 MARKER_SIZE_M = 1.0
+ARUCO_MARKER_SIZE_M = 0.2
+ARUCO_DICTIONARY = "DICT_4X4_50"
+MARKER_SEARCH_FRAMES = 5
 AUTO_SCALE_COEFFICIENT = 1.05
 
 SAVGOL_WINDOW = 7
@@ -39,3 +159,4 @@ ERROR_NO_MARKER = "Marker not detected"
 ERROR_NO_OBJECT = "Object not detected"
 ERROR_LOW_FPS = "Low frame rate"
 ERROR_SHORT_CLIP = "Insufficient frames"
+ERROR_NO_POSE_MODEL = "Pose model not loaded"
@@ -0,0 +1,177 @@
+"""Queue-backed structured logging with request/job ids"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+from app.config import LOG_LEVEL, LOG_JSON, LOG_RATE_LIMIT_SEC
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+job_id_var: ContextVar[Optional[str]] = ContextVar("job_id", default=None)
+
+# Pass as `extra=` on hot-path statements: at most one record per call
+# site every LOG_RATE_LIMIT_SEC, the next one says how many were dropped
+RATE_LIMITED = {"rate_limited": True}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class ContextFilter(logging.Filter):
+    """Stamp records with the request/job id of the emitting context"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.job_id = job_id_var.get()
+        return True
+
+class RateLimitFilter(logging.Filter):
+    """Drops repeats of records marked RATE_LIMITED, per call site"""
+
+    def __init__(self, interval: float = LOG_RATE_LIMIT_SEC):
+        super().__init__()
+        self.interval = interval
+        self._sites: Dict[Tuple[str, int], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "rate_limited", False):
+            return True
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._sites.get(site, (float("-inf"), 0))
+            if now - last < self.interval:
+                self._sites[site] = (last, suppressed + 1)
+                return False
+            self._sites[site] = (now, 0)
+        record.suppressed = suppressed
+        return True
+
+class _StructuredQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback out of the message field"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve args and exc_info here: they may not survive the queue
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("request_id", "job_id", "suppressed"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        if record.exc_info:
+            record.exc_text = record.exc_text or self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+_listener: Optional[QueueListener] = None
+
+def setup_logging(level: str = LOG_LEVEL, json_format: bool = LOG_JSON):
+    """
+    Route all logging through a queue drained by a background thread
+
+    Callers only pay for a queue put; formatting and the stdout write
+    happen on the listener thread. uvicorn's loggers are folded in too.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JSONFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+
+    # Filters run on the caller's side so the context ids are the caller's
+    handler = _StructuredQueueHandler(queue.SimpleQueue())
+    handler.addFilter(RateLimitFilter())
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uv = logging.getLogger(name)
+        uv.handlers.clear()
+        uv.propagate = True
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    if hasattr(os, "register_at_fork"):
+        # Fork with the listener stopped: its thread would not exist in the
+        # child and could be holding the queue's lock. Both sides restart it
+        os.register_at_fork(before=_pause_listener, after_in_parent=_resume_listener, after_in_child=_resume_listener)
+
+def shutdown_logging():
+    """Write out queued records and stop the listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _pause_listener():
+    if _listener is not None:
+        _listener.stop()
+
+def _resume_listener():
+    if _listener is not None:
+        _listener.start()
+
+class RequestIdMiddleware:
+    """
+    Bind a request id for the duration of each HTTP request
+
+    Uses the client's X-Request-ID when given and echoes it back.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((b"x-request-id", request_id.encode("latin-1")))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,145 @@
+"""Event-loop lag monitor and blocking-call detector"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Optional
+
+from fastapi import FastAPI
+
+from app.monitoring import LOOP_LAG, LOOP_BLOCKS
+from app.config import (
+    LOOP_LAG_INTERVAL_SEC, LOOP_BLOCK_THRESHOLD_SEC, LOOP_LAG_WINDOW, LOOP_BLOCK_HISTORY
+)
+
+logger = logging.getLogger(__name__)
+
+# Innermost frames kept from a blocked loop's stack
+STACK_LIMIT = 20
+
+class LoopMonitor:
+    """
+    Measures how late the event loop runs a periodic timer
+
+    A task sleeps for `interval` and records how much later than that it
+    woke up. A watchdog thread watches the task's heartbeat; when the loop
+    has been stuck for `threshold` it logs the loop thread's stack, which
+    is the callback doing the blocking.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_LAG_INTERVAL_SEC,
+        threshold: float = LOOP_BLOCK_THRESHOLD_SEC,
+        window: int = LOOP_LAG_WINDOW
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags = deque(maxlen=window)
+        self.blocks = deque(maxlen=LOOP_BLOCK_HISTORY)
+        self._heartbeat = time.monotonic()
+        self._stall: Optional[dict] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _measure(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - start - self.interval)
+            self._heartbeat = now
+            self.lags.append(lag)
+            LOOP_LAG.observe(lag)
+
+            stall = self._stall
+            if stall is not None:
+                stall["duration_s"] = round(lag, 3)
+                self._stall = None
+                logger.warning(f"Event loop unblocked after {lag:.2f}s")
+
+    def _watch(self):
+        check_every = min(self.interval, self.threshold / 2)
+        while not self._stop.wait(check_every):
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled < self.threshold or self._stall is not None:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = traceback.format_stack(frame, limit=STACK_LIMIT) if frame is not None else []
+            event = {
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "duration_s": None,  # filled in once the loop runs again
+                "stack": [line.rstrip() for line in stack],
+            }
+            self._stall = event
+            self.blocks.append(event)
+            LOOP_BLOCKS.inc()
+            logger.warning(f"Event loop blocked for {stalled:.2f}s in:\n{''.join(stack).rstrip()}")
+
+    def percentiles(self) -> dict:
+        import numpy as np
+
+        lags = np.asarray(self.lags) * 1000
+        if len(lags) == 0:
+            return {"samples": 0}
+        p50, p95, p99 = np.percentile(lags, [50, 95, 99])
+        return {
+            "samples": len(lags),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(lags.max()), 2),
+        }
+
+    def report(self) -> dict:
+        return {
+            "interval_s": self.interval,
+            "threshold_s": self.threshold,
+            "lag": self.percentiles(),
+            "blocked": self._stall is not None,
+            "recent_blocks": list(self.blocks),
+        }
+
+loop_monitor = LoopMonitor()
+
+def install_loop_monitor(app: FastAPI):
+    """Run the process-wide loop monitor for the app's lifetime"""
+    inner = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app_):
+        await loop_monitor.start()
+        try:
+            async with inner(app_) as state:
+                yield state
+        finally:
+            await loop_monitor.stop()
+
+    app.router.lifespan_context = lifespan
@@ -2,25 +2,36 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from app.startup import startup, preload
+
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
-from app.routers import analyze, health
-from app.config import APP_TITLE
+from app.routers import analyze, health, calibration, keyframes, debug
+from app.responses import FastJSONResponse
+from app.monitoring import mount_metrics, start_memory_tracing
+from app.loop_monitor import install_loop_monitor
+from app.readiness import install_warmup
+from app.autotune import tune_on_boot
+from app.services.detectors import warm_up_pose_detector
+from app.log import setup_logging, RequestIdMiddleware
+from app.config import APP_TITLE, TRACEMALLOC_FRAMES
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+startup.mark("imports")
+
+setup_logging()
 logger = logging.getLogger(__name__)
 
+start_memory_tracing(TRACEMALLOC_FRAMES)
+
 app = FastAPI(
     title=APP_TITLE,
     version="0.1.0",
-    description="Javelin throw analysis application"
+    description="Javelin throw analysis application",
+    default_response_class=FastJSONResponse
 )
 
 app.add_middleware(
@@ -29,13 +40,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+app.add_middleware(RequestIdMiddleware)
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
 
 app.include_router(health.router)
 app.include_router(analyze.router)
+app.include_router(calibration.router)
+app.include_router(keyframes.router)
+app.include_router(debug.router)
+mount_metrics(app)
+install_loop_monitor(app)
+
+def warm_up():
+    preload()
+    with startup.measure("autotune"):
+        tune_on_boot()
+    with startup.measure("pose_model"):
+        warm_up_pose_detector()
+
+install_warmup(app, warm_up)
 
 @app.get("/")
 async def root(request: Request):
@@ -44,6 +71,8 @@ async def root(request: Request):
         {"request": request, "title": APP_TITLE}
     )
 
+startup.mark("app")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from enum import Enum
 
 class ViewType(str, Enum):
@@ -13,6 +13,20 @@ class Handedness(str, Enum):
 class ScaleMethod(str, Enum):
     MARKER = "marker"
     AUTO = "auto"
+    PROFILE = "profile"
+
+class MarkerType(str, Enum):
+    RED = "red"
+    ARUCO = "aruco"
+
+class OutputMode(str, Enum):
+    VIDEO = "video"
+    OVERLAY = "overlay"
+    BOTH = "both"
+
+class ProfileFormat(str, Enum):
+    COLLAPSED = "collapsed"
+    SPEEDSCOPE = "speedscope"
 
 class QCStatus(str, Enum):
     GOOD = "GOOD"
@@ -26,6 +40,8 @@ class MetaInfo(BaseModel):
     handedness: str
     scale_method: str
     m_per_px: float
+    video_hash: Optional[str] = None
+    model_tier: Optional[str] = None  # pose model and input size, e.g. "n640"
 
 class EventFrames(BaseModel):
     penultimate_frame: Optional[int] = None
@@ -49,10 +65,41 @@ class QualityControl(BaseModel):
     overall_status: str = "WARN"
     notes: List[str] = []
 
+class CalibrationProfile(BaseModel):
+    venue: str
+    camera: str
+    m_per_px: float
+    marker_type: str
+    view: str
+    source_frame: int = 0
+    created_at: str
+
+class InferenceLatency(BaseModel):
+    frames: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+class StageMemory(BaseModel):
+    rss_mb: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    py_alloc_mb: Optional[float] = None
+    py_peak_mb: Optional[float] = None
+
+class DebugInfo(BaseModel):
+    stages_ms: Dict[str, float]
+    inference: Optional[InferenceLatency] = None
+    memory: Dict[str, StageMemory] = {}
+
 class AnalyzeResponse(BaseModel):
     meta: MetaInfo
     events: EventFrames
     metrics: Metrics
     qc: QualityControl
     annotated_video_path: Optional[str] = None
+    overlay_path: Optional[str] = None
+    keyframes_path: Optional[str] = None
     error: Optional[str] = None
+    debug: Optional[DebugInfo] = None
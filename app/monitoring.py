@@ -0,0 +1,290 @@
+"""Prometheus metrics and per-request stage timings for the analysis pipeline"""
+import functools
+import inspect
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Per-frame stages sit in the low milliseconds, whole clips in seconds
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class _NoopMetric:
+    """Stands in for a metric when prometheus_client is not installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+if PROMETHEUS_AVAILABLE:
+    STAGE_SECONDS = Histogram(
+        "javelink_stage_seconds", "Time spent in each analysis stage", ["stage"], buckets=STAGE_BUCKETS
+    )
+    FRAMES_DECODED = Counter("javelink_frames_decoded_total", "Video frames decoded")
+    FRAMES_INFERRED = Counter("javelink_frames_inferred_total", "Frames passed through the pose model")
+    QUEUE_DEPTH = Gauge("javelink_queue_depth", "Analysis requests waiting or running")
+    MODEL_LOADED = Gauge("javelink_model_loaded", "1 when the pose model is loaded")
+    LOOP_LAG = Histogram(
+        "javelink_event_loop_lag_seconds", "Delay in scheduling the event loop's timer callbacks",
+        buckets=LOOP_LAG_BUCKETS
+    )
+    LOOP_BLOCKS = Counter("javelink_event_loop_blocks_total", "Callbacks that blocked the event loop past the threshold")
+    ANALYSIS_RUNNING = Gauge("javelink_analysis_running", "Analyses holding an admission slot")
+    ADMISSION_REJECTED = Counter(
+        "javelink_admission_rejected_total", "Analysis requests turned away by admission control", ["reason"]
+    )
+    QUEUE_WAIT = Histogram(
+        "javelink_queue_wait_seconds", "Time analyses waited for a slot", ["job_class"], buckets=STAGE_BUCKETS
+    )
+    POSE_TIER_JOBS = Counter("javelink_pose_tier_jobs_total", "Analyses per pose model tier", ["tier", "source"])
+    STAGE_RSS = Gauge("javelink_stage_rss_bytes", "Process RSS after the latest run of each stage", ["stage"])
+    STAGE_PY_PEAK = Gauge(
+        "javelink_stage_python_peak_bytes",
+        "Peak Python allocations above the start of the latest run of each stage (tracemalloc)",
+        ["stage"]
+    )
+else:
+    STAGE_SECONDS = FRAMES_DECODED = FRAMES_INFERRED = QUEUE_DEPTH = MODEL_LOADED = _NoopMetric()
+    STAGE_RSS = STAGE_PY_PEAK = LOOP_LAG = LOOP_BLOCKS = _NoopMetric()
+    ANALYSIS_RUNNING = ADMISSION_REJECTED = QUEUE_WAIT = POSE_TIER_JOBS = _NoopMetric()
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+def process_memory(pid: int) -> Optional[Dict[str, int]]:
+    """
+    RSS, PSS and private (USS) bytes of a process, from /proc/<pid>/smaps_rollup
+
+    RSS counts pages shared with other processes in full; PSS splits them
+    between the sharers, so PSS summed over processes is their real total.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line and not line[0].isdigit())
+    except OSError:
+        return None
+    kb = {name: int(value.split()[0]) * 1024 for name, value in fields.items()}
+    return {
+        "rss": kb.get("Rss", 0),
+        "pss": kb.get("Pss", 0),
+        "uss": kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0),
+        "shared": kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0),
+    }
+
+def peak_rss_bytes() -> Optional[int]:
+    """High-water mark of this process's RSS"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def start_memory_tracing(frames: int):
+    """
+    Trace Python allocations so stages can report them
+
+    tracemalloc slows allocation-heavy code down, so it is opt-in
+    (TRACEMALLOC_FRAMES); RSS figures are always recorded.
+    """
+    if frames > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+def timed(stage: str) -> Callable:
+    """
+    Record a function's wall time in the stage histogram
+
+    Works on plain and async functions. The labelled child is bound once
+    here, so each call costs two perf_counter() reads and an observe().
+    """
+    histogram = STAGE_SECONDS.labels(stage)
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+
+    return decorator
+
+def mount_metrics(app: FastAPI, path: str = "/metrics"):
+    """Expose the process's metrics in Prometheus text format"""
+    @app.get(path, include_in_schema=False)
+    async def metrics():
+        if not PROMETHEUS_AVAILABLE:
+            raise HTTPException(status_code=503, detail="prometheus_client is not installed")
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+class RequestTimings:
+    """
+    Stage durations for one request
+
+    Repeated stages accumulate, so per-frame work can be measured inside
+    a loop. Per-frame inference latencies are kept only when frame_detail
+    is set.
+    """
+
+    def __init__(self, frame_detail: bool = False):
+        self.frame_detail = frame_detail
+        self.stages: Dict[str, float] = {}
+        self.memory: Dict[str, dict] = {}
+        self.frame_latencies: List[float] = []
+        self.start = time.perf_counter()
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_frame(self, seconds: float):
+        """One frame through the pose model"""
+        self.add("inference", seconds)
+        if self.frame_detail:
+            self.frame_latencies.append(seconds)
+
+    @contextmanager
+    def measure(self, name: str):
+        """Time a stage and record its memory use"""
+        with self.track_memory(name):
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.add(name, time.perf_counter() - start)
+
+    @contextmanager
+    def track_memory(self, name: str):
+        """
+        Record RSS and Python allocations around a stage
+
+        tracemalloc's peak is process-wide and reset at each stage start,
+        so with concurrent requests (or nested stages) the Python peak is
+        an upper bound for the stage.
+        """
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            py_start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            entry = self.memory.setdefault(name, {
+                "rss_mb": None, "peak_rss_mb": None, "py_alloc_mb": None, "py_peak_mb": None
+            })
+            rss = rss_bytes()
+            peak = peak_rss_bytes()
+            if rss is not None:
+                entry["rss_mb"] = round(rss / 2**20, 2)
+                STAGE_RSS.labels(name).set(rss)
+            if peak is not None:
+                entry["peak_rss_mb"] = round(peak / 2**20, 2)
+            if tracing:
+                current, py_peak = tracemalloc.get_traced_memory()
+                # Repeated stages (per-frame work) sum their deltas and keep the worst peak
+                entry["py_alloc_mb"] = round((entry["py_alloc_mb"] or 0.0) + (current - py_start) / 2**20, 3)
+                entry["py_peak_mb"] = round(max(entry["py_peak_mb"] or 0.0, (py_peak - py_start) / 2**20), 3)
+                STAGE_PY_PEAK.labels(name).set(py_peak - py_start)
+
+    def stages_ms(self) -> Dict[str, float]:
+        stages = {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+        stages["total"] = round((time.perf_counter() - self.start) * 1000, 1)
+        return stages
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in ms"""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.stages_ms().items())
+
+    def frame_summary(self) -> Optional[dict]:
+        if not self.frame_latencies:
+            return None
+        import numpy as np
+
+        ms = np.asarray(self.frame_latencies) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        return {
+            "frames": len(ms),
+            "mean_ms": round(float(ms.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(ms.max()), 3),
+        }
+
+    def debug_info(self) -> dict:
+        return {"stages_ms": self.stages_ms(), "inference": self.frame_summary(), "memory": self.memory}
+
+# Form value of `debug` that adds the breakdown to the response body
+DEBUG_TIMINGS = "timings"
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def start_request_timings(frame_detail: bool = False) -> RequestTimings:
+    """Begin collecting stage timings for the current request"""
+    timings = RequestTimings(frame_detail)
+    _request_timings.set(timings)
+    return timings
+
+def current_timings() -> RequestTimings:
+    """
+    The current request's timings
+
+    Outside a request (benchmarks, scripts) a detached instance is
+    returned, so callers never need to check.
+    """
+    return _request_timings.get() or RequestTimings()
+
+def with_server_timing(response: Response, timings: RequestTimings) -> Response:
+    response.headers["Server-Timing"] = timings.server_timing()
+    return response
@@ -0,0 +1,131 @@
+"""In-process sampling profiler"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from app.config import PROFILE_DEFAULT_HZ
+
+# (function, file, first line)
+FrameKey = Tuple[str, str, int]
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    # Strip the longest sys.path entry so frames read as module paths
+    for entry in sorted((p for p in sys.path if p), key=len, reverse=True):
+        if filename.startswith(entry + os.sep):
+            return filename[len(entry) + 1:]
+    return filename
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every thread in this process
+
+    A daemon thread reads sys._current_frames() at a fixed rate. No trace
+    or profile hooks are installed, so profiled code runs at full speed;
+    the cost is one stack walk per thread per sample, which makes it safe
+    to run against live traffic. Samples are wall-clock: idle threads
+    show up waiting.
+
+    Only this process is sampled. Under app.server each worker is a
+    separate process and profiles itself, so every output names its pid:
+    collapsed stacks start with a "pid <n>" frame, and speedscope profiles
+    carry it in their names.
+    """
+
+    def __init__(self, hz: int = PROFILE_DEFAULT_HZ):
+        self.pid = os.getpid()
+        self.interval = 1.0 / hz
+        self.samples: Counter = Counter()  # (thread name, stack root-first) -> count
+        self.sample_count = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        start = time.perf_counter()
+        next_tick = start
+        while not self._stop.is_set():
+            self._take_sample()
+            next_tick += self.interval
+            # Don't try to catch up after a stall (e.g. a long GIL hold)
+            delay = next_tick - time.perf_counter()
+            if delay < 0:
+                next_tick = time.perf_counter()
+                delay = 0
+            self._stop.wait(delay)
+        self.duration = time.perf_counter() - start
+
+    def _take_sample(self):
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[(names.get(ident, f"thread-{ident}"), tuple(stack))] += 1
+        self.sample_count += 1
+
+    @staticmethod
+    def _label(key: FrameKey) -> str:
+        name, filename, line = key
+        return f"{name} ({_short_path(filename)}:{line})"
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format, one stack per line, rooted at the pid"""
+        lines = []
+        for (thread, stack), count in self.samples.most_common():
+            frames = ";".join(self._label(key).replace(";", ":") for key in stack)
+            lines.append(f"pid {self.pid};{thread};{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> dict:
+        """speedscope file format: one sampled profile per thread"""
+        frame_index: Dict[FrameKey, int] = {}
+        frames: List[dict] = []
+        profiles: Dict[str, dict] = {}
+
+        for (thread, stack), count in self.samples.items():
+            indices = []
+            for key in stack:
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({"name": key[0], "file": _short_path(key[1]), "line": key[2]})
+                indices.append(frame_index[key])
+            profile = profiles.setdefault(thread, {
+                "type": "sampled",
+                "name": f"{thread} (pid {self.pid})",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(self.duration, 6),
+                "samples": [],
+                "weights": [],
+            })
+            profile["samples"].append(indices)
+            profile["weights"].append(round(count * self.interval, 6))
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"javelink pid {self.pid}",
+            "exporter": "javelink",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
@@ -0,0 +1,167 @@
+"""Liveness and readiness probes"""
+import asyncio
+import logging
+import shutil
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.monitoring import QUEUE_DEPTH
+from app.startup import startup
+from app.config import UPLOAD_DIR, READY_QUEUE_CAPACITY, READY_MIN_FREE_DISK_MB, READY_MIN_FREE_MEMORY_MB
+
+logger = logging.getLogger(__name__)
+
+class JobCounter:
+    """Analysis requests waiting or running, readable without prometheus"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self):
+        with self._lock:
+            self._value += 1
+        QUEUE_DEPTH.inc()
+
+    def dec(self):
+        with self._lock:
+            self._value -= 1
+        QUEUE_DEPTH.dec()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+analysis_jobs = JobCounter()
+
+class ModelState:
+    """Whether the pose model has been loaded and run once"""
+
+    def __init__(self):
+        self._ready = threading.Event()
+        self.error: Optional[str] = None
+
+    def set_ready(self):
+        self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+model_state = ModelState()
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        return int(Path(path).read_text().strip())
+    except (OSError, ValueError):
+        return None  # missing, or "max"
+
+def available_memory_bytes() -> Optional[int]:
+    """
+    Memory this process can still take
+
+    The tighter of the cgroup (v2) limit and the host's MemAvailable, so
+    container limits count.
+    """
+    available = None
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        try:
+            import psutil
+            available = psutil.virtual_memory().available
+        except ImportError:
+            pass
+
+    limit = _read_int("/sys/fs/cgroup/memory.max")
+    usage = _read_int("/sys/fs/cgroup/memory.current")
+    if limit is not None and usage is not None:
+        headroom = max(0, limit - usage)
+        available = headroom if available is None else min(available, headroom)
+    return available
+
+def free_disk_bytes(path: Path = UPLOAD_DIR) -> Optional[int]:
+    try:
+        return shutil.disk_usage(path).free
+    except OSError:
+        return None
+
+def readiness(model_ready: bool, queue_depth: int, capacity: int = READY_QUEUE_CAPACITY) -> dict:
+    """
+    Evaluate every readiness check
+
+    Each one is a flag read or a single syscall, so probes stay cheap
+    however often they are sent. A check whose figure can't be read on
+    this platform passes.
+    """
+    disk = free_disk_bytes()
+    memory = available_memory_bytes()
+    checks = {
+        "model": {"ok": model_ready},
+        "queue": {"ok": queue_depth < capacity, "depth": queue_depth, "capacity": capacity},
+        "disk": {
+            "ok": disk is None or disk >= READY_MIN_FREE_DISK_MB * 2**20,
+            "free_mb": None if disk is None else round(disk / 2**20),
+            "min_mb": READY_MIN_FREE_DISK_MB,
+        },
+        "memory": {
+            "ok": memory is None or memory >= READY_MIN_FREE_MEMORY_MB * 2**20,
+            "available_mb": None if memory is None else round(memory / 2**20),
+            "min_mb": READY_MIN_FREE_MEMORY_MB,
+        },
+    }
+    return {"ready": all(check["ok"] for check in checks.values()), "checks": checks}
+
+def readiness_response(model_ready: bool, queue_depth: int) -> JSONResponse:
+    """200 when ready, 503 otherwise; the body lists the checks either way"""
+    report = readiness(model_ready, queue_depth)
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+def mount_probes(app: FastAPI, model_ready: Callable[[], bool], prefix: str = ""):
+    """Add /live and /ready to a standalone app"""
+    @app.get(f"{prefix}/live", include_in_schema=False)
+    async def live():
+        return {"status": "alive"}
+
+    @app.get(f"{prefix}/ready", include_in_schema=False)
+    async def ready():
+        return readiness_response(model_ready(), analysis_jobs.value)
+
+def install_warmup(app: FastAPI, warm_up: Callable[[], object]):
+    """
+    Load the model in a worker thread once the app has started
+
+    The server accepts connections (and answers /live) straight away;
+    /ready turns true when warm_up returns.
+    """
+    inner = app.router.lifespan_context
+
+    def _run():
+        try:
+            with startup.measure("warm_up"):
+                warm_up()
+            model_state.set_ready()
+            startup.set_ready()
+            logger.info("Model warmed up")
+        except Exception as e:
+            model_state.error = str(e)
+            logger.error(f"Model warm-up failed: {e}")
+
+    @asynccontextmanager
+    async def lifespan(app_):
+        task = asyncio.create_task(asyncio.to_thread(_run))
+        async with inner(app_) as state:
+            yield state
+        if not task.done():
+            task.cancel()
+
+    app.router.lifespan_context = lifespan
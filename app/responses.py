@@ -0,0 +1,68 @@
+"""Fast JSON responses for the API models"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.config import COMPACT_FLOAT_DIGITS
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def compact_value(value: Any, digits: int = COMPACT_FLOAT_DIGITS) -> Any:
+    """
+    Drop null fields and round floats, recursively
+
+    Floats keep significant digits rather than decimals, so small values
+    such as a 0.0096 m/px scale survive compaction.
+    """
+    if isinstance(value, float):
+        return float(f"{value:.{digits}g}")
+    if isinstance(value, dict):
+        return {k: compact_value(v, digits) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [compact_value(v, digits) for v in value]
+    return value
+
+def dump_json(content: Any, compact: bool = False) -> bytes:
+    """
+    Serialise a model (or plain data) to JSON bytes
+
+    Models go straight through pydantic-core's serialiser, which beats
+    model_dump() + orjson. Plain data and compact output use orjson when
+    installed, otherwise the stdlib encoder with compact separators.
+    """
+    if isinstance(content, BaseModel):
+        if not compact:
+            return content.model_dump_json().encode("utf-8")
+        content = content.model_dump(mode="json", exclude_none=True)
+    if compact:
+        content = compact_value(content)
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dump_json"""
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+class CompactJSONResponse(JSONResponse):
+    """FastJSONResponse without nulls and with rounded floats"""
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content, compact=True)
+
+def model_response(content: Any, compact: bool = False) -> JSONResponse:
+    """
+    Response for a model returned from a route
+
+    Returning a Response skips FastAPI's response_model re-validation and
+    jsonable_encoder pass; the route's response_model still documents it.
+    """
+    return CompactJSONResponse(content) if compact else FastJSONResponse(content)
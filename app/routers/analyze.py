@@ -1,54 +1,201 @@
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
+import asyncio
+import hashlib
 import logging
 from pathlib import Path
 import uuid
+from typing import Awaitable, Optional
 
 from app.models.schemas import (
     ViewType, Handedness, ScaleMethod,
     AnalyzeResponse, MetaInfo, EventFrames, 
-    Metrics, QualityControl, QCStatus
+    Metrics, QualityControl, QCStatus, OutputMode, DebugInfo
 )
-from app.config import UPLOAD_DIR, OUTPUT_DIR, MAX_VIDEO_SIZE_MB, ALLOWED_EXTENSIONS
+from app.services.pipeline import analyze_video
+from app.services.video import probe_video
+from app.services.calibration import load_profile
+from app.services.jobs import Job, AnalysisCancelled, start_job, finish_job, cancel_job
+from app.admission import admission, JobCost, choose_pose_tier
+from app.services.detectors import POSE_TIERS
+from app.responses import model_response
+from app.log import job_id_var
+from app.readiness import analysis_jobs
+from app.monitoring import DEBUG_TIMINGS, start_request_timings, with_server_timing
+from app.services.encoder import is_output_pending, when_output_done
+from app.config import UPLOAD_DIR, OUTPUT_DIR, MAX_VIDEO_SIZE_MB, ALLOWED_EXTENSIONS, DISCONNECT_POLL_SEC
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["analyze"])
 
-@router.post("/analyze")
+@router.post("/analyze", response_model=AnalyzeResponse)
 async def analyze(
+    request: Request,
     file: UploadFile = File(...),
-    view: str = Form(...),
-    handedness: str = Form(...),
-    scale_method: str = Form("marker")
+    view: ViewType = Form(...),
+    handedness: Handedness = Form(...),
+    scale_method: ScaleMethod = Form(ScaleMethod.MARKER),
+    venue: Optional[str] = Form(None),
+    camera: Optional[str] = Form(None),
+    output_mode: OutputMode = Form(OutputMode.VIDEO),
+    compact: bool = Form(False),
+    debug: Optional[str] = Form(None),
+    job_id: Optional[str] = Form(None, pattern=r"^[A-Za-z0-9_-]{1,64}$"),
+    model_tier: str = Form("auto")
 ):
+    suffix = Path(file.filename or "").suffix.lower()
+    if suffix not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix}")
+    if model_tier != "auto" and model_tier not in POSE_TIERS:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown model tier: {model_tier} (auto, {', '.join(POSE_TIERS)})"
+        )
+    # "profile" names a stored scale, so it must name one that exists
+    if scale_method == ScaleMethod.PROFILE:
+        if not (venue and camera):
+            raise HTTPException(status_code=400, detail="scale_method=profile requires venue and camera")
+        try:
+            profile = load_profile(venue, camera)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if profile is None:
+            raise HTTPException(status_code=404, detail=f"Calibration profile not found: {venue}/{camera}")
+
+    # A client-chosen job_id lets it cancel the job (DELETE /api/jobs/{job_id})
+    # or supersede it by submitting again; files always get a fresh name
+    name = uuid.uuid4().hex
+    job_id = job_id or name
+    job_id_var.set(job_id)
+    video_path = UPLOAD_DIR / f"{name}{suffix}"
+    output_path = OUTPUT_DIR / f"{name}_annotated.mp4"
+
+    # Turn a burst away before touching the disk
+    admission.check_queue()
+
+    job = start_job(job_id)
+    timings = start_request_timings(frame_detail=debug == DEBUG_TIMINGS)
+    analysis_jobs.inc()
     try:
-        # Simple mock response for now
-        return {
-            "meta": {
-                "fps": 30.0,
-                "frames": 100,
-                "view": view,
-                "handedness": handedness,
-                "scale_method": scale_method,
-                "m_per_px": 0.002
-            },
-            "events": {
-                "penultimate_frame": 50,
-                "plant_frame": 60,
-                "release_frame": 70
-            },
-            "metrics": {
-                "release_angle_deg": 35.0,
-                "release_height_m": 1.9,
-                "release_height_ratio": 1.05,
-                "release_speed_mps": 18.5,
-                "plant_to_release_ms": 333
-            },
-            "qc": {
-                "overall_status": "GOOD",
-                "notes": []
-            }
-        }
+        with timings.measure("upload"):
+            contents = await file.read()
+            if len(contents) > MAX_VIDEO_SIZE_MB * 1024 * 1024:
+                raise HTTPException(status_code=413, detail=f"File too large (max {MAX_VIDEO_SIZE_MB}MB)")
+            with open(video_path, "wb") as f:
+                f.write(contents)
+
+        info = await asyncio.to_thread(probe_video, str(video_path))
+        # Without a frame count the job would cost nothing and jump the queue
+        if info is None:
+            raise HTTPException(status_code=400, detail="Cannot open video")
+        # Picked against the queue as it is now; a pinned tier is used as is
+        tier_source = "pinned"
+        if model_tier == "auto":
+            model_tier, tier_source = choose_pose_tier(info), "auto"
+        cost = JobCost.from_video(info, POSE_TIERS[model_tier].cost)
+        result = await _run_cancellable(request, job, _analyze_in_slot(
+            job, cost,
+            str(video_path), str(output_path),
+            view, handedness, scale_method,
+            venue=venue, camera=camera,
+            output_mode=output_mode,
+            video_hash=hashlib.sha256(contents).hexdigest(),
+            model_tier=model_tier,
+            tier_source=tier_source
+        ))
+        if debug == DEBUG_TIMINGS:
+            result.debug = DebugInfo(**timings.debug_info())
+        return with_server_timing(model_response(result, compact), timings)
+    except HTTPException:
+        raise
+    except AnalysisCancelled as e:
+        for partial in (output_path, output_path.with_name(f"{output_path.stem}_overlay.json")):
+            partial.unlink(missing_ok=True)
+        raise HTTPException(status_code=409, detail=f"Analysis cancelled: {e}")
     except Exception as e:
         logger.error(f"Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        analysis_jobs.dec()
+        # A background render still reads the upload, and can still be cancelled
+        when_output_done(str(output_path), lambda: video_path.unlink(missing_ok=True))
+        when_output_done(str(output_path), lambda: finish_job(job))
+
+async def _analyze_in_slot(job: Job, cost: JobCost, video_path: str, output_path: str, *args, **kwargs):
+    async with admission.slot(cost) as slot:
+        job.started = True
+        # The pipeline blocks, so it runs off the event loop (in this context)
+        work = asyncio.ensure_future(asyncio.to_thread(analyze_video, video_path, output_path, *args, **kwargs))
+        # The slot is held until the worker thread has returned and any
+        # streaming render it started has finished, even if this request
+        # is cancelled first: neither can be interrupted, only asked to stop
+        release = slot.defer()
+        work.add_done_callback(lambda _: _when_stopped(work, output_path, release))
+        return await asyncio.shield(work)
+
+def _when_stopped(work: asyncio.Future, output_path: str, release):
+    if not work.cancelled():
+        # Nobody awaits the result once the request was cancelled
+        work.exception()
+    when_output_done(output_path, release)
+
+async def _run_cancellable(request: Request, job: Job, work: Awaitable):
+    """
+    Await work, cancelling the job if the client goes away
+
+    A job still queued for a slot stops waiting at once; a running one
+    stops at the pipeline's next frame batch and raises AnalysisCancelled.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SEC)
+            if done:
+                return task.result()
+            if not job.cancelled and await request.is_disconnected():
+                job.cancel("client disconnected")
+            if job.cancelled and not job.started:
+                task.cancel()
+                await asyncio.wait({task})
+                raise AnalysisCancelled(job.reason)
+    except asyncio.CancelledError:
+        # The request itself was cancelled (e.g. shutdown): stop the worker
+        # too; its slot is freed once the thread has actually returned
+        job.cancel("request cancelled")
+        task.cancel()
+        raise
+
+@router.delete("/jobs/{job_id}", status_code=202)
+async def cancel(job_id: str):
+    """Cancel a queued or running analysis submitted with this job_id"""
+    if not cancel_job(job_id):
+        raise HTTPException(status_code=404, detail="No such job")
+    return {"job_id": job_id, "cancelled": True}
+
+@router.get("/outputs/{name}")
+async def get_output(name: str):
+    path = OUTPUT_DIR / Path(name).name
+    if is_output_pending(str(path)):
+        # Fragmented MP4 still being encoded: follow the file as it grows
+        return StreamingResponse(_follow_output(path), media_type="video/mp4")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Output not found")
+    return FileResponse(path)
+
+async def _follow_output(path: Path, chunk_size: int = 256 * 1024):
+    while not path.exists():
+        if not is_output_pending(str(path)):
+            return
+        await asyncio.sleep(0.1)
+
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if chunk:
+                yield chunk
+                continue
+            if not is_output_pending(str(path)):
+                rest = f.read()
+                if rest:
+                    yield rest
+                return
+            await asyncio.sleep(0.1)
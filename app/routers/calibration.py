@@ -0,0 +1,68 @@
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException
+import logging
+from pathlib import Path
+import uuid
+from typing import List
+
+from app.models.schemas import ViewType, CalibrationProfile
+from app.services.calibration import load_profile, save_profile, list_profiles, delete_profile
+from app.services.scaling import find_marker_scale
+from app.services.video import iter_frames
+from app.config import UPLOAD_DIR, MAX_VIDEO_SIZE_MB, ALLOWED_EXTENSIONS, ERROR_NO_MARKER
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/calibration", tags=["calibration"])
+
+@router.get("", response_model=List[CalibrationProfile])
+async def get_profiles():
+    return list_profiles()
+
+@router.post("", response_model=CalibrationProfile)
+async def create_profile(
+    file: UploadFile = File(...),
+    venue: str = Form(...),
+    camera: str = Form(...),
+    view: ViewType = Form(ViewType.SIDE)
+):
+    suffix = Path(file.filename or "").suffix.lower()
+    if suffix not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {suffix}")
+
+    contents = await file.read()
+    if len(contents) > MAX_VIDEO_SIZE_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"File too large (max {MAX_VIDEO_SIZE_MB}MB)")
+
+    video_path = UPLOAD_DIR / f"calib_{uuid.uuid4().hex}{suffix}"
+    try:
+        with open(video_path, "wb") as f:
+            f.write(contents)
+
+        found = find_marker_scale(iter_frames(str(video_path)), view)
+        if found is None:
+            raise HTTPException(status_code=422, detail=ERROR_NO_MARKER)
+
+        return save_profile(venue, camera, found, view)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        video_path.unlink(missing_ok=True)
+
+@router.get("/{venue}/{camera}", response_model=CalibrationProfile)
+async def get_profile(venue: str, camera: str):
+    try:
+        profile = load_profile(venue, camera)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Calibration profile not found")
+    return profile
+
+@router.delete("/{venue}/{camera}")
+async def remove_profile(venue: str, camera: str):
+    try:
+        deleted = delete_profile(venue, camera)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Calibration profile not found")
+    return {"deleted": True}
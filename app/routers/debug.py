@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+import asyncio
+from dataclasses import asdict
+import logging
+
+from app.admission import admission
+from app.auth import require_admin
+from app.loop_monitor import loop_monitor
+from app.models.schemas import ProfileFormat
+from app.profiler import SamplingProfiler
+from app.responses import FastJSONResponse
+from app.startup import startup
+from app.services.model_registry import model_registry
+from app.config import PROFILE_MAX_SECONDS, PROFILE_DEFAULT_HZ, PROFILE_MAX_HZ
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/debug", tags=["debug"], dependencies=[Depends(require_admin)])
+
+# One profile at a time per process
+_profile_lock = asyncio.Lock()
+
+@router.get("/profile")
+async def profile(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    hz: int = Query(PROFILE_DEFAULT_HZ, ge=1, le=PROFILE_MAX_HZ),
+    format: ProfileFormat = Query(ProfileFormat.COLLAPSED)
+):
+    """
+    Sample every thread of this worker for `seconds`
+
+    Requests keep being served meanwhile; the event loop thread is
+    sampled along with the render and thread-pool threads. Other worker
+    processes (app.server --workers N) are not sampled: the profile
+    covers whichever worker accepted the request, named by the pid in the
+    output and the X-Profile-Pid header. Repeat the request to reach the
+    others.
+    """
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with _profile_lock:
+        profiler = SamplingProfiler(hz)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+
+    pid = profiler.pid
+    logger.info(f"Profile taken: {profiler.sample_count} samples over {profiler.duration:.1f}s (pid {pid})")
+    headers = {"X-Profile-Pid": str(pid), "X-Profile-Samples": str(profiler.sample_count)}
+    if format == ProfileFormat.SPEEDSCOPE:
+        headers["Content-Disposition"] = f'attachment; filename="profile-{pid}.speedscope.json"'
+        return FastJSONResponse(profiler.speedscope(), headers=headers)
+    return PlainTextResponse(profiler.collapsed(), headers=headers)
+
+@router.get("/loop")
+async def loop_lag():
+    """Event-loop lag percentiles and the stacks of recent blocking callbacks"""
+    return loop_monitor.report()
+
+@router.get("/queue")
+async def analysis_queue():
+    """Admission state: queued jobs in scheduling order and wait times per job class"""
+    return admission.status()
+
+@router.get("/startup")
+async def startup_report():
+    """Cold-start phases of this process and when it became ready"""
+    return startup.report()
+
+@router.get("/models")
+async def models():
+    """Model artifacts in MODEL_DIR and whether they match their pinned checksums"""
+    artifacts = await asyncio.to_thread(model_registry.artifacts)
+    status = await asyncio.to_thread(model_registry.verify_all)
+    return {
+        "artifacts": [dict(asdict(a), status=status.get(a.name)) for a in artifacts],
+        "missing": model_registry.missing(),
+    }
@@ -1,6 +1,8 @@
 from fastapi import APIRouter
 from datetime import datetime
 
+from app.readiness import analysis_jobs, model_state, readiness_response
+
 router = APIRouter(prefix="/api", tags=["health"])
 
 @router.get("/health")
@@ -8,5 +10,16 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "service": "Javelink Lite"
+        "service": "Javelink Lite",
+        "model": "loaded" if model_state.ready else "not_loaded"
     }
+
+@router.get("/live")
+async def live():
+    """The process is up and its event loop is answering"""
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def ready():
+    """Whether this instance can take an analysis now (503 when not)"""
+    return readiness_response(model_state.ready, analysis_jobs.value)
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+import re
+
+from app.services.keyframes import keyframe_dir, list_keyframes
+from app.config import KEYFRAME_FORMATS
+
+router = APIRouter(prefix="/api/keyframes", tags=["keyframes"])
+
+# Video hash plus a digest of the event frames and settings (keyframe_key)
+_KEY_RE = re.compile(r"^[0-9a-f]{64}-[0-9a-f]{16}$")
+
+def _check_key(key: str):
+    if not _KEY_RE.match(key):
+        raise HTTPException(status_code=400, detail="Invalid keyframes key")
+
+@router.get("/{key}")
+async def get_keyframes(key: str):
+    _check_key(key)
+    names = list_keyframes(key)
+    if not names:
+        raise HTTPException(status_code=404, detail="Keyframes not found")
+    return {name: f"/api/keyframes/{key}/{name}" for name in names}
+
+@router.get("/{key}/{name}")
+async def get_keyframe(key: str, name: str):
+    _check_key(key)
+    stem, _, ext = name.rpartition(".")
+    if ext not in KEYFRAME_FORMATS or not stem.isalpha():
+        raise HTTPException(status_code=400, detail="Invalid keyframe name")
+
+    path = keyframe_dir(key) / name
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Keyframe not found")
+    # The key covers the clip, event frames and settings, so it never changes
+    return FileResponse(path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
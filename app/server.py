@@ -0,0 +1,192 @@
+"""
+Preload-then-fork server
+
+The parent imports the app and its heavy libraries, loads the pose models
+and runs each once, then forks the workers. Pages the parent filled
+(library code, model weights) are shared copy-on-write, so N workers cost
+far less memory than N independent uvicorn processes. The workers accept
+on the parent's listening socket, and each gets cpus / N threads for its
+thread pools. A worker that dies is replaced.
+
+    python -m app.server --workers 4 --port 8000
+
+Each worker has its own admission queue, job table and /metrics; a
+request is handled by whichever worker accepts it. That includes
+/debug/profile, which samples only the worker that accepted it and
+reports that worker's pid.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+import warnings
+from typing import Dict, Optional, Sequence
+
+from app.autotune import TuneConfig, apply, effective_cpus, set_thread_cap
+from app.monitoring import rss_bytes
+from app.services.detectors import POSE_TIERS
+from app.config import (
+    SERVER_WORKERS, SERVER_PRELOAD_TIERS, SERVER_RESPAWN_DELAY_SEC, SERVER_SHUTDOWN_TIMEOUT_SEC
+)
+
+logger = logging.getLogger(__name__)
+
+def worker_threads(workers: int, cpus: Optional[int] = None) -> int:
+    """Threads per pool for each of `workers` processes sharing the host"""
+    return max(1, (cpus or effective_cpus()) // workers)
+
+def preload(tiers: Sequence[str] = SERVER_PRELOAD_TIERS):
+    """
+    Build the app and load everything the workers would each load for themselves
+
+    Runs single-threaded: thread pools started before a fork don't exist
+    in the children, and OpenMP's does not survive it.
+    """
+    set_thread_cap(1)
+    apply(TuneConfig(torch_threads=1, cv2_threads=1, blas_threads=1))
+
+    from app.main import app
+    from app.startup import preload as preload_modules
+    from app.services.detectors import warm_up_pose_detector
+
+    preload_modules()
+    for tier in dict.fromkeys(tiers):
+        # Running each model once also fuses its layers, so the fused
+        # weights are the ones the workers share
+        warm_up_pose_detector(tier)
+
+    # Keep the collector from writing to (and so copying) every object
+    # that exists now; reference counts still touch the objects in use
+    gc.collect()
+    gc.freeze()
+    return app
+
+def bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def _serve(app, sock: socket.socket, index: int, threads: int):
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # Saved autotune settings are applied at warm-up, within this cap
+    set_thread_cap(threads)
+    apply(TuneConfig(torch_threads=threads, cv2_threads=threads, blas_threads=threads))
+    logger.info(f"Worker {index} started (pid {os.getpid()}, {threads} threads per pool)")
+
+    host, port = sock.getsockname()[:2]
+    config = uvicorn.Config(
+        app, host=host, port=port, log_config=None, lifespan="on",
+        timeout_graceful_shutdown=int(SERVER_SHUTDOWN_TIMEOUT_SEC)
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+class Supervisor:
+    """Forks the workers, replaces any that die, and stops them on SIGTERM/SIGINT"""
+
+    def __init__(self, app, sock: socket.socket, workers: int, threads: int):
+        self.app = app
+        self.sock = sock
+        self.count = workers
+        self.threads = threads
+        self.workers: Dict[int, int] = {}  # pid -> worker index
+        self.stopping = False
+
+    def spawn(self, index: int):
+        with warnings.catch_warnings():
+            # The log listener is stopped across the fork (app.log) but has
+            # been restarted by the time Python counts threads
+            warnings.simplefilter("ignore", DeprecationWarning)
+            pid = os.fork()
+        if pid == 0:
+            from app.log import shutdown_logging
+
+            code = 1
+            try:
+                _serve(self.app, self.sock, index, self.threads)
+                code = 0
+            except BaseException:
+                logger.exception(f"Worker {index} crashed")
+            finally:
+                shutdown_logging()
+                os._exit(code)
+        self.workers[pid] = index
+
+    def stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info(f"Stopping {len(self.workers)} workers")
+        self._signal_workers(signal.SIGTERM)
+        signal.signal(signal.SIGALRM, lambda *_: self._signal_workers(signal.SIGKILL))
+        signal.alarm(max(1, int(SERVER_SHUTDOWN_TIMEOUT_SEC) + 1))
+
+    def _signal_workers(self, signum: int):
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.count):
+            self.spawn(index)
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = self.workers.pop(pid, None)
+            if index is None or self.stopping:
+                continue
+            logger.warning(
+                f"Worker {index} (pid {pid}) exited with {os.waitstatus_to_exitcode(status)}; replacing it"
+            )
+            time.sleep(SERVER_RESPAWN_DELAY_SEC)
+            if not self.stopping:
+                self.spawn(index)
+        signal.alarm(0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the app from workers forked after preloading the models")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--threads", type=int, help="threads per pool in each worker (default: cpus / workers)")
+    parser.add_argument(
+        "--tiers", default=",".join(SERVER_PRELOAD_TIERS), help="pose tiers to load before forking"
+    )
+    args = parser.parse_args()
+
+    workers = max(1, args.workers)
+    threads = args.threads or worker_threads(workers)
+    tiers = [t.strip() for t in args.tiers.split(",") if t.strip()]
+    unknown = set(tiers) - set(POSE_TIERS)
+    if unknown:
+        parser.error(f"unknown tiers: {', '.join(sorted(unknown))}")
+
+    started = time.perf_counter()
+    app = preload(tiers)
+    rss = rss_bytes()
+    logger.info(
+        f"Preloaded in {time.perf_counter() - started:.1f}s"
+        + (f", {rss / 2**20:.0f} MB resident" if rss is not None else "")
+        + f"; forking {workers} workers on {args.host}:{args.port}"
+    )
+    sock = bind(args.host, args.port)
+    Supervisor(app, sock, workers, threads).run()
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,257 @@
-﻿""""" import cv2 import numpy as np from typing import Optional import logging from app.models.schemas import ViewType, Metrics from app.services.events import Events from app.services.detectors import PoseDetector logger = logging.getLogger(__name__) def create_annotated_video( frames: np.ndarray, keypoints: np.ndarray, events: Events, metrics: Metrics, output_path: str, fps: float, view: ViewType ): """ Args: frames: keypoints: events: metrics: output_path: fps: view: """ h, w = frames[0].shape[:2] # VideoWriter fourcc = cv2.VideoWriter_fourcc(*'mp4v') out = cv2.VideoWriter(output_path, fourcc, fps, (w, h)) # font = cv2.FONT_HERSHEY_SIMPLEX font_scale = 0.7 font_thickness = 2 for i, frame in enumerate(frames): annotated = frame.copy() # if i < len(keypoints): draw_skeleton(annotated, keypoints[i]) # if events.penultimate_frame == i: cv2.putText(annotated, "PENULTIMATE", (50, 50), font, font_scale, (255, 255, 0), font_thickness) # cv2.line(annotated, (w//2, 0), (w//2, h), (255, 255, 0), 2) if events.plant_frame == i: cv2.putText(annotated, "PLANT", (50, 100), font, font_scale, (0, 255, 255), font_thickness) cv2.line(annotated, (w//2, 0), (w//2, h), (0, 255, 255), 2) if events.release_frame == i: cv2.putText(annotated, "RELEASE", (50, 150), font, font_scale, (0, 255, 0), font_thickness) cv2.line(annotated, (w//2, 0), (w//2, h), (0, 255, 0), 2) # if events.release_frame and i > events.release_frame: if view == ViewType.SIDE: # y_offset = 200 if metrics.release_angle_deg is not None: text = f"Angle: {metrics.release_angle_deg:.1f} deg" cv2.putText(annotated, text, (50, y_offset), font, font_scale, (255, 255, 255), font_thickness) y_offset += 30 if metrics.release_speed_mps is not None: text = f"Speed: {metrics.release_speed_mps:.1f} m/s" cv2.putText(annotated, text, (50, y_offset), font, font_scale, (255, 255, 255), font_thickness) y_offset += 30 if metrics.release_height_m is not None: text = f"Height: {metrics.release_height_m:.2f} m" cv2.putText(annotated, text, (50, y_offset), font, font_scale, (255, 255, 255), font_thickness) else: # y_offset = 200 if metrics.plant_foot_progression_deg is not None: text = f"Foot Angle: {metrics.plant_foot_progression_deg:.1f} deg" cv2.putText(annotated, text, (50, y_offset), font, font_scale, (255, 255, 255), font_thickness) y_offset += 30 if metrics.shoulder_hip_separation_deg is not None: text = f"Separation: {metrics.shoulder_hip_separation_deg:.1f} deg" cv2.putText(annotated, text, (50, y_offset), font, font_scale, (255, 255, 255), font_thickness) # cv2.putText(annotated, f"Frame: {i}", (w-150, 30), font, 0.5, (200, 200, 200), 1) out.write(annotated) out.release() logger.info(f"Annotated video saved: {output_path}") def draw_skeleton(image: np.ndarray, keypoints: np.ndarray): """ Args: image: keypoints: (17, 2) """ # COCO connections = [ (PoseDetector.LEFT_SHOULDER, PoseDetector.RIGHT_SHOULDER), (PoseDetector.LEFT_SHOULDER, PoseDetector.LEFT_ELBOW), (PoseDetector.LEFT_ELBOW, PoseDetector.LEFT_WRIST), (PoseDetector.RIGHT_SHOULDER, PoseDetector.RIGHT_ELBOW), (PoseDetector.RIGHT_ELBOW, PoseDetector.RIGHT_WRIST), (PoseDetector.LEFT_SHOULDER, PoseDetector.LEFT_HIP), (PoseDetector.RIGHT_SHOULDER, PoseDetector.RIGHT_HIP), (PoseDetector.LEFT_HIP, PoseDetector.RIGHT_HIP), (PoseDetector.LEFT_HIP, PoseDetector.LEFT_KNEE), (PoseDetector.LEFT_KNEE, PoseDetector.LEFT_ANKLE), (PoseDetector.RIGHT_HIP, PoseDetector.RIGHT_KNEE), (PoseDetector.RIGHT_KNEE, PoseDetector.RIGHT_ANKLE), ] # for connection in connections: pt1 = tuple(keypoints[connection[0]].astype(int)) pt2 = tuple(keypoints[connection[1]].astype(int)) cv2.line(image, pt1, pt2, (0, 255, 0), 2) # for kp in keypoints: cv2.circle(image, tuple(kp.astype(int)), 5, (0, 0, 255), -1) 
\ No newline at end of file
+﻿"""Annotated video rendering"""
+import contextvars
+import cv2
+import numpy as np
+import queue
+import threading
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, List
+import logging
+
+from app.models.schemas import ViewType, Metrics
+from app.services.events import Events
+from app.services.detectors import PoseDetector
+from app.services.video import iter_frames
+from app.services.encoder import open_video_writer, begin_output, end_output
+from app.services.jobs import AnalysisCancelled, check_cancelled
+from app.config import RENDER_QUEUE_FRAMES, CANCEL_CHECK_FRAMES
+from app.monitoring import timed
+
+logger = logging.getLogger(__name__)
+
+# COCO limbs as (N, 2) keypoint index pairs, so a whole skeleton is a
+# single fancy-index + cv2.polylines call
+SKELETON_EDGES = np.array([
+    (PoseDetector.LEFT_SHOULDER, PoseDetector.RIGHT_SHOULDER),
+    (PoseDetector.LEFT_SHOULDER, PoseDetector.LEFT_ELBOW),
+    (PoseDetector.LEFT_ELBOW, PoseDetector.LEFT_WRIST),
+    (PoseDetector.RIGHT_SHOULDER, PoseDetector.RIGHT_ELBOW),
+    (PoseDetector.RIGHT_ELBOW, PoseDetector.RIGHT_WRIST),
+    (PoseDetector.LEFT_SHOULDER, PoseDetector.LEFT_HIP),
+    (PoseDetector.RIGHT_SHOULDER, PoseDetector.RIGHT_HIP),
+    (PoseDetector.LEFT_HIP, PoseDetector.RIGHT_HIP),
+    (PoseDetector.LEFT_HIP, PoseDetector.LEFT_KNEE),
+    (PoseDetector.LEFT_KNEE, PoseDetector.LEFT_ANKLE),
+    (PoseDetector.RIGHT_HIP, PoseDetector.RIGHT_KNEE),
+    (PoseDetector.RIGHT_KNEE, PoseDetector.RIGHT_ANKLE),
+], dtype=np.intp)
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.7
+FONT_THICKNESS = 2
+
+@timed("render_annotated_video")
+def render_annotated_video(
+    video_path: str,
+    keypoints: np.ndarray,
+    events: Events,
+    metrics: Metrics,
+    output_path: str,
+    fps: float,
+    view: ViewType,
+    max_buffered_frames: int = RENDER_QUEUE_FRAMES
+) -> int:
+    """
+    Re-decode the source and write the annotated video frame by frame
+
+    Frames are drawn on in place and handed to a writer thread through a
+    bounded queue, so at most max_buffered_frames decoded frames are alive
+    at any time regardless of clip length.
+
+    Returns:
+        number of frames written
+    """
+    frames = iter_frames(video_path)
+    first = next(frames, None)
+    if first is None:
+        logger.error(f"No frames to annotate: {video_path}")
+        return 0
+
+    h, w = first.shape[:2]
+    out = open_video_writer(output_path, fps, (w, h))
+
+    labels = metric_labels(metrics, view)
+    pending = queue.Queue(maxsize=max_buffered_frames)
+    errors = []
+
+    def _write():
+        while True:
+            frame = pending.get()
+            if frame is None:
+                return
+            if errors:
+                # Keep draining so the producer never blocks
+                continue
+            try:
+                out.write(frame)
+            except Exception as e:
+                errors.append(e)
+
+    writer = threading.Thread(target=_write, name="annotate-writer", daemon=True)
+    writer.start()
+
+    count = 0
+    cancelled = False
+    try:
+        for i, frame in enumerate(chain([first], frames)):
+            if i % CANCEL_CHECK_FRAMES == 0:
+                check_cancelled()
+            annotate_frame(frame, i, keypoints, events, labels)
+            pending.put(frame)
+            count += 1
+    except AnalysisCancelled:
+        cancelled = True
+        raise
+    finally:
+        pending.put(None)
+        writer.join()
+        if cancelled:
+            # Kill ffmpeg rather than let it finish a file nobody wants
+            getattr(out, "abort", out.release)()
+            Path(output_path).unlink(missing_ok=True)
+        else:
+            out.release()
+
+    if errors:
+        raise errors[0]
+
+    logger.info(f"Annotated video saved: {output_path} ({count} frames)")
+    return count
+
+def start_annotated_render(
+    video_path: str,
+    keypoints: np.ndarray,
+    events: Events,
+    metrics: Metrics,
+    output_path: str,
+    fps: float,
+    view: ViewType
+) -> threading.Thread:
+    """
+    Render in a background thread
+
+    output_path is marked pending until the thread finishes, so
+    /api/outputs can stream the fragmented MP4 while it is encoded.
+    """
+    begin_output(output_path)
+
+    def _run():
+        try:
+            render_annotated_video(video_path, keypoints, events, metrics, output_path, fps, view)
+        except AnalysisCancelled as e:
+            logger.info(f"Annotation cancelled for {output_path}: {e}")
+        except Exception as e:
+            logger.error(f"Annotation failed for {output_path}: {e}")
+        finally:
+            end_output(output_path)
+
+    # Carry the request's log context (request/job id) into the thread
+    context = contextvars.copy_context()
+    thread = threading.Thread(target=context.run, args=(_run,), name="annotate-render", daemon=True)
+    thread.start()
+    return thread
+
+@timed("create_annotated_video")
+def create_annotated_video(
+    frames: Iterable[np.ndarray],
+    keypoints: np.ndarray,
+    events: Events,
+    metrics: Metrics,
+    output_path: str,
+    fps: float,
+    view: ViewType
+):
+    """
+    Write an annotated video from already decoded frames
+
+    Prefer render_annotated_video, which does not need the clip in memory.
+
+    Args:
+        frames: decoded frames (left untouched)
+        keypoints: (T, 17, 2)
+        events: detected events
+        metrics: computed metrics
+        output_path: destination path
+        fps: frame rate
+        view: camera view
+    """
+    out = None
+    labels = metric_labels(metrics, view)
+
+    for i, frame in enumerate(frames):
+        if out is None:
+            h, w = frame.shape[:2]
+            out = open_video_writer(output_path, fps, (w, h))
+
+        annotated = frame.copy()
+        annotate_frame(annotated, i, keypoints, events, labels)
+        out.write(annotated)
+
+    if out is not None:
+        out.release()
+    logger.info(f"Annotated video saved: {output_path}")
+
+def metric_labels(metrics: Metrics, view: ViewType) -> List[str]:
+    """Overlay text shown after release"""
+    labels = []
+    if view == ViewType.SIDE:
+        if metrics.release_angle_deg is not None:
+            labels.append(f"Angle: {metrics.release_angle_deg:.1f} deg")
+        if metrics.release_speed_mps is not None:
+            labels.append(f"Speed: {metrics.release_speed_mps:.1f} m/s")
+        if metrics.release_height_m is not None:
+            labels.append(f"Height: {metrics.release_height_m:.2f} m")
+    else:
+        if metrics.plant_foot_progression_deg is not None:
+            labels.append(f"Foot Angle: {metrics.plant_foot_progression_deg:.1f} deg")
+        if metrics.shoulder_hip_separation_deg is not None:
+            labels.append(f"Separation: {metrics.shoulder_hip_separation_deg:.1f} deg")
+    return labels
+
+def annotate_frame(
+    image: np.ndarray,
+    i: int,
+    keypoints: np.ndarray,
+    events: Events,
+    labels: List[str]
+):
+    """Draw skeleton, event markers and metric labels onto frame i in place"""
+    h, w = image.shape[:2]
+
+    if i < len(keypoints):
+        draw_skeleton(image, keypoints[i])
+
+    if events.penultimate_frame == i:
+        cv2.putText(image, "PENULTIMATE", (50, 50), FONT, FONT_SCALE, (255, 255, 0), FONT_THICKNESS)
+        cv2.line(image, (w//2, 0), (w//2, h), (255, 255, 0), 2)
+
+    if events.plant_frame == i:
+        cv2.putText(image, "PLANT", (50, 100), FONT, FONT_SCALE, (0, 255, 255), FONT_THICKNESS)
+        cv2.line(image, (w//2, 0), (w//2, h), (0, 255, 255), 2)
+
+    if events.release_frame == i:
+        cv2.putText(image, "RELEASE", (50, 150), FONT, FONT_SCALE, (0, 255, 0), FONT_THICKNESS)
+        cv2.line(image, (w//2, 0), (w//2, h), (0, 255, 0), 2)
+
+    if events.release_frame and i > events.release_frame:
+        y_offset = 200
+        for text in labels:
+            cv2.putText(image, text, (50, y_offset), FONT, FONT_SCALE, (255, 255, 255), FONT_THICKNESS)
+            y_offset += 30
+
+    cv2.putText(image, f"Frame: {i}", (w-150, 30), FONT, 0.5, (200, 200, 200), 1)
+
+def draw_skeleton(image: np.ndarray, keypoints: np.ndarray):
+    """
+    Args:
+        image: frame to draw on
+        keypoints: (17, 2)
+    """
+    points = np.round(keypoints).astype(np.int32)
+
+    # All limbs in one call: (N, 2, 2) segments
+    cv2.polylines(image, points[SKELETON_EDGES], False, (0, 255, 0), 2)
+
+    for kp in points:
+        cv2.circle(image, (int(kp[0]), int(kp[1])), 5, (0, 0, 255), -1)
@@ -0,0 +1,75 @@
+"""Per-venue camera calibration profiles"""
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+import logging
+
+from app.models.schemas import CalibrationProfile, ViewType
+from app.services.scaling import MarkerScale
+from app.config import CALIBRATION_DIR
+
+logger = logging.getLogger(__name__)
+
+def _slug(value: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "-", value.strip()).strip("-").lower()
+    if not slug:
+        raise ValueError(f"Invalid calibration name: {value!r}")
+    return slug
+
+def profile_path(venue: str, camera: str) -> Path:
+    return CALIBRATION_DIR / f"{_slug(venue)}__{_slug(camera)}.json"
+
+def load_profile(venue: str, camera: str) -> Optional[CalibrationProfile]:
+    path = profile_path(venue, camera)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return CalibrationProfile(**json.load(f))
+
+def save_profile(
+    venue: str,
+    camera: str,
+    scale: MarkerScale,
+    view: ViewType
+) -> CalibrationProfile:
+    """
+    Store a detected marker scale as the venue/camera profile
+
+    Existing profiles are overwritten so re-calibrating after moving
+    a tripod is a single upload.
+    """
+    profile = CalibrationProfile(
+        venue=venue,
+        camera=camera,
+        m_per_px=scale.m_per_px,
+        marker_type=scale.marker_type.value,
+        view=ViewType(view).value,
+        source_frame=scale.frame_index,
+        created_at=datetime.now().isoformat()
+    )
+    path = profile_path(venue, camera)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profile.model_dump(), f, indent=2)
+    tmp_path.replace(path)
+    logger.info(f"Calibration saved: {venue}/{camera} = {scale.m_per_px:.6f} m/px ({scale.marker_type.value})")
+    return profile
+
+def list_profiles() -> List[CalibrationProfile]:
+    profiles = []
+    for path in sorted(CALIBRATION_DIR.glob("*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                profiles.append(CalibrationProfile(**json.load(f)))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable calibration {path.name}: {e}")
+    return profiles
+
+def delete_profile(venue: str, camera: str) -> bool:
+    path = profile_path(venue, camera)
+    if not path.exists():
+        return False
+    path.unlink()
+    return True
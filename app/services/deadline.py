@@ -0,0 +1,110 @@
+"""Processing deadline and the degradation steps taken to meet it"""
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+import logging
+
+from app.services.detectors import smaller_tier
+from app.config import (
+    MAX_PROCESS_TIME_SEC, POSE_BUDGET_SHARE, DEGRADE_CHECK_FRAMES, DEGRADE_MAX_STRIDE, DEFAULT_POSE_TIER
+)
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Deadline:
+    """A time budget started at construction"""
+    seconds: float = MAX_PROCESS_TIME_SEC
+    start: float = field(default_factory=time.monotonic)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start
+
+    def remaining(self) -> float:
+        return self.seconds - self.elapsed()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+class PoseBudget:
+    """
+    Steps pose estimation down so it finishes within its share of the deadline
+
+    Every `check_every` source frames the cost per frame under the current
+    settings is measured and the rest of the clip projected from it. While
+    the projection overruns, the first step taken is to sample every
+    2nd, then 4th... frame (up to max_stride); after that `tier` steps down
+    to the same model at its next smaller input size, one size per check.
+    When the pose share is used up, decoding stops and the clip is
+    analysed up to that frame. Each step is added to `notes`.
+    """
+
+    def __init__(
+        self,
+        deadline: Deadline,
+        total_frames: int,
+        tier: str = DEFAULT_POSE_TIER,
+        backend: Optional[str] = None,
+        share: float = POSE_BUDGET_SHARE,
+        check_every: int = DEGRADE_CHECK_FRAMES,
+        max_stride: int = DEGRADE_MAX_STRIDE
+    ):
+        self.deadline = deadline
+        self.total_frames = total_frames
+        self.tier = tier
+        self.backend = backend
+        self.budget = deadline.seconds * share
+        self.check_every = check_every
+        self.max_stride = max_stride
+        self.stride = 1
+        self.stopped_at: Optional[int] = None
+        self.notes: List[str] = []
+        self._window_start = time.monotonic()
+        self._window_frames = 0
+
+    def keep(self, index: int) -> bool:
+        """Whether to run the model on this frame"""
+        return index % self.stride == 0
+
+    def step(self, index: int) -> bool:
+        """
+        Account for one source frame (kept or skipped)
+
+        Returns:
+            False when pose estimation must stop before this frame
+        """
+        if self.deadline.elapsed() >= self.budget:
+            self.stopped_at = index
+            self._note(f"pose stopped at frame {index} of {self.total_frames}")
+            return False
+
+        self._window_frames += 1
+        if self._window_frames >= self.check_every:
+            self._replan(index)
+        return True
+
+    def _replan(self, index: int):
+        now = time.monotonic()
+        per_frame = (now - self._window_start) / self._window_frames
+        projected = per_frame * max(0, self.total_frames - index)
+        available = self.budget - self.deadline.elapsed()
+
+        if projected > available:
+            if self.stride < self.max_stride:
+                self.stride *= 2
+                self._note(f"sampled every {self.stride} frames from frame {index}")
+            else:
+                smaller = smaller_tier(self.tier, self.backend)
+                if smaller is not None:
+                    self._note(f"pose model stepped down from {self.tier} to {smaller} at frame {index}")
+                    self.tier = smaller
+        self._window_start = now
+        self._window_frames = 0
+
+    def _note(self, text: str):
+        logger.info(f"Deadline: {text}")
+        self.notes.append(f"Deadline: {text}")
+
+    @property
+    def degraded(self) -> bool:
+        return bool(self.notes)
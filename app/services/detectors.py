@@ -1,10 +1,88 @@
 ﻿import cv2
 import numpy as np
-from typing import Tuple, Optional
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Dict, List, Sequence, Tuple, Optional
 import logging
 
+from app.monitoring import MODEL_LOADED
+from app.services.model_registry import ChecksumMismatch, ModelUnavailable, load_yolo, variant_name
+from app.config import (
+    MODEL_DIR, MODEL_OFFLINE, POSE_MODELS, POSE_INPUT_SIZES, DEFAULT_POSE_TIER, POSE_CONFIDENCE_THRESHOLD,
+    POSE_BATCH_SIZE, POSE_BACKEND, POSE_HALF
+)
+
 logger = logging.getLogger(__name__)
 
+@dataclass(frozen=True)
+class PoseTier:
+    """A pose model and the input size it runs at"""
+    name: str
+    weights: str
+    imgsz: int
+    cost: float  # relative per-frame inference time
+
+POSE_TIERS: Dict[str, PoseTier] = {
+    f"{model}{size}": PoseTier(f"{model}{size}", weights, size, cost * (size / 640) ** 2)
+    for model, (weights, cost) in POSE_MODELS.items()
+    for size in POSE_INPUT_SIZES
+}
+
+def tiers_by_cost() -> List[PoseTier]:
+    """Cheapest first"""
+    return sorted(POSE_TIERS.values(), key=lambda t: t.cost)
+
+@dataclass
+class PoseRuntime:
+    """How pose inference runs on this host (set by app.autotune)"""
+    batch_size: int = POSE_BATCH_SIZE
+    backend: str = POSE_BACKEND  # "torch" (.pt) or "onnx" (converted per input size, cached in MODEL_DIR)
+
+pose_runtime = PoseRuntime()
+
+BACKENDS = ("torch", "onnx")
+
+def backend_available(backend: str, weights: str = POSE_MODELS["n"][0]) -> bool:
+    """Whether a backend can run these weights here, without loading anything"""
+    if find_spec("ultralytics") is None:
+        return False
+    if MODEL_OFFLINE and not (MODEL_DIR / weights).exists():
+        return False
+    if backend == "onnx":
+        # Converted from the .pt on first use, then cached (model_registry)
+        cached = (MODEL_DIR / variant_name(weights, backend, POSE_INPUT_SIZES[-1], POSE_HALF)).exists()
+        return find_spec("onnxruntime") is not None and (cached or find_spec("onnx") is not None)
+    return backend == "torch"
+
+def tier_available(name: str) -> bool:
+    """Whether a tier's weights can be loaded here (PoseDetector falls back to torch)"""
+    return backend_available("torch", POSE_TIERS[name].weights)
+
+@lru_cache(maxsize=None)
+def _load_model(weights: str, backend: str = "torch", imgsz: Optional[int] = None):
+    """
+    YOLO pose model from MODEL_DIR, shared by every tier that uses it
+
+    imgsz only matters to converted backends, whose variants are built per
+    input size. Returns None when ultralytics is not installed or the
+    model can't be loaded; detection then falls back to placeholder
+    keypoints.
+    """
+    if find_spec("ultralytics") is None:
+        return None
+    try:
+        model = load_yolo(weights, backend, imgsz, POSE_HALF)
+    except (ModelUnavailable, ChecksumMismatch) as e:
+        logger.error(f"Not loading {weights} ({backend}): {e}")
+        return None
+    except Exception as e:
+        logger.warning(f"Failed to load {weights} ({backend}): {e}")
+        return None
+    MODEL_LOADED.set(1)
+    return model
+
 class PoseDetector:
     # COCO keypoint indices
     NOSE = 0
@@ -25,10 +103,29 @@ class PoseDetector:
     LEFT_ANKLE = 15
     RIGHT_ANKLE = 16
     
-    def __init__(self):
-        self.model = None
+    def __init__(self, tier: str = DEFAULT_POSE_TIER, backend: Optional[str] = None):
+        self.tier = POSE_TIERS[tier]
+        self.backend = backend or pose_runtime.backend
+        if self.backend == "torch":
+            self.model = _load_model(self.tier.weights)
+        else:
+            self.model = _load_model(self.tier.weights, self.backend, self.tier.imgsz)
+            if self.model is None:
+                logger.warning(f"Falling back to torch for {self.tier.name}")
+                self.backend = "torch"
+                self.model = _load_model(self.tier.weights)
+        if self.model is None:
+            logger.warning(f"Pose model {self.tier.name} not loaded, detection returns placeholder keypoints")
+
+    @property
+    def loaded(self) -> bool:
+        """False when detect() returns placeholder keypoints"""
+        return self.model is not None
     
     def detect(self, frame: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
+        if self.model is not None:
+            return self._detect_yolo(frame)
+
         h, w = frame.shape[:2]
         
         # Dummy keypoints
@@ -55,6 +152,77 @@ class PoseDetector:
         confidence = 0.75
         return keypoints, confidence
 
+    def detect_batch(self, frames: Sequence[np.ndarray]) -> List[Tuple[Optional[np.ndarray], float]]:
+        """detect() over several frames in one model call"""
+        if self.model is None or len(frames) == 1:
+            return [self.detect(frame) for frame in frames]
+        results = self.model(list(frames), imgsz=self.tier.imgsz, verbose=False)
+        return [self._parse(result) for result in results]
+
+    def _detect_yolo(self, frame: np.ndarray) -> Tuple[Optional[np.ndarray], float]:
+        results = self.model(frame, imgsz=self.tier.imgsz, verbose=False)
+        if not results:
+            return None, 0.0
+        return self._parse(results[0])
+
+    @staticmethod
+    def _parse(result) -> Tuple[Optional[np.ndarray], float]:
+        if result.keypoints is None or result.keypoints.data.shape[0] == 0:
+            return None, 0.0
+
+        # Most confident person; keypoints come back in frame coordinates
+        best = int(result.boxes.conf.argmax()) if result.boxes is not None and len(result.boxes) else 0
+        data = result.keypoints.data[best].cpu().numpy()  # (17, 3) x, y, confidence
+        confidence = float(data[:, 2].mean())
+        if confidence < POSE_CONFIDENCE_THRESHOLD:
+            return None, confidence
+        return data[:, :2].astype(float), confidence
+
+_pose_detectors: Dict[Tuple[str, str], PoseDetector] = {}
+_pose_lock = threading.Lock()
+
+def get_pose_detector(tier: str = DEFAULT_POSE_TIER, backend: Optional[str] = None) -> PoseDetector:
+    """Process-wide pose detector per tier and backend (pose_runtime's by default), loaded on first use"""
+    backend = backend or pose_runtime.backend
+    key = (tier, backend)
+    detector = _pose_detectors.get(key)
+    if detector is None:
+        with _pose_lock:
+            detector = _pose_detectors.get(key)
+            if detector is None:
+                detector = _pose_detectors[key] = PoseDetector(tier, backend)
+    return detector
+
+def smaller_tier(name: str, backend: Optional[str] = None) -> Optional[str]:
+    """
+    The same model at its next smaller input size, or None
+
+    With a converted backend only sizes whose variant is already loaded or
+    cached qualify: converting one mid-analysis costs more than it saves.
+    """
+    tier = POSE_TIERS[name]
+    smaller = sorted(
+        (t for t in POSE_TIERS.values() if t.weights == tier.weights and t.imgsz < tier.imgsz),
+        key=lambda t: t.imgsz, reverse=True
+    )
+    backend = backend or pose_runtime.backend
+    for candidate in smaller:
+        if (
+            backend == "torch"
+            or (candidate.name, backend) in _pose_detectors
+            or (MODEL_DIR / variant_name(candidate.weights, backend, candidate.imgsz, POSE_HALF)).exists()
+        ):
+            return candidate.name
+    return None
+
+def warm_up_pose_detector(tier: str = DEFAULT_POSE_TIER):
+    """
+    Load a tier (the default) and run it once, so the first request isn't the slow one
+
+    Other tiers load when a job first picks them.
+    """
+    get_pose_detector(tier).detect(np.zeros((480, 640, 3), dtype=np.uint8))
+
 class ObjectDetector:
     def detect_ball(self, frame: np.ndarray) -> Optional[np.ndarray]:
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
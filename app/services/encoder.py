@@ -0,0 +1,152 @@
+"""Video encoder backends"""
+import shutil
+import subprocess
+import threading
+import cv2
+import numpy as np
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from app.config import VIDEO_ENCODER, FFMPEG_PRESET, FFMPEG_CRF, FFMPEG_THREADS
+from app.log import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+# Output files that are still being written, with callbacks to run
+# once they are complete; readers may follow them meanwhile
+_pending_outputs: Dict[str, List[Callable[[], None]]] = {}
+_pending_lock = threading.Lock()
+
+def begin_output(path: str):
+    with _pending_lock:
+        _pending_outputs.setdefault(str(path), [])
+
+def end_output(path: str):
+    with _pending_lock:
+        callbacks = _pending_outputs.pop(str(path), [])
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"Output callback failed for {path}: {e}")
+
+def is_output_pending(path: str) -> bool:
+    with _pending_lock:
+        return str(path) in _pending_outputs
+
+def when_output_done(path: str, callback: Callable[[], None]):
+    """Run callback now, or when the pending output at path is finished"""
+    with _pending_lock:
+        if str(path) in _pending_outputs:
+            _pending_outputs[str(path)].append(callback)
+            return
+    callback()
+
+@lru_cache(maxsize=1)
+def find_ffmpeg() -> Optional[str]:
+    """ffmpeg on PATH, or the binary bundled with imageio-ffmpeg"""
+    path = shutil.which("ffmpeg")
+    if path:
+        return path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+def streaming_encoder_available() -> bool:
+    """True when annotated output will be fragmented MP4"""
+    return VIDEO_ENCODER != "opencv" and find_ffmpeg() is not None
+
+class FFmpegWriter:
+    """
+    H.264 encoder fed with raw BGR frames over a pipe
+
+    Writes fragmented MP4 (moov up front, one fragment per keyframe), so
+    the file is playable while it is still being written.
+    Mirrors the cv2.VideoWriter write/release interface.
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        fps: float,
+        size: Tuple[int, int],
+        preset: str = FFMPEG_PRESET,
+        crf: int = FFMPEG_CRF,
+        threads: int = FFMPEG_THREADS
+    ):
+        ffmpeg = find_ffmpeg()
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg not found")
+
+        w, h = size
+        self.output_path = str(output_path)
+        self.frame_bytes = w * h * 3
+        cmd = [
+            ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{w}x{h}", "-r", f"{fps:.6f}",
+            "-i", "-",
+            "-an",
+            # yuv420p needs even dimensions
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-c:v", "libx264",
+            "-preset", preset,
+            "-crf", str(crf),
+            "-threads", str(threads),
+            "-pix_fmt", "yuv420p",
+            "-g", str(max(1, int(round(fps)))),
+            "-movflags", "+frag_keyframe+empty_moov+default_base_moof",
+            "-f", "mp4",
+            self.output_path
+        ]
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+
+    def write(self, frame: np.ndarray):
+        if frame.nbytes != self.frame_bytes:
+            raise ValueError("Frame size does not match encoder size")
+        self.proc.stdin.write(np.ascontiguousarray(frame).data)
+
+    def abort(self):
+        """Kill the encoder, leaving whatever it wrote for the caller to remove"""
+        self.proc.kill()
+        self.proc.wait()
+        for pipe in (self.proc.stdin, self.proc.stderr):
+            if pipe:
+                try:
+                    pipe.close()
+                except BrokenPipeError:
+                    pass
+
+    def release(self):
+        if self.proc.stdin and not self.proc.stdin.closed:
+            try:
+                self.proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        stderr = self.proc.stderr.read().decode(errors="replace") if self.proc.stderr else ""
+        code = self.proc.wait()
+        if code != 0:
+            raise RuntimeError(f"ffmpeg exited with {code}: {stderr.strip()}")
+
+def open_video_writer(output_path: str, fps: float, size: Tuple[int, int]):
+    """
+    Writer for annotated output
+
+    Uses the ffmpeg H.264 backend unless VIDEO_ENCODER is "opencv" or
+    ffmpeg is not installed, in which case cv2.VideoWriter/mp4v is used.
+    """
+    if streaming_encoder_available():
+        return FFmpegWriter(output_path, fps, size)
+
+    if VIDEO_ENCODER == "ffmpeg":
+        logger.warning("ffmpeg not found, falling back to OpenCV mp4v encoder", extra=RATE_LIMITED)
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    return cv2.VideoWriter(str(output_path), fourcc, fps, size)
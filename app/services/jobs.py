@@ -0,0 +1,77 @@
+"""Cancellable analysis jobs"""
+import threading
+from contextvars import ContextVar
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AnalysisCancelled(Exception):
+    """Raised inside an analysis once its job has been cancelled"""
+
+class Job:
+    """
+    Cancellation flag for one analysis
+
+    Cancelling only sets the flag; the decode, inference and render loops
+    poll it between frame batches and unwind with AnalysisCancelled.
+    """
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.started = False  # holds an admission slot
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    def cancel(self, reason: str):
+        if not self._cancelled.is_set():
+            self.reason = reason
+            self._cancelled.set()
+            logger.info(f"Job {self.id} cancelled: {reason}")
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise AnalysisCancelled(self.reason)
+
+_jobs: Dict[str, Job] = {}
+_jobs_lock = threading.Lock()
+
+_current_job: ContextVar[Optional[Job]] = ContextVar("current_job", default=None)
+
+def start_job(job_id: str) -> Job:
+    """
+    Register a job and make it current
+
+    A job still running under the same id (a re-submission) is cancelled.
+    """
+    job = Job(job_id)
+    with _jobs_lock:
+        previous = _jobs.get(job_id)
+        _jobs[job_id] = job
+    if previous is not None:
+        previous.cancel("superseded by a new submission")
+    _current_job.set(job)
+    return job
+
+def finish_job(job: Job):
+    with _jobs_lock:
+        if _jobs.get(job.id) is job:
+            del _jobs[job.id]
+
+def cancel_job(job_id: str, reason: str = "cancelled by client") -> bool:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return False
+    job.cancel(reason)
+    return True
+
+def check_cancelled():
+    """Raise AnalysisCancelled if the current job was cancelled (no-op outside a job)"""
+    job = _current_job.get()
+    if job is not None:
+        job.check()
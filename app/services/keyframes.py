@@ -0,0 +1,126 @@
+"""Event keyframe stills and contact sheet"""
+import cv2
+import hashlib
+import json
+import shutil
+import uuid
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from app.services.events import Events
+from app.services.annotate import draw_skeleton, FONT
+from app.services.video import read_frames_at
+from app.config import (
+    KEYFRAME_DIR, KEYFRAME_FORMATS, KEYFRAME_HEIGHT,
+    KEYFRAME_JPEG_QUALITY, KEYFRAME_WEBP_QUALITY
+)
+
+logger = logging.getLogger(__name__)
+
+KEYFRAME_EVENTS = ("penultimate", "plant", "release")
+CONTACT_SHEET = "sheet"
+
+def keyframe_key(video_hash: str, indices: Dict[str, int], keypoints: np.ndarray) -> str:
+    """
+    Cache key for a clip's stills
+
+    The same clip analysed again can land on other event frames or another
+    skeleton (a different pose tier), and the settings decide which files
+    exist and how large they are, so all of them are part of the key.
+    """
+    settings = {
+        "frames": indices,
+        "formats": list(KEYFRAME_FORMATS),
+        "height": KEYFRAME_HEIGHT,
+        "quality": [KEYFRAME_JPEG_QUALITY, KEYFRAME_WEBP_QUALITY],
+    }
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode())
+    for idx in indices.values():
+        if idx < len(keypoints):
+            digest.update(np.ascontiguousarray(keypoints[idx], dtype=np.float32).tobytes())
+    return f"{video_hash}-{digest.hexdigest()[:16]}"
+
+def keyframe_dir(key: str) -> Path:
+    return KEYFRAME_DIR / key
+
+def list_keyframes(key: str) -> List[str]:
+    path = keyframe_dir(key)
+    if not path.is_dir():
+        return []
+    return sorted(p.name for p in path.iterdir() if p.suffix.lstrip(".") in KEYFRAME_FORMATS)
+
+def render_keyframes(
+    video_path: str,
+    video_hash: str,
+    keypoints: np.ndarray,
+    events: Events
+) -> Optional[str]:
+    """
+    Write a still per detected event plus a contact sheet
+
+    Only the event frames are decoded. Output is cached per clip, event
+    frames and keyframe settings (keyframe_key), so re-analysing the same
+    clip does not decode anything.
+
+    Returns:
+        the cache key the stills are stored under, or None if there are none
+    """
+    indices = {
+        name: getattr(events, f"{name}_frame")
+        for name in KEYFRAME_EVENTS
+        if getattr(events, f"{name}_frame") is not None
+    }
+    if not indices:
+        return None
+
+    key = keyframe_key(video_hash, indices, keypoints)
+    if list_keyframes(key):
+        return key
+
+    frames = read_frames_at(video_path, indices.values())
+
+    stills = {}
+    for name, idx in indices.items():
+        frame = frames.get(idx)
+        if frame is None:
+            continue
+        if idx < len(keypoints):
+            draw_skeleton(frame, keypoints[idx])
+        cv2.putText(frame, f"{name.upper()}  #{idx}", (20, 40), FONT, 1.0, (255, 255, 255), 2)
+        stills[name] = _resize_to_height(frame, KEYFRAME_HEIGHT)
+
+    if not stills:
+        return None
+
+    # Build in a scratch directory and rename, so readers never see a
+    # half-written cache entry
+    out_dir = keyframe_dir(key)
+    tmp_dir = out_dir.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+    tmp_dir.mkdir(parents=True)
+    for name, image in stills.items():
+        _write_image(tmp_dir, name, image)
+    _write_image(tmp_dir, CONTACT_SHEET, np.hstack([stills[n] for n in KEYFRAME_EVENTS if n in stills]))
+    try:
+        tmp_dir.rename(out_dir)
+    except OSError:
+        # Another request cached the same stills first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    logger.info(f"Keyframes saved: {key} ({len(stills)} events)")
+    return key
+
+def _resize_to_height(image: np.ndarray, height: int) -> np.ndarray:
+    h, w = image.shape[:2]
+    if h == height:
+        return image
+    return cv2.resize(image, (max(1, round(w * height / h)), height), interpolation=cv2.INTER_AREA)
+
+def _write_image(out_dir: Path, name: str, image: np.ndarray):
+    params: Dict[str, list] = {
+        "jpg": [cv2.IMWRITE_JPEG_QUALITY, KEYFRAME_JPEG_QUALITY],
+        "webp": [cv2.IMWRITE_WEBP_QUALITY, KEYFRAME_WEBP_QUALITY],
+    }
+    for ext in KEYFRAME_FORMATS:
+        cv2.imwrite(str(out_dir / f"{name}.{ext}"), image, params.get(ext, []))
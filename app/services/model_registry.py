@@ -0,0 +1,340 @@
+"""
+Pose model artifacts in MODEL_DIR
+
+Every artifact the app loads comes from MODEL_DIR, and its SHA-256 is
+pinned in a registry file next to it. Converted variants (ONNX at a given
+input size, optionally FP16) are built once from the pinned weights and
+cached under MODEL_VARIANT_DIR; a variant is rebuilt only when its source
+weights change. Nothing is downloaded unless MODEL_OFFLINE is off or the
+weights are fetched explicitly:
+
+    python -m app.services.model_registry list
+    python -m app.services.model_registry fetch yolov8n-pose.pt
+    python -m app.services.model_registry add /path/to/yolov8s-pose.pt
+    python -m app.services.model_registry convert --format onnx --imgsz 320
+    python -m app.services.model_registry verify
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.config import (
+    MODEL_DIR, MODEL_REGISTRY_FILE, MODEL_VARIANT_DIR, MODEL_OFFLINE, MODEL_REQUIRE_CHECKSUM,
+    POSE_MODELS, POSE_INPUT_SIZES
+)
+
+logger = logging.getLogger(__name__)
+
+# Suffix -> format name, as ultralytics' export() calls them
+FORMATS = {
+    ".pt": "torch",
+    ".onnx": "onnx",
+    ".torchscript": "torchscript",
+    ".engine": "engine",
+    ".tflite": "tflite",
+}
+EXPORT_SUFFIXES = {name: suffix for suffix, name in FORMATS.items()}
+
+class ModelUnavailable(Exception):
+    """An artifact is not in MODEL_DIR and may not be fetched"""
+
+class ChecksumMismatch(Exception):
+    """An artifact's contents differ from the checksum pinned in the registry"""
+
+@dataclass
+class Artifact:
+    """A model file in MODEL_DIR and what the registry knows about it"""
+    name: str  # path relative to MODEL_DIR
+    format: str
+    size: int
+    sha256: Optional[str] = None  # pinned checksum; None until first verified
+    source: Optional[str] = None  # weights a variant was converted from
+    source_sha256: Optional[str] = None
+    imgsz: Optional[int] = None
+    half: bool = False
+    added: Optional[str] = None
+
+    @property
+    def path(self) -> Path:
+        return MODEL_DIR / self.name
+
+def sha256_file(path: Path, chunk: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def variant_name(weights: str, fmt: str, imgsz: int, half: bool = False) -> str:
+    stem = Path(weights).stem
+    suffix = EXPORT_SUFFIXES[fmt]
+    return str((MODEL_VARIANT_DIR / f"{stem}-{imgsz}{'-fp16' if half else ''}{suffix}").relative_to(MODEL_DIR))
+
+class ModelRegistry:
+    """
+    Checksummed artifacts in MODEL_DIR
+
+    Checksums are pinned when an artifact is fetched, added or converted;
+    a file dropped into MODEL_DIR by hand is pinned the first time it is
+    loaded (or refused, with MODEL_REQUIRE_CHECKSUM). Each file is hashed
+    at most once per process unless its size or mtime changes.
+    """
+
+    def __init__(self, root: Path = MODEL_DIR, registry_file: Path = MODEL_REGISTRY_FILE):
+        self.root = root
+        self.registry_file = registry_file
+        self._lock = threading.RLock()
+        self._verified: Dict[str, Tuple[int, int]] = {}  # name -> (size, mtime_ns) last verified
+
+    # Registry file
+
+    def _read(self) -> Dict[str, dict]:
+        try:
+            with open(self.registry_file, encoding="utf-8") as f:
+                return json.load(f).get("artifacts", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable model registry {self.registry_file}: {e}")
+            return {}
+
+    def _write(self, entries: Dict[str, dict]):
+        # Written to a temp file and renamed so readers never see half a file
+        fd, tmp = tempfile.mkstemp(dir=self.registry_file.parent, prefix=".registry-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "artifacts": entries}, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.registry_file)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _pin(self, artifact: Artifact):
+        with self._lock:
+            entries = self._read()
+            entries[artifact.name] = {k: v for k, v in asdict(artifact).items() if k != "name"}
+            try:
+                self._write(entries)
+            except OSError as e:
+                # A read-only MODEL_DIR still loads; the pin just doesn't persist
+                logger.warning(f"Could not record {artifact.name} in the model registry: {e}")
+            stat = (self.root / artifact.name).stat()
+            self._verified[artifact.name] = (stat.st_size, stat.st_mtime_ns)
+
+    # Listing
+
+    def _artifact(self, name: str, entry: Optional[dict]) -> Artifact:
+        """The file as it is now, plus what the registry recorded about it"""
+        path = self.root / name
+        recorded = {
+            k: v for k, v in (entry or {}).items()
+            if k in Artifact.__dataclass_fields__ and k not in ("name", "format", "size")
+        }
+        return Artifact(
+            name=name, format=FORMATS.get(path.suffix, path.suffix.lstrip(".")), size=path.stat().st_size, **recorded
+        )
+
+    def artifacts(self) -> List[Artifact]:
+        """Model files present in MODEL_DIR, with their registry entries"""
+        entries = self._read()
+        found = []
+        for path in sorted(self.root.rglob("*")):
+            relative = path.relative_to(self.root)
+            if path.suffix not in FORMATS or not path.is_file() or any(p.startswith(".") for p in relative.parts):
+                continue
+            found.append(self._artifact(str(relative), entries.get(str(relative))))
+        return found
+
+    def missing(self) -> List[str]:
+        """Registered artifacts whose files are gone"""
+        return sorted(name for name in self._read() if not (self.root / name).is_file())
+
+    # Verification
+
+    def verify(self, name: str, pin: bool = True) -> Artifact:
+        """
+        Check an artifact against its pinned checksum
+
+        Raises ChecksumMismatch on a mismatch, ModelUnavailable when the
+        file is missing or is unpinned under MODEL_REQUIRE_CHECKSUM.
+        """
+        path = self.root / name
+        if not path.is_file():
+            raise ModelUnavailable(f"{name} is not in {self.root}")
+        stat = path.stat()
+        with self._lock:
+            artifact = self._artifact(name, self._read().get(name))
+            if self._verified.get(name) == (stat.st_size, stat.st_mtime_ns):
+                return artifact
+
+            digest = sha256_file(path)
+            if artifact.sha256 is None:
+                if MODEL_REQUIRE_CHECKSUM:
+                    raise ModelUnavailable(f"{name} has no pinned checksum (sha256 {digest})")
+                if not pin:
+                    return artifact
+                logger.warning(f"Pinning unregistered model {name} (sha256 {digest[:12]})")
+                artifact.sha256 = digest
+                artifact.added = datetime.now(timezone.utc).isoformat(timespec="seconds")
+                self._pin(artifact)
+                return artifact
+            if digest != artifact.sha256:
+                raise ChecksumMismatch(f"{name}: sha256 {digest} does not match pinned {artifact.sha256}")
+            self._verified[name] = (stat.st_size, stat.st_mtime_ns)
+            return artifact
+
+    def verify_all(self) -> Dict[str, str]:
+        """Status per artifact: ok, unpinned, mismatch or missing"""
+        status = {}
+        for artifact in self.artifacts():
+            try:
+                verified = self.verify(artifact.name, pin=False)
+                status[artifact.name] = "ok" if verified.sha256 else "unpinned"
+            except ChecksumMismatch:
+                status[artifact.name] = "mismatch"
+            except ModelUnavailable:
+                status[artifact.name] = "unpinned"
+        for name in self.missing():
+            status[name] = "missing"
+        return status
+
+    # Getting artifacts
+
+    def add(self, file: Path, name: Optional[str] = None) -> Artifact:
+        """Copy a model file into MODEL_DIR and pin it"""
+        name = name or file.name
+        target = self.root / name
+        if file.resolve() != target.resolve():
+            shutil.copy2(file, target)
+        return self._register(name)
+
+    def _register(self, name: str, **fields) -> Artifact:
+        artifact = self._artifact(name, dict(
+            fields, sha256=sha256_file(self.root / name), added=datetime.now(timezone.utc).isoformat(timespec="seconds")
+        ))
+        self._pin(artifact)
+        return artifact
+
+    def fetch(self, weights: str) -> Artifact:
+        """Download released weights into MODEL_DIR (the only network access) and pin them"""
+        from ultralytics.utils.downloads import attempt_download_asset
+
+        target = self.root / weights
+        attempt_download_asset(target)
+        if not target.is_file():
+            raise ModelUnavailable(f"Download of {weights} failed")
+        return self._register(weights)
+
+    def weights(self, weights: str) -> Artifact:
+        """Verified released weights, fetched only when online mode allows"""
+        if not (self.root / weights).is_file():
+            if MODEL_OFFLINE:
+                raise ModelUnavailable(
+                    f"{weights} is not in {self.root} and MODEL_OFFLINE is set; "
+                    f"run python -m app.services.model_registry fetch {weights}"
+                )
+            self.fetch(weights)
+        return self.verify(weights)
+
+    def variant(self, weights: str, fmt: str, imgsz: int, half: bool = False) -> Path:
+        """
+        A converted variant of weights, exported on first use and cached
+
+        The cached file is reused while the source weights' checksum is
+        the one it was built from.
+        """
+        source = self.weights(weights)
+        name = variant_name(weights, fmt, imgsz, half)
+        with self._lock:
+            entry = self._read().get(name)
+            if entry and entry.get("source_sha256") == source.sha256 and (self.root / name).is_file():
+                return self.verify(name).path
+            logger.info(f"Converting {weights} to {fmt} at {imgsz}px{' fp16' if half else ''}")
+            self._export(source.path, self.root / name, fmt, imgsz, half)
+            return self._register(
+                name, source=source.name, source_sha256=source.sha256, imgsz=imgsz, half=half
+            ).path
+
+    @staticmethod
+    def _export(source: Path, target: Path, fmt: str, imgsz: int, half: bool):
+        from ultralytics import YOLO
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # export() writes next to the weights, so convert a private copy
+        with tempfile.TemporaryDirectory(dir=target.parent, prefix=".export-") as tmp:
+            copy = Path(tmp) / source.name
+            shutil.copy2(source, copy)
+            exported = YOLO(str(copy), task="pose").export(
+                format=fmt, imgsz=imgsz, half=half, dynamic=fmt == "onnx", verbose=False
+            )
+            os.replace(exported, target)
+
+model_registry = ModelRegistry()
+
+def load_yolo(weights: str, fmt: str = "torch", imgsz: Optional[int] = None, half: bool = False):
+    """
+    YOLO pose model from MODEL_DIR, never from the network
+
+    fmt "torch" loads the released weights; other formats load (building
+    on first use) the cached variant for imgsz.
+    """
+    from ultralytics import YOLO
+
+    if fmt == "torch":
+        path = model_registry.weights(weights).path
+    else:
+        path = model_registry.variant(weights, fmt, imgsz, half)
+    return YOLO(str(path), task="pose")
+
+def main():
+    parser = argparse.ArgumentParser(description="Pose model artifacts in MODEL_DIR")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="artifacts, formats and checksums")
+    sub.add_parser("verify", help="check every artifact against its pinned checksum")
+    fetch = sub.add_parser("fetch", help="download released weights and pin them")
+    fetch.add_argument("weights", nargs="*", default=[weights for weights, _ in POSE_MODELS.values()])
+    add = sub.add_parser("add", help="copy a model file into MODEL_DIR and pin it")
+    add.add_argument("file", type=Path)
+    convert = sub.add_parser("convert", help="build cached variants ahead of time")
+    convert.add_argument("--weights", nargs="*", default=[weights for weights, _ in POSE_MODELS.values()])
+    convert.add_argument("--format", default="onnx", choices=[f for f in EXPORT_SUFFIXES if f != "torch"])
+    convert.add_argument("--imgsz", type=int, nargs="*", default=list(POSE_INPUT_SIZES))
+    convert.add_argument("--half", action="store_true", help="FP16 weights (GPU runtimes)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "list":
+        print(json.dumps({
+            "model_dir": str(MODEL_DIR),
+            "offline": MODEL_OFFLINE,
+            "artifacts": [asdict(a) for a in model_registry.artifacts()],
+            "missing": model_registry.missing(),
+        }, indent=2))
+    elif args.command == "verify":
+        status = model_registry.verify_all()
+        print(json.dumps(status, indent=2))
+        if any(s in ("mismatch", "missing") for s in status.values()):
+            sys.exit(1)
+    elif args.command == "fetch":
+        for weights in args.weights:
+            print(f"{weights}: {model_registry.fetch(weights).sha256}")
+    elif args.command == "add":
+        artifact = model_registry.add(args.file)
+        print(f"{artifact.name}: {artifact.sha256}")
+    elif args.command == "convert":
+        for weights in args.weights:
+            for imgsz in args.imgsz:
+                print(model_registry.variant(weights, args.format, imgsz, args.half).relative_to(MODEL_DIR))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Overlay track output (skeleton, events and labels as data)"""
+import json
+import numpy as np
+from typing import Tuple
+import logging
+
+from app.models.schemas import ViewType, Metrics
+from app.services.events import Events
+from app.services.annotate import SKELETON_EDGES, metric_labels
+
+logger = logging.getLogger(__name__)
+
+OVERLAY_TRACK_VERSION = 1
+
+def build_overlay_track(
+    keypoints: np.ndarray,
+    events: Events,
+    metrics: Metrics,
+    fps: float,
+    view: ViewType,
+    size: Tuple[int, int]
+) -> dict:
+    """
+    Everything the annotated video draws, as data
+
+    Keypoints are rounded to whole pixels and flattened to one
+    [x0, y0, x1, y1, ...] row per frame; timestamps are in ms.
+    """
+    w, h = size
+    points = np.round(keypoints).astype(np.int32).reshape(len(keypoints), -1)
+    return {
+        "version": OVERLAY_TRACK_VERSION,
+        "fps": fps,
+        "width": w,
+        "height": h,
+        "frames": len(keypoints),
+        "timestamps_ms": np.round(np.arange(len(keypoints)) * 1000.0 / fps).astype(int).tolist(),
+        "edges": SKELETON_EDGES.tolist(),
+        "keypoints": points.tolist(),
+        "events": {
+            "penultimate_frame": events.penultimate_frame,
+            "plant_frame": events.plant_frame,
+            "release_frame": events.release_frame
+        },
+        "labels": metric_labels(metrics, ViewType(view)),
+    }
+
+def write_overlay_track(
+    output_path: str,
+    keypoints: np.ndarray,
+    events: Events,
+    metrics: Metrics,
+    fps: float,
+    view: ViewType,
+    size: Tuple[int, int]
+):
+    track = build_overlay_track(keypoints, events, metrics, fps, view, size)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(track, f, separators=(",", ":"))
+    logger.info(f"Overlay track saved: {output_path} ({track['frames']} frames)")
@@ -1,36 +1,252 @@
 import logging
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from app.models.schemas import (
+    AnalyzeResponse, MetaInfo, EventFrames,
+    Metrics, QualityControl, QCStatus,
+    ViewType, Handedness, ScaleMethod, OutputMode
+)
+from app.services.calibration import load_profile, save_profile
+from app.services.detectors import get_pose_detector, pose_runtime
+from app.services.events import detect_events
+from app.services.metrics import calculate_side_metrics, calculate_rear_metrics
+from app.services.scaling import calculate_scale, find_marker_scale
+from app.services.annotate import render_annotated_video, start_annotated_render
+from app.services.encoder import streaming_encoder_available
+from app.services.overlay import write_overlay_track
+from app.services.keyframes import render_keyframes
+from app.services.video import probe_video, iter_frames, iter_sampled_frames, file_sha256
+from app.services.deadline import Deadline, PoseBudget
+from app.services.jobs import check_cancelled
+from app.config import (
+    DEFAULT_FPS, DEFAULT_POSE_TIER, SAVGOL_WINDOW, RENDER_COST_FACTOR, CANCEL_CHECK_FRAMES,
+    QC_GOOD_VISIBILITY, QC_WARN_VISIBILITY,
+    ERROR_SHORT_CLIP, ERROR_NO_POSE_MODEL
+)
+from app.monitoring import timed, current_timings, FRAMES_INFERRED, POSE_TIER_JOBS
 
 logger = logging.getLogger(__name__)
 
-async def analyze_video(video_path, output_path, view, handedness, scale_method):
+@timed("analyze_video")
+def analyze_video(
+    video_path,
+    output_path,
+    view,
+    handedness,
+    scale_method,
+    venue: Optional[str] = None,
+    camera: Optional[str] = None,
+    output_mode: str = OutputMode.VIDEO.value,
+    video_hash: Optional[str] = None,
+    model_tier: str = DEFAULT_POSE_TIER,
+    tier_source: str = "pinned"
+) -> AnalyzeResponse:
     logger.info(f"Analyzing: {video_path}")
-    # Dummy implementation
-    from app.models.schemas import (
-        AnalyzeResponse, MetaInfo, EventFrames,
-        Metrics, QualityControl
+    timings = current_timings()
+    deadline = Deadline()
+
+    output_mode = OutputMode(output_mode)
+    view = ViewType(view)
+    handedness = Handedness(handedness)
+    scale_method = ScaleMethod(scale_method)
+
+    info = probe_video(video_path)
+    if info is None:
+        raise ValueError(f"Cannot open video: {video_path}")
+    fps = info.fps or DEFAULT_FPS
+    if video_hash is None:
+        video_hash = file_sha256(video_path)
+
+    # Pose: decode one frame at a time, keep only keypoints; frames go
+    # to the model in batches of pose_runtime.batch_size. The runtime is
+    # read once, so settings applied by app.autotune take effect between
+    # jobs, never part-way through one.
+    # Decode and inference interleave, so time them around each step.
+    # The budget thins out sampling (skipped frames are interpolated) or
+    # steps down to a smaller input size if the clip won't finish in time.
+    batch_size, backend = pose_runtime.batch_size, pose_runtime.backend
+    budget = PoseBudget(deadline, info.frame_count, model_tier, backend)
+    keypoints = []
+    confidences = []
+    batch, slots = [], []  # frames waiting for the model, their index in keypoints
+    unloaded = set()  # tiers that ran on placeholder keypoints
+
+    def run_batch():
+        start = time.perf_counter()
+        detector = get_pose_detector(budget.tier, backend)
+        if not detector.loaded:
+            unloaded.add(budget.tier)
+        results = detector.detect_batch(batch)
+        per_frame = (time.perf_counter() - start) / len(batch)
+        for slot, (kp, conf) in zip(slots, results):
+            keypoints[slot] = kp
+            confidences.append(conf if kp is not None else 0.0)
+            timings.add_frame(per_frame)
+        batch.clear()
+        slots.clear()
+
+    with timings.track_memory("pose"):
+        decode_start = time.perf_counter()
+        for i, frame in iter_sampled_frames(video_path, budget.keep):
+            if i % CANCEL_CHECK_FRAMES == 0:
+                check_cancelled()
+            if not budget.step(i):
+                break
+            timings.add("decode", time.perf_counter() - decode_start)
+            keypoints.append(None)
+            if frame is not None:
+                batch.append(frame)
+                slots.append(len(keypoints) - 1)
+                if len(batch) >= batch_size:
+                    run_batch()
+            decode_start = time.perf_counter()
+        if batch:
+            run_batch()
+    FRAMES_INFERRED.inc(len(confidences))
+    decode_per_frame = timings.stages.get("decode", 0.0) / max(1, len(keypoints))
+    notes = list(budget.notes)
+    if unloaded:
+        notes.insert(0, f"{ERROR_NO_POSE_MODEL}: {', '.join(sorted(unloaded))} (placeholder keypoints)")
+    # Counted and reported by the tier the last batch ran on
+    if budget.tier != model_tier:
+        notes.append(f"Pose model stepped down from {model_tier} to {budget.tier} to meet the deadline")
+        tier_source = "stepdown"
+    POSE_TIER_JOBS.labels(budget.tier, tier_source).inc()
+    keypoints = _fill_missing(keypoints)
+
+    meta = MetaInfo(
+        fps=fps,
+        frames=len(keypoints) if keypoints is not None else len(confidences),
+        view=view.value,
+        handedness=handedness.value,
+        scale_method=scale_method.value,
+        m_per_px=0.0,
+        video_hash=video_hash,
+        model_tier=budget.tier
     )
-    
+
+    if keypoints is None or len(keypoints) < SAVGOL_WINDOW:
+        return AnalyzeResponse(
+            meta=meta,
+            events=EventFrames(),
+            metrics=Metrics(),
+            qc=QualityControl(overall_status=QCStatus.FAIL.value, notes=[ERROR_SHORT_CLIP] + notes),
+            error=ERROR_SHORT_CLIP
+        )
+
+    check_cancelled()
+    with timings.measure("events"):
+        events = detect_events(keypoints, fps, view)
+
+    # A stored venue/camera profile skips marker detection entirely;
+    # the first successful marker detection creates it. An explicit
+    # scale_method=auto ignores the profile.
+    profile = None
+    with timings.measure("scale"):
+        if venue and camera and scale_method != ScaleMethod.AUTO:
+            profile = load_profile(venue, camera)
+            if profile is None and scale_method == ScaleMethod.MARKER:
+                found = find_marker_scale(iter_frames(video_path), view)
+                if found is not None:
+                    profile = save_profile(venue, camera, found, view)
+                    notes.append(f"Calibration profile saved: {profile.venue}/{profile.camera}")
+
+        m_per_px, used_method, scale_notes = calculate_scale(
+            iter_frames(video_path), keypoints, scale_method, view, profile=profile
+        )
+    notes.extend(scale_notes)
+    meta.m_per_px = m_per_px
+    meta.scale_method = used_method.value
+
+    with timings.measure("metrics"):
+        if view == ViewType.SIDE:
+            metrics = calculate_side_metrics(keypoints, events, fps, m_per_px)
+        else:
+            metrics = calculate_rear_metrics(keypoints, events, fps, m_per_px, handedness)
+
+    # Three targeted decodes, cached per clip
+    keyframes_path = None
+    with timings.measure("keyframes"):
+        if deadline.expired():
+            notes.append("Deadline: keyframes skipped")
+        else:
+            key = render_keyframes(video_path, video_hash, keypoints, events)
+            if key is not None:
+                keyframes_path = f"/api/keyframes/{key}"
+
+    # The overlay track costs a JSON dump; the client draws it on the
+    # original video, so re-encoding can be skipped entirely
+    # Only the synchronous part is timed; a streaming render continues
+    # after the response
+    check_cancelled()
+    annotated_video_path = None
+    overlay_path = None
+    with timings.measure("render"):
+        if output_mode in (OutputMode.OVERLAY, OutputMode.BOTH):
+            track_path = Path(output_path).with_name(f"{Path(output_path).stem}_overlay.json")
+            write_overlay_track(str(track_path), keypoints, events, metrics, fps, view, (info.width, info.height))
+            overlay_path = f"/api/outputs/{track_path.name}"
+
+        # Rendering decodes the clip again and encodes every frame
+        render_estimate = len(keypoints) * decode_per_frame * RENDER_COST_FACTOR
+        if output_mode in (OutputMode.VIDEO, OutputMode.BOTH) and render_estimate > deadline.remaining():
+            notes.append("Deadline: annotated video skipped")
+        elif output_mode in (OutputMode.VIDEO, OutputMode.BOTH):
+            # Fragmented MP4 can be streamed while it is encoded, so don't wait for it
+            if streaming_encoder_available():
+                start_annotated_render(video_path, keypoints, events, metrics, str(output_path), fps, view)
+            else:
+                render_annotated_video(video_path, keypoints, events, metrics, str(output_path), fps, view)
+            annotated_video_path = f"/api/outputs/{Path(output_path).name}"
+
+    pose_confidence = float(np.mean(confidences))
+    # Metrics from a truncated clip may miss the throw's end
+    # Placeholder keypoints have a made-up confidence
+    if unloaded:
+        status = QCStatus.FAIL
+    elif pose_confidence >= QC_GOOD_VISIBILITY and budget.stopped_at is None:
+        status = QCStatus.GOOD
+    elif pose_confidence >= QC_WARN_VISIBILITY:
+        status = QCStatus.WARN
+    else:
+        status = QCStatus.FAIL
+
     return AnalyzeResponse(
-        meta=MetaInfo(
-            fps=30.0,
-            frames=100,
-            view=view,
-            handedness=handedness,
-            scale_method=scale_method,
-            m_per_px=0.002
-        ),
+        meta=meta,
         events=EventFrames(
-            penultimate_frame=50,
-            plant_frame=60,
-            release_frame=70
-        ),
-        metrics=Metrics(
-            release_angle_deg=35.0,
-            release_height_m=1.9,
-            release_speed_mps=18.5
+            penultimate_frame=events.penultimate_frame,
+            plant_frame=events.plant_frame,
+            release_frame=events.release_frame
         ),
+        metrics=metrics,
         qc=QualityControl(
-            overall_status="GOOD",
-            notes=[]
-        )
+            pose_confidence=pose_confidence,
+            overall_status=status.value,
+            notes=notes
+        ),
+        annotated_video_path=annotated_video_path,
+        overlay_path=overlay_path,
+        keyframes_path=keyframes_path
     )
+
+def _fill_missing(keypoints: list) -> Optional[np.ndarray]:
+    """
+    Fill frames without a detection (not found, or not sampled)
+
+    Gaps are interpolated linearly between the detections either side,
+    so velocities stay smooth when frames were skipped; the first and
+    last detections are carried to the ends of the clip.
+    """
+    valid = [i for i, kp in enumerate(keypoints) if kp is not None]
+    if not valid:
+        return None
+
+    known = np.stack([keypoints[i] for i in valid]).astype(float)
+    flat = known.reshape(len(valid), -1)
+    frames = np.arange(len(keypoints))
+    filled = np.column_stack([np.interp(frames, valid, flat[:, d]) for d in range(flat.shape[1])])
+    return filled.reshape((len(keypoints),) + known.shape[1:])
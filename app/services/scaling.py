@@ -1 +1,231 @@
-﻿"""""" import cv2 import numpy as np from typing import Tuple, List import logging from app.models.schemas import ViewType, ScaleMethod from app.services.detectors import PoseDetector from app.config import DEFAULT_PERSON_HEIGHT, AUTO_SCALE_COEFFICIENT, MARKER_SIZE_M logger = logging.getLogger(__name__) def calculate_scale( frames: np.ndarray, keypoints: np.ndarray, method: ScaleMethod, view: ViewType ) -> Tuple[float, List[str]]: """ /px Returns: m_per_px: / notes: """ notes = [] if method == ScaleMethod.MARKER: # m_per_px = detect_markers(frames[0], view) if m_per_px is None: # uto notes.append("Marker not detected, falling back to auto scale") method = ScaleMethod.AUTO if method == ScaleMethod.AUTO or m_per_px is None: # m_per_px = estimate_from_person(keypoints) notes.append("Using auto scale from person height estimation") # px = 0.1mm0cm if m_per_px < 0.0001 or m_per_px > 0.1: logger.warning(f"Unusual scale detected: {m_per_px} m/px") m_per_px = 0.002 # px = 2mm notes.append("Scale value out of range, using default") return m_per_px, notes def detect_markers(frame: np.ndarray, view: ViewType) -> Optional[float]: """ Returns: m_per_px: one: """ # TODO: # 1. / # 2. ArUco # 3. QR # hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV) # lower_red = np.array([0, 120, 70]) upper_red = np.array([10, 255, 255]) mask1 = cv2.inRange(hsv, lower_red, upper_red) lower_red = np.array([170, 120, 70]) upper_red = np.array([180, 255, 255]) mask2 = cv2.inRange(hsv, lower_red, upper_red) mask = mask1 | mask2 # contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE) # if len(contours) >= 2: # contours = sorted(contours, key=cv2.contourArea, reverse=True) # centers = [] for cnt in contours[:2]: M = cv2.moments(cnt) if M["m00"] != 0: cx = int(M["m10"] / M["m00"]) cy = int(M["m01"] / M["m00"]) centers.append((cx, cy)) if len(centers) == 2: # 2 dist_px = np.linalg.norm(np.array(centers[0]) - np.array(centers[1])) if dist_px > 50: # # 1m m_per_px = MARKER_SIZE_M / dist_px logger.info(f"Marker detected: {dist_px:.1f}px = {MARKER_SIZE_M}m") return m_per_px return None def estimate_from_person(keypoints: np.ndarray) -> float: """ Returns: m_per_px: """ # mean_keypoints = np.mean(keypoints, axis=0) # shoulder_y = (mean_keypoints[PoseDetector.LEFT_SHOULDER, 1] + mean_keypoints[PoseDetector.RIGHT_SHOULDER, 1]) / 2 # ankle_y = (mean_keypoints[PoseDetector.LEFT_ANKLE, 1] + mean_keypoints[PoseDetector.RIGHT_ANKLE, 1]) / 2 # height_px = abs(ankle_y - shoulder_y) if height_px > 0: # -5% estimated_height = DEFAULT_PERSON_HEIGHT * 0.85 m_per_px = estimated_height / height_px logger.info(f"Auto scale: {height_px:.1f}px = {estimated_height:.2f}m (estimated)") return m_per_px # return 0.002 # 1px = 2mm 
\ No newline at end of file
+﻿"""Pixel-to-metre scale estimation"""
+import cv2
+import numpy as np
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Tuple, List, Optional
+import logging
+
+from app.models.schemas import ViewType, ScaleMethod, MarkerType, CalibrationProfile
+from app.services.detectors import PoseDetector
+from app.log import RATE_LIMITED
+from app.config import (
+    DEFAULT_PERSON_HEIGHT, AUTO_SCALE_COEFFICIENT, MARKER_SIZE_M,
+    ARUCO_MARKER_SIZE_M, ARUCO_DICTIONARY, MARKER_SEARCH_FRAMES
+)
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class MarkerScale:
+    """Scale found from a reference marker"""
+    m_per_px: float
+    marker_type: MarkerType
+    frame_index: int = 0
+
+def calculate_scale(
+    frames: Iterable[np.ndarray],
+    keypoints: np.ndarray,
+    method: ScaleMethod,
+    view: ViewType,
+    profile: Optional[CalibrationProfile] = None
+) -> Tuple[float, ScaleMethod, List[str]]:
+    """
+    Resolve the m/px scale for a clip
+
+    Args:
+        frames: decoded frames; only the first MARKER_SEARCH_FRAMES are read
+        keypoints: (T, 17, 2)
+        method: requested scale method
+        view: camera view
+        profile: stored calibration profile, skips marker detection when given
+
+    Returns:
+        m_per_px: metres per pixel
+        method: the method the scale actually came from
+        notes: QC notes
+    """
+    notes = []
+    m_per_px = None
+
+    if profile is not None:
+        notes.append(f"Using calibration profile {profile.venue}/{profile.camera}")
+        return profile.m_per_px, ScaleMethod.PROFILE, notes
+
+    if method == ScaleMethod.PROFILE:
+        notes.append("No calibration profile, falling back to auto scale")
+        method = ScaleMethod.AUTO
+
+    if method == ScaleMethod.MARKER:
+        found = find_marker_scale(frames, view)
+        if found is None:
+            notes.append("Marker not detected, falling back to auto scale")
+            method = ScaleMethod.AUTO
+        else:
+            m_per_px = found.m_per_px
+
+    if method != ScaleMethod.MARKER or m_per_px is None:
+        m_per_px = estimate_from_person(keypoints)
+        method = ScaleMethod.AUTO
+        notes.append("Using auto scale from person height estimation")
+
+    # 1px = 0.1mm .. 10cm
+    if m_per_px < 0.0001 or m_per_px > 0.1:
+        logger.warning(f"Unusual scale detected: {m_per_px} m/px", extra=RATE_LIMITED)
+        m_per_px = 0.002  # 1px = 2mm
+        notes.append("Scale value out of range, using default")
+
+    return m_per_px, method, notes
+
+def find_marker_scale(
+    frames: Iterable[np.ndarray],
+    view: ViewType,
+    max_frames: int = MARKER_SEARCH_FRAMES
+) -> Optional[MarkerScale]:
+    """
+    Search the first few frames for a reference marker
+
+    Tripod-mounted cameras see the marker from the first frame, so the
+    search stops at max_frames instead of scanning the whole clip.
+    """
+    for i, frame in enumerate(islice(frames, max_frames)):
+        found = detect_markers(frame, view)
+        if found is not None:
+            found.frame_index = i
+            return found
+    return None
+
+def detect_markers(frame: np.ndarray, view: ViewType) -> Optional[MarkerScale]:
+    """
+    Detect a reference marker in a single frame
+
+    ArUco boards are tried first since their printed size is exact;
+    the red marker pair is the fallback.
+
+    Returns:
+        MarkerScale or None
+    """
+    m_per_px = detect_aruco_markers(frame)
+    if m_per_px is not None:
+        return MarkerScale(m_per_px=m_per_px, marker_type=MarkerType.ARUCO)
+
+    m_per_px = detect_red_markers(frame)
+    if m_per_px is not None:
+        return MarkerScale(m_per_px=m_per_px, marker_type=MarkerType.RED)
+
+    return None
+
+def detect_red_markers(frame: np.ndarray) -> Optional[float]:
+    """
+    Two red markers placed MARKER_SIZE_M apart
+
+    Returns:
+        m_per_px or None
+    """
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+
+    lower_red = np.array([0, 120, 70])
+    upper_red = np.array([10, 255, 255])
+    mask1 = cv2.inRange(hsv, lower_red, upper_red)
+
+    lower_red = np.array([170, 120, 70])
+    upper_red = np.array([180, 255, 255])
+    mask2 = cv2.inRange(hsv, lower_red, upper_red)
+
+    mask = mask1 | mask2
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    if len(contours) >= 2:
+        contours = sorted(contours, key=cv2.contourArea, reverse=True)
+
+        centers = []
+        for cnt in contours[:2]:
+            M = cv2.moments(cnt)
+            if M["m00"] != 0:
+                cx = int(M["m10"] / M["m00"])
+                cy = int(M["m01"] / M["m00"])
+                centers.append((cx, cy))
+
+        if len(centers) == 2:
+            dist_px = np.linalg.norm(np.array(centers[0]) - np.array(centers[1]))
+
+            if dist_px > 50:
+                m_per_px = MARKER_SIZE_M / dist_px
+                logger.info(f"Marker detected: {dist_px:.1f}px = {MARKER_SIZE_M}m", extra=RATE_LIMITED)
+                return m_per_px
+
+    return None
+
+@lru_cache(maxsize=1)
+def _aruco_detector():
+    aruco = getattr(cv2, "aruco", None)
+    if aruco is None:
+        return None
+    dictionary = aruco.getPredefinedDictionary(getattr(aruco, ARUCO_DICTIONARY))
+    if hasattr(aruco, "ArucoDetector"):
+        return aruco.ArucoDetector(dictionary, aruco.DetectorParameters())
+    # OpenCV < 4.7
+    return dictionary
+
+def detect_aruco_markers(frame: np.ndarray) -> Optional[float]:
+    """
+    ArUco markers (single or board) with side length ARUCO_MARKER_SIZE_M
+
+    Returns:
+        m_per_px or None
+    """
+    detector = _aruco_detector()
+    if detector is None:
+        return None
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if hasattr(detector, "detectMarkers"):
+        corners, ids, _ = detector.detectMarkers(gray)
+    else:
+        corners, ids, _ = cv2.aruco.detectMarkers(gray, detector)
+
+    if ids is None or len(corners) == 0:
+        return None
+
+    # Mean side length of every marker on the board
+    sides = []
+    for c in corners:
+        quad = c.reshape(4, 2)
+        sides.append(np.linalg.norm(quad - np.roll(quad, -1, axis=0), axis=1).mean())
+    side_px = float(np.median(sides))
+
+    if side_px < 10:
+        return None
+
+    m_per_px = ARUCO_MARKER_SIZE_M / side_px
+    logger.info(f"ArUco detected: {len(ids)} markers, {side_px:.1f}px = {ARUCO_MARKER_SIZE_M}m", extra=RATE_LIMITED)
+    return m_per_px
+
+def estimate_from_person(keypoints: np.ndarray) -> float:
+    """
+    Estimate scale from the athlete's shoulder-to-ankle height
+
+    Returns:
+        m_per_px
+    """
+    mean_keypoints = np.mean(keypoints, axis=0)
+
+    shoulder_y = (mean_keypoints[PoseDetector.LEFT_SHOULDER, 1] +
+                  mean_keypoints[PoseDetector.RIGHT_SHOULDER, 1]) / 2
+
+    ankle_y = (mean_keypoints[PoseDetector.LEFT_ANKLE, 1] +
+               mean_keypoints[PoseDetector.RIGHT_ANKLE, 1]) / 2
+
+    height_px = abs(ankle_y - shoulder_y)
+
+    if height_px > 0:
+        # Shoulder-to-ankle is roughly 85% of standing height
+        estimated_height = DEFAULT_PERSON_HEIGHT * 0.85
+        m_per_px = estimated_height / height_px
+
+        logger.info(f"Auto scale: {height_px:.1f}px = {estimated_height:.2f}m (estimated)", extra=RATE_LIMITED)
+        return m_per_px
+
+    return 0.002  # 1px = 2mm
@@ -0,0 +1,143 @@
+"""Video decoding helpers"""
+import cv2
+import hashlib
+import numpy as np
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+import logging
+
+from app.config import SEEK_GRAB_LIMIT
+from app.monitoring import FRAMES_DECODED
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class VideoInfo:
+    """Container metadata read without decoding"""
+    fps: float
+    frame_count: int
+    width: int
+    height: int
+
+def probe_video(video_path: str) -> Optional[VideoInfo]:
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    try:
+        return VideoInfo(
+            fps=cap.get(cv2.CAP_PROP_FPS),
+            frame_count=int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        )
+    finally:
+        cap.release()
+
+def iter_frames(
+    video_path: str,
+    start: int = 0,
+    stop: Optional[int] = None
+) -> Iterator[np.ndarray]:
+    """
+    Decode frames lazily, one at a time
+
+    Args:
+        video_path: source video
+        start: first frame index
+        stop: frame index to stop before (None = end of clip)
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        logger.error(f"Cannot open video: {video_path}")
+        return
+
+    i = start
+    try:
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        while stop is None or i < stop:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            i += 1
+            yield frame
+    finally:
+        cap.release()
+        FRAMES_DECODED.inc(i - start)
+
+def iter_sampled_frames(
+    video_path: str,
+    keep: Callable[[int], bool]
+) -> Iterator[Tuple[int, Optional[np.ndarray]]]:
+    """
+    Walk every frame, decoding only those keep(index) accepts
+
+    Skipped frames are grab()bed, which demuxes without converting to
+    BGR, and yielded as None so the caller still sees every index.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        logger.error(f"Cannot open video: {video_path}")
+        return
+
+    i = 0
+    decoded = 0
+    try:
+        while True:
+            if keep(i):
+                ret, frame = cap.read()
+                decoded += ret
+            else:
+                ret, frame = cap.grab(), None
+            if not ret:
+                break
+            yield i, frame
+            i += 1
+    finally:
+        cap.release()
+        FRAMES_DECODED.inc(decoded)
+
+def read_frames_at(video_path: str, indices: Iterable[int]) -> Dict[int, np.ndarray]:
+    """
+    Decode only the requested frames
+
+    Indices are visited in order; short gaps are skipped with grab(),
+    which demuxes without converting, and longer ones with a seek.
+    """
+    wanted = sorted(set(i for i in indices if i is not None and i >= 0))
+    frames = {}
+    if not wanted:
+        return frames
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        logger.error(f"Cannot open video: {video_path}")
+        return frames
+
+    try:
+        pos = 0
+        for idx in wanted:
+            if idx < pos or idx - pos > SEEK_GRAB_LIMIT:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+                pos = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+            while pos < idx:
+                if not cap.grab():
+                    break
+                pos += 1
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames[idx] = frame
+            pos = idx + 1
+    finally:
+        cap.release()
+        FRAMES_DECODED.inc(len(frames))
+
+    return frames
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
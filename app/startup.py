@@ -0,0 +1,98 @@
+"""Cold-start accounting and background preloading"""
+import importlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+from app.config import STARTUP_READY_BUDGET_SEC, PRELOAD_MODULES
+
+logger = logging.getLogger(__name__)
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started, from /proc (10 ms resolution)"""
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces; fields resume after its ")"
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"))
+    except (OSError, IndexError, ValueError):
+        return None
+
+class StartupTimer:
+    """
+    Where this process's cold start went
+
+    mark() closes a phase that ran back to back with the previous one
+    (imports, building the app); measure() times a block wherever it runs,
+    e.g. the warm-up steps in their thread. Time from process start to the
+    timer's creation is reported as "interpreter" when /proc is readable.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._start = self._last = time.perf_counter()
+        self._offset = process_age()
+        self.phases: Dict[str, float] = {}
+        if self._offset is not None:
+            self.phases["interpreter"] = self._offset
+        self.ready_after: Optional[float] = None
+
+    def _since_start(self) -> float:
+        return (self._offset or 0.0) + time.perf_counter() - self._start
+
+    def mark(self, phase: str):
+        with self._lock:
+            now = time.perf_counter()
+            self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+            self._last = now
+
+    @contextmanager
+    def measure(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[phase] = self.phases.get(phase, 0.0) + time.perf_counter() - start
+
+    def set_ready(self):
+        if self.ready_after is not None:
+            return
+        self.ready_after = self._since_start()
+        breakdown = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.phases.items())
+        if self.ready_after > STARTUP_READY_BUDGET_SEC:
+            logger.warning(
+                f"Ready after {self.ready_after:.2f}s, over the {STARTUP_READY_BUDGET_SEC:g}s budget ({breakdown})"
+            )
+        else:
+            logger.info(f"Ready after {self.ready_after:.2f}s ({breakdown})")
+
+    def report(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "phases_s": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "ready_after_s": round(self.ready_after, 3) if self.ready_after is not None else None,
+            "uptime_s": round(self._since_start(), 3),
+            "budget_s": STARTUP_READY_BUDGET_SEC,
+        }
+
+startup = StartupTimer()
+
+def preload(modules: Iterable[str] = PRELOAD_MODULES):
+    """
+    Import modules that request handlers import lazily
+
+    Run from the warm-up thread so the first analysis doesn't pay for
+    them; each one is timed as a "preload:<module>" phase.
+    """
+    for name in modules:
+        with startup.measure(f"preload:{name}"):
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                logger.warning(f"Preload of {name} failed: {e}")
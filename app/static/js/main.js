@@ -1,6 +1,7 @@
 ﻿// Javelink Lite Frontend JavaScript
 
 let analysisResult = null;
+let overlayPlayer = null;
 
 document.addEventListener('DOMContentLoaded', function() {
     const form = document.getElementById('uploadForm');
@@ -23,6 +24,8 @@ document.addEventListener('DOMContentLoaded', function() {
         formData.append('view', view);
         formData.append('handedness', handedness);
         formData.append('scale_method', scaleMethod);
+        // Draw the overlay client-side instead of re-encoding the video
+        formData.append('output_mode', 'overlay');
         
         // UI state
         submitBtn.disabled = true;
@@ -43,6 +46,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 analysisResult = result;
                 displayResults(result);
                 resultsContainer.classList.remove('hidden');
+                await showOverlay(result, fileInput.files[0]);
             } else {
                 throw new Error(result.error || 'Analysis failed');
             }
@@ -77,6 +81,35 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+async function showOverlay(result, file) {
+    const container = document.getElementById('overlayContainer');
+    const video = document.getElementById('overlayVideo');
+    const canvas = document.getElementById('overlayCanvas');
+
+    if (overlayPlayer) {
+        overlayPlayer.stop();
+        overlayPlayer = null;
+    }
+    if (video.src) {
+        URL.revokeObjectURL(video.src);
+        video.removeAttribute('src');
+    }
+    document.getElementById('downloadVideo').classList.toggle('hidden', !result.annotated_video_path);
+
+    if (!result.overlay_path) {
+        container.classList.add('hidden');
+        return;
+    }
+
+    const response = await fetch(result.overlay_path);
+    const track = await response.json();
+
+    // The overlay is drawn on the user's own copy of the clip
+    video.src = URL.createObjectURL(file);
+    overlayPlayer = createOverlayPlayer(video, canvas, track);
+    container.classList.remove('hidden');
+}
+
 function displayResults(result) {
     const metricsGrid = document.getElementById('metricsGrid');
     metricsGrid.innerHTML = '';
@@ -0,0 +1,107 @@
+// Javelink overlay renderer: draws an overlay track on top of the original video
+
+const OVERLAY_EVENTS = [
+    {key: 'penultimate_frame', label: 'PENULTIMATE', color: 'rgb(0, 255, 255)', y: 50},
+    {key: 'plant_frame', label: 'PLANT', color: 'rgb(255, 255, 0)', y: 100},
+    {key: 'release_frame', label: 'RELEASE', color: 'rgb(0, 255, 0)', y: 150}
+];
+
+function createOverlayPlayer(video, canvas, track) {
+    const ctx = canvas.getContext('2d');
+    let handle = null;
+
+    function frameAt(time) {
+        // Binary search the frame whose timestamp is closest below `time`
+        const ms = time * 1000;
+        const ts = track.timestamps_ms;
+        let lo = 0, hi = ts.length - 1;
+        while (lo < hi) {
+            const mid = (lo + hi + 1) >> 1;
+            if (ts[mid] <= ms) lo = mid; else hi = mid - 1;
+        }
+        return lo;
+    }
+
+    function draw() {
+        const width = video.videoWidth || track.width;
+        const height = video.videoHeight || track.height;
+        if (canvas.width !== width || canvas.height !== height) {
+            canvas.width = width;
+            canvas.height = height;
+        }
+        ctx.clearRect(0, 0, width, height);
+        const sx = width / track.width;
+        const sy = height / track.height;
+
+        const i = frameAt(video.currentTime);
+        const kp = track.keypoints[i];
+        if (kp) {
+            ctx.strokeStyle = 'rgb(0, 255, 0)';
+            ctx.lineWidth = 2;
+            ctx.beginPath();
+            for (const [a, b] of track.edges) {
+                ctx.moveTo(kp[2 * a] * sx, kp[2 * a + 1] * sy);
+                ctx.lineTo(kp[2 * b] * sx, kp[2 * b + 1] * sy);
+            }
+            ctx.stroke();
+
+            ctx.fillStyle = 'rgb(255, 0, 0)';
+            for (let j = 0; j < kp.length; j += 2) {
+                ctx.beginPath();
+                ctx.arc(kp[j] * sx, kp[j + 1] * sy, 5, 0, 2 * Math.PI);
+                ctx.fill();
+            }
+        }
+
+        ctx.font = '20px sans-serif';
+        for (const ev of OVERLAY_EVENTS) {
+            if (track.events[ev.key] === i) {
+                ctx.fillStyle = ev.color;
+                ctx.fillText(ev.label, 50, ev.y);
+                ctx.fillRect(width / 2 - 1, 0, 2, height);
+            }
+        }
+
+        const release = track.events.release_frame;
+        if (release !== null && release !== undefined && i > release) {
+            ctx.fillStyle = 'white';
+            track.labels.forEach((text, n) => ctx.fillText(text, 50, 200 + n * 30));
+        }
+
+        ctx.fillStyle = 'rgb(200, 200, 200)';
+        ctx.font = '14px sans-serif';
+        ctx.fillText(`Frame: ${i}`, width - 150, 30);
+    }
+
+    function tick() {
+        draw();
+        schedule();
+    }
+
+    function schedule() {
+        if ('requestVideoFrameCallback' in video) {
+            handle = video.requestVideoFrameCallback(tick);
+        } else {
+            handle = requestAnimationFrame(tick);
+        }
+    }
+
+    // Paused seeks don't produce video frame callbacks
+    video.addEventListener('seeked', draw);
+    video.addEventListener('loadeddata', draw);
+    schedule();
+
+    return {
+        stop() {
+            video.removeEventListener('seeked', draw);
+            video.removeEventListener('loadeddata', draw);
+            if (handle === null) return;
+            if ('cancelVideoFrameCallback' in video) {
+                video.cancelVideoFrameCallback(handle);
+            } else {
+                cancelAnimationFrame(handle);
+            }
+            handle = null;
+        }
+    };
+}
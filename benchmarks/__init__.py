@@ -0,0 +1 @@
+"""Javelink benchmarks (run with python -m benchmarks.<name>)"""
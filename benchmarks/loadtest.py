@@ -0,0 +1,377 @@
+"""
+Load test an app variant under a local uvicorn
+
+Starts `uvicorn <target>` (or uses --url), replays a weighted mix of
+synthetic clips at each concurrency level, and samples the server's RSS
+throughout. Writes a JSON report and, optionally, an HTML one.
+
+    python -m benchmarks.loadtest app.main:app --mix small:3,medium:1 \\
+        --concurrency 1,4,8 --requests 40 --output load.json --html load.html
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import httpx
+import numpy as np
+from jinja2 import Environment
+
+from benchmarks.startup import bench_env
+from benchmarks.synthetic import ThrowClip, write_throw_video, render_still
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = Path(__file__).parent.parent
+
+CLIP_SIZES = {
+    "small": ThrowClip(width=640, height=360, fps=30, duration=2.0),
+    "medium": ThrowClip(width=1280, height=720, fps=30, duration=3.0),
+    "large": ThrowClip(width=1920, height=1080, fps=30, duration=4.0),
+}
+
+# Where each variant takes uploads; app:app only analyses a single image.
+# "uvicorn" is the import path when the target name isn't one: uvicorn
+# resolves `app` to the app/ package, so app.py is loaded by benchmarks.yolo_lite
+# "ready" is the readiness probe to wait for before the first level
+TARGETS = {
+    "javelink_gold:app": {
+        "path": "/api/analyze", "payload": "video", "form": {"view": "side", "handedness": "right"}, "ready": "/ready"
+    },
+    "javelink_cv:app": {
+        "path": "/api/analyze", "payload": "video", "form": {"view": "side", "handedness": "right"}, "ready": "/ready"
+    },
+    "javelink_power:app": {"path": "/api/analyze", "payload": "video", "form": {"view": "side", "handedness": "right"}},
+    "app.main:app": {
+        "path": "/api/analyze", "payload": "video", "form": {"view": "side", "handedness": "right"}, "ready": "/api/ready"
+    },
+    "app:app": {
+        "path": "/analyze", "payload": "image", "form": {}, "ready": "/ready", "uvicorn": "benchmarks.yolo_lite:app"
+    },
+}
+
+def _rss_mb(pid: int) -> Optional[float]:
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+class RSSSampler(threading.Thread):
+    """Samples a process's RSS at a fixed interval"""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[List[float]] = []
+        self.start_time = time.perf_counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            rss = _rss_mb(self.pid)
+            if rss is not None:
+                self.samples.append([round(time.perf_counter() - self.start_time, 3), round(rss, 1)])
+            self._stop_event.wait(self.interval)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start_time
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+def build_payloads(sizes: List[str], kind: str, workdir: str) -> Dict[str, bytes]:
+    payloads = {}
+    for name in sizes:
+        clip = CLIP_SIZES[name]
+        if kind == "image":
+            payloads[name] = cv2.imencode(".jpg", render_still(clip))[1].tobytes()
+        else:
+            path, _ = write_throw_video(str(Path(workdir) / f"{name}.mp4"), clip)
+            payloads[name] = Path(path).read_bytes()
+    return payloads
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(target: str, port: int, ready: str = "/openapi.json", timeout: float = 120.0) -> subprocess.Popen:
+    """
+    Start target and wait until `ready` answers 200
+
+    Boot-time autotuning is off (as in benchmarks.startup), and waiting for
+    the readiness probe lets the warm-up finish, so the first level
+    measures serving rather than startup.
+    """
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=str(REPO_DIR), env=bench_env()
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}{ready}", timeout=1.0).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{target} was not ready within {timeout:.0f}s")
+
+def _percentiles(latencies: List[float]) -> Dict[str, Optional[float]]:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+    }
+
+async def run_level(
+    url: str,
+    spec: dict,
+    payloads: Dict[str, bytes],
+    schedule: List[str],
+    concurrency: int,
+    timeout: float
+) -> dict:
+    """Send every request in schedule, with at most `concurrency` in flight"""
+    queue = list(reversed(schedule))
+    records = []
+
+    async def worker(client: httpx.AsyncClient):
+        while queue:
+            name = queue.pop()
+            filename = f"{name}.jpg" if spec["payload"] == "image" else f"{name}.mp4"
+            media_type = "image/jpeg" if spec["payload"] == "image" else "video/mp4"
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    url + spec["path"],
+                    files={"file": (filename, payloads[name], media_type)},
+                    data=spec["form"]
+                )
+                ok = response.status_code < 400
+                status = response.status_code
+            except httpx.HTTPError as e:
+                ok, status = False, type(e).__name__
+            records.append({"clip": name, "latency": time.perf_counter() - start, "ok": ok, "status": status})
+
+    start = time.perf_counter()
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [r["latency"] for r in records if r["ok"]]
+    errors = [r for r in records if not r["ok"]]
+    by_clip = {}
+    for name in payloads:
+        clip_latencies = [r["latency"] for r in records if r["ok"] and r["clip"] == name]
+        by_clip[name] = dict(requests=sum(r["clip"] == name for r in records), **_percentiles(clip_latencies))
+
+    statuses: Dict[str, int] = {}
+    for r in errors:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+
+    return dict(
+        concurrency=concurrency,
+        requests=len(records),
+        errors=len(errors),
+        error_rate=round(len(errors) / max(1, len(records)), 4),
+        error_statuses=statuses,
+        duration_s=round(elapsed, 3),
+        throughput_rps=round(len(latencies) / elapsed, 3) if elapsed > 0 else None,
+        **_percentiles(latencies),
+        clips=by_clip
+    )
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.strip().partition(":")
+        if name not in CLIP_SIZES:
+            raise ValueError(f"unknown clip size: {name} (choose from {', '.join(CLIP_SIZES)})")
+        mix[name] = int(weight or 1)
+    return mix
+
+def run(
+    target: str,
+    mix: Dict[str, int],
+    levels: List[int],
+    requests: int,
+    url: Optional[str] = None,
+    timeout: float = 300.0,
+    seed: int = 0
+) -> dict:
+    spec = TARGETS.get(target, TARGETS["app.main:app"])
+    rng = random.Random(seed)
+
+    proc = None
+    if url is None:
+        port = _free_port()
+        proc = start_server(spec.get("uvicorn", target), port, spec.get("ready", "/openapi.json"))
+        url = f"http://127.0.0.1:{port}"
+
+    sampler = RSSSampler(proc.pid) if proc else None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            payloads = build_payloads(list(mix), spec["payload"], tmp)
+        if sampler:
+            sampler.start()
+
+        results = []
+        for level in levels:
+            schedule = rng.choices(list(mix), weights=list(mix.values()), k=requests)
+            started = sampler.elapsed() if sampler else None
+            result = asyncio.run(run_level(url, spec, payloads, schedule, level, timeout))
+            if sampler:
+                result["window_s"] = [round(started, 3), round(sampler.elapsed(), 3)]
+            results.append(result)
+            logger.info(
+                f"c={level}: {result['throughput_rps']} req/s, p95 {result['p95_ms']} ms, "
+                f"errors {result['error_rate']:.1%}"
+            )
+    finally:
+        if sampler:
+            sampler.stop()
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    samples = sampler.samples if sampler else []
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "target": target,
+        "url": url,
+        "endpoint": spec["path"],
+        "payload": spec["payload"],
+        "mix": mix,
+        "payload_bytes": {name: len(data) for name, data in payloads.items()},
+        "requests_per_level": requests,
+        "levels": results,
+        "rss_mb": {
+            "peak": max((s[1] for s in samples), default=None),
+            "samples": samples,
+        },
+    }
+
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Load test: {{ r.target }}</title>
+<style>
+body { font-family: sans-serif; margin: 2em; color: #222; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #ccc; padding: 4px 10px; text-align: right; }
+th { background: #f3f3f3; }
+.error { color: #b00020; }
+svg { border: 1px solid #ccc; background: #fafafa; }
+</style>
+</head>
+<body>
+<h1>{{ r.target }} {{ r.endpoint }}</h1>
+<p>{{ r.timestamp }} &middot; {{ r.requests_per_level }} requests per level &middot;
+mix {% for name, w in r.mix.items() %}{{ name }}&times;{{ w }} ({{ (r.payload_bytes[name] / 1024)|round(1) }} KB){{ ", " if not loop.last }}{% endfor %}</p>
+<table>
+<tr><th>concurrency</th><th>req/s</th><th>p50 ms</th><th>p95 ms</th><th>p99 ms</th><th>max ms</th><th>errors</th></tr>
+{% for l in r.levels %}
+<tr><td>{{ l.concurrency }}</td><td>{{ l.throughput_rps }}</td><td>{{ l.p50_ms }}</td><td>{{ l.p95_ms }}</td><td>{{ l.p99_ms }}</td><td>{{ l.max_ms }}</td>
+<td{% if l.errors %} class="error"{% endif %}>{{ l.errors }} ({{ (l.error_rate * 100)|round(1) }}%)</td></tr>
+{% endfor %}
+</table>
+{% if r.rss_mb.samples %}
+<h2>Server RSS (peak {{ r.rss_mb.peak }} MB)</h2>
+<svg width="{{ chart.width }}" height="{{ chart.height }}">
+{% for l in r.levels if l.window_s %}
+<rect x="{{ chart.x(l.window_s[0]) }}" y="0" width="{{ chart.x(l.window_s[1]) - chart.x(l.window_s[0]) }}" height="{{ chart.height }}" fill="{{ loop.cycle('#eef3ff', '#fff4e5') }}"/>
+<text x="{{ chart.x(l.window_s[0]) + 4 }}" y="14" font-size="11">c={{ l.concurrency }}</text>
+{% endfor %}
+<polyline fill="none" stroke="#3366cc" stroke-width="2" points="{% for t, mb in r.rss_mb.samples %}{{ chart.x(t) }},{{ chart.y(mb) }} {% endfor %}"/>
+<text x="4" y="{{ chart.height - 4 }}" font-size="11">{{ chart.low }} MB</text>
+<text x="4" y="28" font-size="11">{{ chart.high }} MB</text>
+</svg>
+{% endif %}
+</body>
+</html>
+"""
+
+class _Chart:
+    def __init__(self, samples: List[List[float]], width: int = 800, height: int = 240):
+        self.width = width
+        self.height = height
+        self.t_max = max((s[0] for s in samples), default=1.0) or 1.0
+        self.low = min((s[1] for s in samples), default=0.0)
+        self.high = max((s[1] for s in samples), default=1.0)
+
+    def x(self, t: float) -> int:
+        return round(t / self.t_max * self.width)
+
+    def y(self, mb: float) -> int:
+        span = (self.high - self.low) or 1.0
+        return round(self.height - 20 - (mb - self.low) / span * (self.height - 40))
+
+def render_html(report: dict) -> str:
+    env = Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+    return env.from_string(REPORT_TEMPLATE).render(r=report, chart=_Chart(report["rss_mb"]["samples"]))
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test an app variant")
+    parser.add_argument("target", help="uvicorn app, e.g. " + ", ".join(TARGETS))
+    parser.add_argument("--url", help="test an already running server instead (no RSS)")
+    parser.add_argument("--mix", default="small:3,medium:1", help="clip sizes and weights, e.g. small:3,large:1")
+    parser.add_argument("--concurrency", default="1,4", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=20, help="requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--html", help="write an HTML report to this file")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    report = run(args.target, mix, levels, args.requests, url=args.url, timeout=args.timeout, seed=args.seed)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if args.html:
+        Path(args.html).write_text(render_html(report), encoding="utf-8")
+    print(text if not args.output else json.dumps({k: v for k, v in report.items() if k != "rss_mb"}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Serialisation benchmark for AnalyzeResponse
+
+Compares FastAPI's default encoding path with the fast and compact
+encoders in app.responses, reporting time per response and payload size.
+
+    python -m benchmarks.serialization --iterations 20000
+"""
+import argparse
+import gzip
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.models.schemas import (
+    AnalyzeResponse, MetaInfo, EventFrames, Metrics, QualityControl, QCStatus
+)
+from app.responses import dump_json, ORJSON_AVAILABLE
+
+def sample_response() -> AnalyzeResponse:
+    """A full side-view result, with floats as the pipeline produces them"""
+    return AnalyzeResponse(
+        meta=MetaInfo(
+            fps=29.97002997002997,
+            frames=187,
+            view="side",
+            handedness="right",
+            scale_method="marker",
+            m_per_px=0.0041327913279132791,
+            video_hash="9f2c" * 16
+        ),
+        events=EventFrames(penultimate_frame=121, plant_frame=134, release_frame=142),
+        metrics=Metrics(
+            release_angle_deg=34.78125439071655,
+            release_height_m=2.0531234741210938,
+            release_height_ratio=1.1732134137834821,
+            release_speed_mps=27.49816131591797,
+            plant_to_release_ms=266.93333333333334,
+            shoulder_hip_separation_deg=44.91201400756836
+        ),
+        qc=QualityControl(
+            pose_confidence=0.8735104203224182,
+            overall_status=QCStatus.GOOD.value,
+            notes=["Scale from calibration profile stadium/cam1"]
+        ),
+        annotated_video_path="/api/outputs/0123456789abcdef0123456789abcdef_annotated.mp4",
+        keyframes_path="/api/keyframes/" + "9f2c" * 16 + "-" + "4e1a" * 4
+    )
+
+def _fastapi_default(response: AnalyzeResponse) -> bytes:
+    # What a route returning the model goes through without app.responses
+    return JSONResponse(jsonable_encoder(response)).body
+
+ENCODERS = {
+    "fastapi_default": _fastapi_default,
+    "pydantic_json": lambda r: r.model_dump_json().encode("utf-8"),
+    "fast": lambda r: dump_json(r),
+    "fast_compact": lambda r: dump_json(r, compact=True),
+}
+
+def run(iterations: int) -> dict:
+    response = sample_response()
+    results = {}
+    for name, encode in ENCODERS.items():
+        payload = encode(response)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            encode(response)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "us_per_response": round(elapsed / iterations * 1e6, 2),
+            "bytes": len(payload),
+            "gzip_bytes": len(gzip.compress(payload)),
+        }
+    return {"iterations": iterations, "orjson": ORJSON_AVAILABLE, "encoders": results}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.iterations), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    print(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Per-stage pipeline benchmarks on a synthetic throw video
+
+Each stage is timed over --repeat runs; the report is JSON so runs can be
+diffed or collected over time.
+
+    python -m benchmarks.stages --width 1280 --height 720 --repeat 5 --output bench.json
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import cv2
+
+from app.models.schemas import ViewType, ScaleMethod
+from app.services.annotate import render_annotated_video
+from app.services.detectors import PoseDetector, POSE_TIERS
+from app.services.encoder import is_output_pending
+from app.services.events import detect_events
+from app.services.metrics import calculate_side_metrics
+from app.services.scaling import calculate_scale
+from app.services.video import probe_video, iter_frames
+from app.config import OUTPUT_DIR, DEFAULT_POSE_TIER
+from app.monitoring import rss_bytes, peak_rss_bytes
+
+from benchmarks.synthetic import ThrowClip, write_throw_video
+
+STAGES = ("probe", "decode", "pose", "detect_events", "metrics", "scaling", "annotate", "analyze")
+
+def measure(fn: Callable[[], object], repeat: int, trace_memory: bool = True) -> Dict[str, float]:
+    """
+    Time fn over repeat runs
+
+    Memory comes from one extra, untimed run under tracemalloc (which
+    would otherwise skew the timings): peak Python allocations above the
+    starting point, plus process RSS and its high-water mark afterwards.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    result = {
+        "runs": repeat,
+        "min_s": round(min(times), 6),
+        "median_s": round(statistics.median(times), 6),
+        "mean_s": round(statistics.mean(times), 6),
+    }
+
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            fn()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result["py_alloc_mb"] = round(current / 2**20, 3)
+        result["py_peak_mb"] = round(peak / 2**20, 3)
+
+    rss, peak_rss = rss_bytes(), peak_rss_bytes()
+    result["rss_mb"] = round(rss / 2**20, 1) if rss is not None else None
+    result["peak_rss_mb"] = round(peak_rss / 2**20, 1) if peak_rss is not None else None
+    return result
+
+def _analyze_request(video_path: str) -> Callable[[], None]:
+    # Imported here so stage-only runs don't build the app
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    content = Path(video_path).read_bytes()
+
+    def run():
+        response = client.post(
+            "/api/analyze",
+            files={"file": ("throw.mp4", content, "video/mp4")},
+            data={"view": "side", "handedness": "right"}
+        )
+        response.raise_for_status()
+        # Include the background render, then drop its output
+        name = Path(response.json().get("annotated_video_path") or "").name
+        if name:
+            output = OUTPUT_DIR / name
+            while is_output_pending(str(output)):
+                time.sleep(0.005)
+            output.unlink(missing_ok=True)
+
+    return run
+
+def run(
+    clip: ThrowClip,
+    repeat: int,
+    stages=STAGES,
+    trace_memory: bool = True,
+    tier: str = DEFAULT_POSE_TIER
+) -> dict:
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    view = ViewType.SIDE
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path, keypoints = write_throw_video(str(Path(tmp) / "throw.mp4"), clip)
+        fps = clip.fps
+        frames = list(iter_frames(video_path))
+        events = detect_events(keypoints, fps, view)
+        m_per_px, _, _ = calculate_scale(iter_frames(video_path), keypoints, ScaleMethod.MARKER, view)
+        metrics = calculate_side_metrics(keypoints, events, fps, m_per_px)
+        detector = PoseDetector(tier)
+
+        benches = {
+            "probe": lambda: probe_video(video_path),
+            "decode": lambda: sum(1 for _ in iter_frames(video_path)),
+            "pose": lambda: [detector.detect(frame) for frame in frames],
+            "detect_events": lambda: detect_events(keypoints, fps, view),
+            "metrics": lambda: calculate_side_metrics(keypoints, events, fps, m_per_px),
+            "scaling": lambda: calculate_scale(iter_frames(video_path), keypoints, ScaleMethod.MARKER, view),
+            "annotate": lambda: render_annotated_video(
+                video_path, keypoints, events, metrics, str(Path(tmp) / "annotated.mp4"), fps, view
+            ),
+        }
+        if "analyze" in stages:
+            benches["analyze"] = _analyze_request(video_path)
+
+        results = {}
+        for name in stages:
+            result = measure(benches[name], repeat, trace_memory)
+            if name in ("decode", "pose", "annotate", "analyze"):
+                result["per_frame_ms"] = round(result["median_s"] / clip.frames * 1000, 4)
+            results[name] = result
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "opencv": cv2.__version__,
+        "clip": dict(asdict(clip), frames=clip.frames),
+        "pose_tier": tier,
+        "events": asdict(events),
+        "stages": results,
+    }
+
+def stage_list(value: str) -> List[str]:
+    """--stages: comma-separated names from STAGES"""
+    stages = [s.strip() for s in value.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown or not stages:
+        raise argparse.ArgumentTypeError(
+            f"unknown stages: {', '.join(sorted(unknown)) or '(none given)'} (choose from {', '.join(STAGES)})"
+        )
+    return stages
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on a synthetic clip")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--stages", type=stage_list, default=list(STAGES), help="comma-separated subset of " + ",".join(STAGES)
+    )
+    parser.add_argument("--tier", default=DEFAULT_POSE_TIER, choices=list(POSE_TIERS), help="pose model tier")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run per stage")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    clip = ThrowClip(
+        width=args.width, height=args.height, fps=args.fps,
+        duration=args.duration, noise=args.noise
+    )
+    report = json.dumps(run(clip, args.repeat, args.stages, trace_memory=not args.no_memory, tier=args.tier), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    print(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Import-time and startup-time report per entry point
+
+Each entry point is imported in a fresh interpreter under -X importtime;
+self time is summed per subsystem (top-level package, or app.<module>
+for our own code) and the slowest modules are listed by cumulative time.
+With --serve the entry point is also started under uvicorn and the time
+to the first /live and /ready answers is measured.
+
+    python -m benchmarks.startup --serve --output startup.json
+    python -m benchmarks.startup --targets app.main --budget-ms 750
+
+Exits non-zero when an import exceeds the budget, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.config import STARTUP_IMPORT_BUDGET_MS
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# module to import -> (uvicorn app path, probe prefix)
+TARGETS = {
+    "app.main": ("app.main:app", "/api"),
+    "javelink_gold": ("javelink_gold:app", ""),
+    "javelink_cv": ("javelink_cv:app", ""),
+}
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def bench_env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    # Skip boot-time autotuning so the serve timings measure startup itself
+    env.setdefault("JAVELINK_AUTOTUNE", "0")
+    return env
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self us, cumulative us, depth) per line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            rows.append((module, int(own), int(cumulative), len(indent) // 2))
+    return rows
+
+def subsystem(module: str) -> str:
+    parts = module.split(".")
+    if parts[0] == "app" and len(parts) > 1:
+        # app.services.x -> app.services.x, app.routers.x -> app.routers.x
+        return ".".join(parts[:3] if parts[1] in ("services", "routers", "models") else parts[:2])
+    return parts[0]
+
+def import_profile(target: str) -> dict:
+    """Import target once in a fresh interpreter"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, env=bench_env(), capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    total = next((cumulative for module, _, cumulative, _ in rows if module == target), 0)
+    by_subsystem: Dict[str, int] = defaultdict(int)
+    for module, own, _, _ in rows:
+        by_subsystem[subsystem(module)] += own
+    return {
+        "import_ms": total / 1000,
+        "process_ms": wall * 1000,
+        "modules": len(rows),
+        "subsystems": by_subsystem,
+        "rows": rows,
+    }
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for(url: str, start: float, timeout: float, proc: subprocess.Popen) -> Optional[float]:
+    """Seconds from start until url answers 200, or None"""
+    while time.perf_counter() - start < timeout and proc.poll() is None:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    return None
+
+def serve_profile(target: str, timeout: float) -> dict:
+    """Start target under uvicorn and time its probes"""
+    app_path, prefix = TARGETS[target]
+    port = free_port()
+    base = f"http://127.0.0.1:{port}{prefix}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_path, "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=bench_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        live = wait_for(f"{base}/live", start, timeout, proc)
+        ready = wait_for(f"{base}/ready", start, timeout, proc) if live is not None else None
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return {
+        "live_s": round(live, 3) if live is not None else None,
+        "ready_s": round(ready, 3) if ready is not None else None,
+    }
+
+def run(targets: List[str], repeat: int, top: int, serve: bool, timeout: float) -> dict:
+    results = {}
+    for target in targets:
+        runs = [import_profile(target) for _ in range(repeat)]
+        # The median run by total; its breakdown stands for the target
+        runs.sort(key=lambda r: r["import_ms"])
+        median = runs[len(runs) // 2]
+        slowest = sorted(median["rows"], key=lambda row: row[2], reverse=True)
+        results[target] = {
+            "import_ms": round(statistics.median(r["import_ms"] for r in runs), 1),
+            "process_ms": round(statistics.median(r["process_ms"] for r in runs), 1),
+            "modules": median["modules"],
+            "subsystems_ms": {
+                name: round(us / 1000, 1)
+                for name, us in sorted(median["subsystems"].items(), key=lambda item: item[1], reverse=True)[:top]
+            },
+            "slowest_modules_ms": {
+                module: round(cumulative / 1000, 1) for module, _, cumulative, _ in slowest[:top]
+            },
+        }
+        if serve and target in TARGETS:
+            results[target]["serve"] = serve_profile(target, timeout)
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "targets": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import and startup time per entry point")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="comma-separated modules to import")
+    parser.add_argument("--repeat", type=int, default=3, help="imports per target; the median is reported")
+    parser.add_argument("--top", type=int, default=15, help="slowest subsystems and modules to list")
+    parser.add_argument("--serve", action="store_true", help="also time /live and /ready under uvicorn")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for /ready")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_IMPORT_BUDGET_MS, help="import time budget")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    report = run(targets, max(1, args.repeat), args.top, args.serve, args.timeout)
+    over = {
+        target: result["import_ms"] for target, result in report["targets"].items()
+        if result["import_ms"] > args.budget_ms
+    }
+    report["budget_ms"] = args.budget_ms
+    report["over_budget"] = over
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    if over:
+        print(
+            "Over the import budget: " + ", ".join(f"{t} {ms:.0f}ms" for t, ms in over.items()),
+            file=sys.stderr
+        )
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
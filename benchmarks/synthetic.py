@@ -0,0 +1,241 @@
+"""
+Deterministic synthetic javelin-throw videos
+
+A side-view stick figure runs in from the left, plants, and releases a
+javelin that then flies on a ballistic path. The same keypoints used to
+draw the figure are returned, so event and metric stages can be fed
+ground truth without a pose model.
+
+    python -m benchmarks.synthetic throw.mp4 --width 1280 --height 720 --fps 60
+"""
+import argparse
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.services.annotate import SKELETON_EDGES
+from app.services.detectors import PoseDetector as P
+from app.config import MARKER_SIZE_M, DEFAULT_PERSON_HEIGHT
+
+# Phase of the throw, as a fraction of the clip
+PLANT_AT = 0.7
+RELEASE_AT = 0.78
+
+JAVELIN_LENGTH_M = 2.6
+GRAVITY = 9.81
+
+@dataclass
+class ThrowClip:
+    """Parameters of a synthetic clip"""
+    width: int = 1280
+    height: int = 720
+    fps: float = 30.0
+    duration: float = 3.0
+    markers: bool = True
+    noise: float = 0.0  # std-dev of per-pixel Gaussian noise
+    seed: int = 0
+
+    @property
+    def frames(self) -> int:
+        return max(1, int(round(self.fps * self.duration)))
+
+    @property
+    def body_px(self) -> float:
+        return self.height * 0.5
+
+    @property
+    def ground_y(self) -> float:
+        return self.height * 0.88
+
+    @property
+    def px_per_m(self) -> float:
+        return self.body_px / DEFAULT_PERSON_HEIGHT
+
+def throw_keypoints(clip: ThrowClip) -> np.ndarray:
+    """
+    COCO keypoints of the figure in every frame
+
+    Returns:
+        (T, 17, 2) pixel coordinates
+    """
+    T = clip.frames
+    H = clip.body_px
+    w = clip.width
+    ground = clip.ground_y
+    kp = np.zeros((T, 17, 2))
+
+    for i in range(T):
+        t = i / max(1, T - 1)
+
+        # Approach run, then a short slide after the plant
+        run = min(t, PLANT_AT) / PLANT_AT
+        hip_x = w * (0.15 + 0.5 * run) + w * 0.05 * max(0.0, t - PLANT_AT) / (1 - PLANT_AT)
+        stride = 2 * np.pi * 4 * min(t, PLANT_AT)
+        hip_y = ground - 0.5 * H - (0.02 * H * abs(np.sin(stride)) if t < PLANT_AT else 0.0)
+        hip = np.array([hip_x, hip_y])
+
+        shoulder = hip + [-0.03 * H, -0.3 * H]
+        nose = shoulder + [0.03 * H, -0.15 * H]
+
+        if t < PLANT_AT:
+            l_ankle = [hip_x + 0.15 * H * np.sin(stride), ground - 0.06 * H * max(0.0, np.cos(stride))]
+            r_ankle = [hip_x - 0.15 * H * np.sin(stride), ground - 0.06 * H * max(0.0, -np.cos(stride))]
+        else:
+            # Block with the front leg, drag the rear foot through
+            l_ankle = [hip_x + 0.2 * H, ground]
+            drag = (t - PLANT_AT) / (1 - PLANT_AT)
+            r_ankle = [hip_x - 0.2 * H + 0.3 * H * drag, ground - 0.04 * H * np.sin(np.pi * drag)]
+
+        # Throwing arm: withdrawn during the run, whipped forward and up
+        # between plant and release, then following through
+        back = np.array([-0.4 * H, 0.02 * H])
+        high = np.array([0.25 * H, -0.3 * H])
+        follow = np.array([0.3 * H, 0.2 * H])
+        if t < PLANT_AT:
+            r_wrist = shoulder + back
+        elif t < RELEASE_AT:
+            s = (t - PLANT_AT) / (RELEASE_AT - PLANT_AT)
+            r_wrist = shoulder + back + (high - back) * s * s
+        else:
+            s = min(1.0, (t - RELEASE_AT) / 0.1)
+            r_wrist = shoulder + high + (follow - high) * s
+        l_wrist = shoulder + [0.2 * H, 0.05 * H + 0.03 * H * np.sin(stride)]
+
+        points = kp[i]
+        points[P.NOSE] = nose
+        points[P.LEFT_EYE] = nose + [-0.01 * H, -0.01 * H]
+        points[P.RIGHT_EYE] = nose + [0.01 * H, -0.01 * H]
+        points[P.LEFT_EAR] = nose + [-0.03 * H, 0.0]
+        points[P.RIGHT_EAR] = nose + [0.03 * H, 0.0]
+        points[P.LEFT_SHOULDER] = shoulder + [-0.05 * H, 0.0]
+        points[P.RIGHT_SHOULDER] = shoulder + [0.05 * H, 0.0]
+        points[P.LEFT_WRIST] = l_wrist
+        points[P.RIGHT_WRIST] = r_wrist
+        points[P.LEFT_ELBOW] = (points[P.LEFT_SHOULDER] + l_wrist) / 2 + [0.0, 0.05 * H]
+        points[P.RIGHT_ELBOW] = (points[P.RIGHT_SHOULDER] + r_wrist) / 2 + [0.0, 0.05 * H]
+        points[P.LEFT_HIP] = hip + [-0.04 * H, 0.0]
+        points[P.RIGHT_HIP] = hip + [0.04 * H, 0.0]
+        points[P.LEFT_ANKLE] = l_ankle
+        points[P.RIGHT_ANKLE] = r_ankle
+        points[P.LEFT_KNEE] = (points[P.LEFT_HIP] + points[P.LEFT_ANKLE]) / 2 + [0.05 * H, 0.0]
+        points[P.RIGHT_KNEE] = (points[P.RIGHT_HIP] + points[P.RIGHT_ANKLE]) / 2 + [0.05 * H, 0.0]
+
+    return kp
+
+def javelin_segments(clip: ThrowClip, keypoints: np.ndarray) -> np.ndarray:
+    """
+    Javelin end points per frame
+
+    Held at the throwing wrist at a fixed attitude until release, then
+    launched with the wrist's velocity under gravity.
+
+    Returns:
+        (T, 2, 2) tail and tip
+    """
+    T = len(keypoints)
+    length = JAVELIN_LENGTH_M * clip.px_per_m
+    release = min(T - 1, int(round(RELEASE_AT * (T - 1))))
+    wrist = keypoints[:, P.RIGHT_WRIST]
+    velocity = wrist[release] - wrist[max(0, release - 1)]
+    gravity = GRAVITY * clip.px_per_m / clip.fps ** 2
+
+    segments = np.zeros((T, 2, 2))
+    for i in range(T):
+        if i <= release:
+            center = wrist[i]
+            angle = np.radians(35.0)
+        else:
+            n = i - release
+            center = wrist[release] + velocity * n + [0.0, 0.5 * gravity * n * n]
+            vy = velocity[1] + gravity * n
+            angle = np.arctan2(-vy, max(velocity[0], 1e-6))
+        half = 0.5 * length * np.array([np.cos(angle), -np.sin(angle)])
+        segments[i] = [center - half, center + half]
+    return segments
+
+def _background(clip: ThrowClip) -> np.ndarray:
+    image = np.full((clip.height, clip.width, 3), 90, dtype=np.uint8)
+    ground = int(clip.ground_y)
+    image[ground:] = (60, 110, 60)
+    if clip.markers:
+        # Two red markers MARKER_SIZE_M apart on the ground line
+        size = max(4, int(clip.height * 0.015))
+        x0 = int(clip.width * 0.05)
+        x1 = x0 + int(round(MARKER_SIZE_M * clip.px_per_m))
+        for x in (x0, x1):
+            cv2.rectangle(image, (x - size, ground - size), (x + size, ground + size), (0, 0, 230), -1)
+    return image
+
+def render_frame(
+    background: np.ndarray,
+    keypoints: np.ndarray,
+    javelin: np.ndarray,
+    thickness: int = 3
+) -> np.ndarray:
+    frame = background.copy()
+    points = np.round(keypoints).astype(np.int32)
+    cv2.polylines(frame, list(points[SKELETON_EDGES]), False, (235, 235, 235), thickness, cv2.LINE_AA)
+    cv2.circle(frame, tuple(points[P.NOSE]), thickness * 4, (235, 235, 235), -1, cv2.LINE_AA)
+    tail, tip = np.round(javelin).astype(np.int32)
+    cv2.line(frame, tuple(tail), tuple(tip), (40, 200, 230), max(1, thickness - 1), cv2.LINE_AA)
+    return frame
+
+def render_still(clip: ThrowClip, index: Optional[int] = None) -> np.ndarray:
+    """One frame of the clip (the middle one by default), without noise"""
+    keypoints = throw_keypoints(clip)
+    if index is None:
+        index = len(keypoints) // 2
+    javelin = javelin_segments(clip, keypoints)
+    return render_frame(_background(clip), keypoints[index], javelin[index], max(2, clip.height // 240))
+
+def write_throw_video(output_path: str, clip: ThrowClip) -> Tuple[str, np.ndarray]:
+    """
+    Render a clip to disk (mp4v, so no ffmpeg is needed)
+
+    Returns:
+        output_path: the file written
+        keypoints: (T, 17, 2) ground-truth keypoints
+    """
+    keypoints = throw_keypoints(clip)
+    javelin = javelin_segments(clip, keypoints)
+    background = _background(clip)
+    thickness = max(2, clip.height // 240)
+    rng = np.random.default_rng(clip.seed)
+
+    writer = cv2.VideoWriter(
+        str(output_path), cv2.VideoWriter_fourcc(*'mp4v'), clip.fps, (clip.width, clip.height)
+    )
+    try:
+        for i in range(clip.frames):
+            frame = render_frame(background, keypoints[i], javelin[i], thickness)
+            if clip.noise > 0:
+                noise = rng.normal(0.0, clip.noise, frame.shape)
+                frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return str(output_path), keypoints
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a synthetic javelin-throw video")
+    parser.add_argument("output")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-markers", action="store_true")
+    args = parser.parse_args()
+
+    clip = ThrowClip(
+        width=args.width, height=args.height, fps=args.fps, duration=args.duration,
+        markers=not args.no_markers, noise=args.noise, seed=args.seed
+    )
+    path, _ = write_throw_video(args.output, clip)
+    print(f"{path}: {clip.frames} frames, {clip.width}x{clip.height} @ {clip.fps:g} fps")
+
+if __name__ == "__main__":
+    main()
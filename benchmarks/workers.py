@@ -0,0 +1,169 @@
+"""
+Memory of preforked workers against independent ones
+
+Starts app.server with --workers N, then N independent uvicorn processes,
+waits until every worker answers /api/ready, optionally sends each setup
+some analyses, and sums RSS, PSS and USS over its processes (the
+preforking parent included). PSS splits shared pages between the
+processes that share them, so the PSS total is the real footprint; the
+RSS total counts every shared page once per process.
+
+    python -m benchmarks.workers --workers 4 --analyses 8 --output workers.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from app.monitoring import process_memory
+from app.config import SERVER_WORKERS
+
+from benchmarks.startup import ROOT, bench_env, free_port, wait_for
+from benchmarks.synthetic import ThrowClip, write_throw_video
+
+def children(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+def memory(pids: List[int]) -> dict:
+    processes = []
+    for pid in pids:
+        usage = process_memory(pid)
+        if usage is not None:
+            processes.append(dict({k: round(v / 2**20, 1) for k, v in usage.items()}, pid=pid))
+    total = {
+        f"{key}_mb": round(sum(p[key] for p in processes), 1) for key in ("rss", "pss", "uss")
+    }
+    return {"processes": processes, "total": total}
+
+def _post_clip(url: str, content: bytes):
+    boundary = uuid.uuid4().hex
+    fields = {"view": "side", "handedness": "right"}
+    body = b"".join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    )
+    body += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="throw.mp4"\r\n'
+        f"Content-Type: video/mp4\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    )
+    with urllib.request.urlopen(request, timeout=300) as response:
+        response.read()
+
+def exercise(urls: List[str], analyses: int, content: bytes):
+    """Spread analyses over the URLs, one in flight per URL"""
+    if analyses <= 0:
+        return
+    with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+        list(pool.map(lambda i: _post_clip(urls[i % len(urls)], content), range(analyses)))
+
+def _stop(procs: List[subprocess.Popen]):
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        try:
+            proc.wait(timeout=40)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def preforked(workers: int, analyses: int, content: bytes, timeout: float, settle: float) -> dict:
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, env=bench_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        start = time.perf_counter()
+        while len(children(proc.pid)) < workers and time.perf_counter() - start < timeout:
+            time.sleep(0.05)
+        ready = wait_for(f"http://127.0.0.1:{port}/api/ready", start, timeout, proc)
+        if ready is None:
+            raise RuntimeError("app.server did not become ready")
+        # Every worker warms up on its own; give the others a moment
+        time.sleep(settle)
+        # One in flight per worker; the kernel spreads them over the workers
+        exercise([f"http://127.0.0.1:{port}/api/analyze"] * workers, analyses, content)
+        result = memory([proc.pid] + children(proc.pid))
+        result["ready_s"] = round(ready, 3)
+        return result
+    finally:
+        _stop([proc])
+
+def independent(workers: int, analyses: int, content: bytes, timeout: float, settle: float) -> dict:
+    ports = [free_port() for _ in range(workers)]
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=ROOT, env=bench_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        for port in ports
+    ]
+    try:
+        start = time.perf_counter()
+        for port, proc in zip(ports, procs):
+            if wait_for(f"http://127.0.0.1:{port}/api/ready", start, timeout, proc) is None:
+                raise RuntimeError(f"uvicorn on port {port} did not become ready")
+        ready = time.perf_counter() - start
+        time.sleep(settle)
+        exercise([f"http://127.0.0.1:{port}/api/analyze" for port in ports], analyses, content)
+        result = memory([proc.pid for proc in procs])
+        result["ready_s"] = round(ready, 3)
+        return result
+    finally:
+        _stop(procs)
+
+def run(workers: int, analyses: int, timeout: float, settle: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = ThrowClip(width=640, height=360, duration=2.0)
+        path, _ = write_throw_video(str(Path(tmp) / "throw.mp4"), clip)
+        content = Path(path).read_bytes()
+
+    shared = preforked(workers, analyses, content, timeout, settle)
+    separate = independent(workers, analyses, content, timeout, settle)
+    saved = separate["total"]["pss_mb"] - shared["total"]["pss_mb"]
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workers": workers,
+        "analyses": analyses,
+        "preforked": shared,
+        "independent": separate,
+        "pss_saved_mb": round(saved, 1),
+        "pss_ratio": round(shared["total"]["pss_mb"] / separate["total"]["pss_mb"], 3)
+        if separate["total"]["pss_mb"] else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory of preforked and independent workers")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--analyses", type=int, default=0, help="analyses to send to each setup before measuring")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for readiness")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait after the first worker is ready")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(run(max(1, args.workers), args.analyses, args.timeout, args.settle), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    print(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+app.py, importable for uvicorn
+
+`uvicorn app:app` resolves `app` to the app/ package, not app.py, so the
+benchmarks load the file under a name of its own (javelink_lite.py is
+a different app):
+
+    uvicorn benchmarks.yolo_lite:app
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+_PATH = Path(__file__).resolve().parent.parent / "app.py"
+_spec = importlib.util.spec_from_file_location("javelink_yolo_lite", _PATH)
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = _module
+_spec.loader.exec_module(_module)
+
+app = _module.app
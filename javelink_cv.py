@@ -1,39 +1,73 @@
-from fastapi import FastAPI, File, UploadFile, Form
+from fastapi import FastAPI, File, UploadFile, Form, Request
 from fastapi.responses import HTMLResponse, JSONResponse
 import uvicorn
-import cv2
-import numpy as np
+import asyncio
 import base64
 import tempfile
 import os
+import math
+import time
+from importlib.util import find_spec
 from typing import Optional
 import json
 
-# YOLOv8のインポート（インストール済みの場合）
-try:
-    from ultralytics import YOLO
-    YOLO_AVAILABLE = True
-except ImportError:
-    YOLO_AVAILABLE = False
+from app.assets import StaticAssets, create_template_env, prerender_page
+from app.monitoring import (
+    timed, mount_metrics, FRAMES_DECODED, FRAMES_INFERRED, MODEL_LOADED, start_memory_tracing,
+    DEBUG_TIMINGS, start_request_timings, current_timings, with_server_timing
+)
+from app.config import TRACEMALLOC_FRAMES
+from app.responses import FastJSONResponse
+from app.routers import debug
+from app.loop_monitor import install_loop_monitor
+from app.readiness import analysis_jobs, model_state, mount_probes, install_warmup
+
+# YOLOv8がインストール済みか（読み込みは起動後）
+YOLO_AVAILABLE = find_spec("ultralytics") is not None
+if not YOLO_AVAILABLE:
     print("⚠️ YOLOv8が見つかりません。デモモードで動作します。")
 
 app = FastAPI(title="Javelink CV - Motion Analysis")
 
-# YOLOv8モデルの初期化（可能な場合）
+# Pages and CSS are built once at startup: the landing page is pre-rendered
+# and pre-compressed, the result template is compiled ahead of requests
+assets = StaticAssets()
+assets.mount(app)
+templates = create_template_env(assets)
+landing_page = prerender_page(templates, "cv/index.html")
+result_template = templates.get_template("cv/result.html")
+mount_metrics(app)
+app.include_router(debug.router)
+install_loop_monitor(app)
+start_memory_tracing(TRACEMALLOC_FRAMES)
+
 pose_model = None
-if YOLO_AVAILABLE:
-    try:
-        # モデルをダウンロード/ロード
-        pose_model = YOLO('yolov8n-pose.pt')  # 最小モデルを使用
-        print("✅ YOLOv8モデルを読み込みました")
-    except Exception as e:
-        print(f"⚠️ モデル読み込みエラー: {e}")
 
+def load_pose_model():
+    """YOLOv8モデルの初期化（可能な場合）"""
+    global pose_model
+    if YOLO_AVAILABLE:
+        try:
+            from app.services.model_registry import load_yolo
+            # MODEL_DIR からロード（ネットワークには出ない）
+            pose_model = load_yolo('yolov8n-pose.pt')  # 最小モデルを使用
+            print("✅ YOLOv8モデルを読み込みました")
+        except Exception as e:
+            print(f"⚠️ モデル読み込みエラー: {e}")
+    MODEL_LOADED.set(pose_model is not None)
+
+# ultralytics/torch の読み込みは重いので起動後にバックグラウンドで行い、
+# 完了するまで /ready は503（デモモードでもそのまま ready になる）
+install_warmup(app, load_pose_model)
+mount_probes(app, lambda: model_state.ready)
+
+@timed("process_video_frame")
 def process_video_frame(frame):
     """動画フレームを処理して姿勢を検出"""
     if pose_model and YOLO_AVAILABLE:
         # YOLOv8で姿勢検出
         results = pose_model(frame, verbose=False)
+        FRAMES_INFERRED.inc()
         if results and len(results) > 0:
             keypoints = results[0].keypoints
             if keypoints is not None and keypoints.data.shape[0] > 0:
@@ -50,12 +84,16 @@ def calculate_release_angle(keypoints):
         elbow = keypoints[7][:2]  # 右肘
         
         if wrist[0] > 0 and elbow[0] > 0:  # 有効な検出
-            angle = np.arctan2(elbow[1] - wrist[1], elbow[0] - wrist[0])
-            return np.degrees(angle)
+            angle = math.atan2(elbow[1] - wrist[1], elbow[0] - wrist[0])
+            return math.degrees(angle)
     return 35.0  # デフォルト値
 
+@timed("analyze_video_file")
 def analyze_video_file(video_path):
     """動画ファイルを分析"""
+    import cv2
+    import numpy as np
+
     cap = cv2.VideoCapture(video_path)
     
     if not cap.isOpened():
@@ -72,14 +110,19 @@ def analyze_video_file(video_path):
     keypoints_list = []
     
     # 10フレームごとに処理
+    timings = current_timings()
     for i in range(0, frame_count, 10):
-        cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-        ret, frame = cap.read()
+        with timings.measure("decode"):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, i)
+            ret, frame = cap.read()
         if not ret:
             break
+        FRAMES_DECODED.inc()
             
         # 姿勢検出
+        start = time.perf_counter()
         kpts = process_video_frame(frame)
+        timings.add_frame(time.perf_counter() - start)
         if kpts is not None:
             keypoints_list.append(kpts)
         
@@ -94,11 +137,12 @@ def analyze_video_file(video_path):
     
     # 分析結果を計算
     release_angle = 35.0
-    if keypoints_list:
-        angles = [calculate_release_angle(kp) for kp in keypoints_list]
-        valid_angles = [a for a in angles if a is not None]
-        if valid_angles:
-            release_angle = np.mean(valid_angles)
+    with timings.measure("metrics"):
+        if keypoints_list:
+            angles = [calculate_release_angle(kp) for kp in keypoints_list]
+            valid_angles = [a for a in angles if a is not None]
+            if valid_angles:
+                release_angle = np.mean(valid_angles)
     
     return {
         "fps": fps,
@@ -109,254 +153,36 @@ def analyze_video_file(video_path):
     }
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
-    return '''
-    <html>
-    <head>
-        <title>Javelink - やり投げ動作分析システム</title>
-        <style>
-            @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+JP:wght@400;700&family=Montserrat:wght@600&display=swap');
-            
-            * { margin: 0; padding: 0; box-sizing: border-box; }
-            
-            body {
-                font-family: 'Noto Sans JP', sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-                padding: 20px;
-            }
-            
-            .container {
-                max-width: 800px;
-                margin: 0 auto;
-                background: rgba(255, 255, 255, 0.95);
-                border-radius: 20px;
-                padding: 40px;
-                box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-            }
-            
-            h1 {
-                font-family: 'Montserrat', sans-serif;
-                color: #333;
-                text-align: center;
-                margin-bottom: 10px;
-                font-size: 32px;
-            }
-            
-            .subtitle {
-                text-align: center;
-                color: #666;
-                margin-bottom: 30px;
-                font-size: 14px;
-            }
-            
-            .feature-badges {
-                display: flex;
-                justify-content: center;
-                gap: 15px;
-                margin-bottom: 30px;
-            }
-            
-            .badge {
-                background: linear-gradient(135deg, #667eea, #764ba2);
-                color: white;
-                padding: 5px 15px;
-                border-radius: 20px;
-                font-size: 12px;
-            }
-            
-            form {
-                display: flex;
-                flex-direction: column;
-                gap: 20px;
-            }
-            
-            .form-group {
-                display: flex;
-                flex-direction: column;
-                gap: 8px;
-            }
-            
-            label {
-                color: #555;
-                font-weight: 500;
-                font-size: 14px;
-            }
-            
-            input[type="file"] {
-                padding: 12px;
-                border: 2px dashed #ddd;
-                border-radius: 10px;
-                background: #fafafa;
-                cursor: pointer;
-                transition: all 0.3s;
-            }
-            
-            input[type="file"]:hover {
-                border-color: #667eea;
-                background: #f0f0ff;
-            }
-            
-            select {
-                padding: 12px;
-                border: 2px solid #e0e0e0;
-                border-radius: 10px;
-                background: white;
-                font-size: 14px;
-                cursor: pointer;
-                transition: all 0.3s;
-            }
-            
-            select:focus {
-                outline: none;
-                border-color: #667eea;
-                box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1);
-            }
-            
-            button {
-                background: linear-gradient(135deg, #667eea, #764ba2);
-                color: white;
-                border: none;
-                padding: 15px;
-                border-radius: 10px;
-                font-size: 16px;
-                font-weight: 600;
-                cursor: pointer;
-                transition: all 0.3s;
-                position: relative;
-                overflow: hidden;
-            }
-            
-            button:hover {
-                transform: translateY(-2px);
-                box-shadow: 0 10px 30px rgba(102, 126, 234, 0.3);
-            }
-            
-            .info-box {
-                background: #f8f9ff;
-                border-left: 4px solid #667eea;
-                padding: 20px;
-                border-radius: 10px;
-                margin-top: 30px;
-            }
-            
-            .info-box h3 {
-                color: #667eea;
-                margin-bottom: 10px;
-                font-size: 16px;
-            }
-            
-            .info-box ul {
-                color: #666;
-                font-size: 14px;
-                line-height: 1.8;
-                padding-left: 20px;
-            }
-            
-            .loading {
-                display: none;
-                text-align: center;
-                padding: 20px;
-            }
-            
-            .spinner {
-                border: 3px solid #f3f3f3;
-                border-top: 3px solid #667eea;
-                border-radius: 50%;
-                width: 40px;
-                height: 40px;
-                animation: spin 1s linear infinite;
-                margin: 0 auto;
-            }
-            
-            @keyframes spin {
-                0% { transform: rotate(0deg); }
-                100% { transform: rotate(360deg); }
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>🎯 Javelink</h1>
-            <p class="subtitle">やり投げ動作分析システム - AIによる科学的アプローチ</p>
-            
-            <div class="feature-badges">
-                <span class="badge">OpenCV対応</span>
-                <span class="badge">YOLOv8姿勢検出</span>
-                <span class="badge">リアルタイム分析</span>
-            </div>
-            
-            <form id="uploadForm" action="/api/analyze" method="post" enctype="multipart/form-data">
-                <div class="form-group">
-                    <label>📹 動画ファイルを選択</label>
-                    <input type="file" name="file" accept=".mp4,.mov,.avi" required>
-                </div>
-                
-                <div class="form-group">
-                    <label>📐 撮影アングル</label>
-                    <select name="view" required>
-                        <option value="side">横から撮影（サイドビュー）</option>
-                        <option value="rear">後ろから撮影（リアビュー）</option>
-                    </select>
-                </div>
-                
-                <div class="form-group">
-                    <label>✋ 利き腕</label>
-                    <select name="handedness" required>
-                        <option value="right">右利き</option>
-                        <option value="left">左利き</option>
-                    </select>
-                </div>
-                
-                <button type="submit">分析を開始する</button>
-            </form>
-            
-            <div class="loading" id="loading">
-                <div class="spinner"></div>
-                <p style="margin-top: 15px; color: #667eea;">分析中です...</p>
-            </div>
-            
-            <div class="info-box">
-                <h3>📝 撮影のポイント</h3>
-                <ul>
-                    <li><strong>横から撮影：</strong>投げる側の真横から、全身が映るように撮影</li>
-                    <li><strong>後ろから撮影：</strong>助走路の真後ろから、まっすぐ撮影</li>
-                    <li><strong>推奨：</strong>三脚を使用し、手ブレを防ぐ</li>
-                    <li><strong>画質：</strong>1080p以上、30fps以上を推奨</li>
-                </ul>
-            </div>
-        </div>
-        
-        <script>
-            document.getElementById('uploadForm').addEventListener('submit', function() {
-                document.getElementById('loading').style.display = 'block';
-            });
-        </script>
-    </body>
-    </html>
-    '''
+async def root(request: Request):
+    return landing_page.response(request)
 
 @app.post("/api/analyze")
 async def analyze(
     file: UploadFile = File(...),
     view: str = Form(...),
-    handedness: str = Form(...)
+    handedness: str = Form(...),
+    debug: Optional[str] = Form(None)
 ):
-    # 一時ファイルに保存
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-        contents = await file.read()
-        tmp_file.write(contents)
-        tmp_path = tmp_file.name
-    
-    # 動画を分析
+    timings = start_request_timings(frame_detail=debug == DEBUG_TIMINGS)
+    analysis_jobs.inc()
+    tmp_path = None
     try:
-        analysis_result = analyze_video_file(tmp_path)
-    except Exception as e:
-        analysis_result = None
-        print(f"分析エラー: {e}")
+        # 一時ファイルに保存（アップロード失敗時もカウンタを戻す）
+        with timings.measure("upload"), tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
+            tmp_path = tmp_file.name
+            contents = await file.read()
+            tmp_file.write(contents)
+
+        # 動画を分析（イベントループを塞がないよう別スレッドで）
+        try:
+            analysis_result = await asyncio.to_thread(analyze_video_file, tmp_path)
+        except Exception as e:
+            analysis_result = None
+            print(f"分析エラー: {e}")
     finally:
+        analysis_jobs.dec()
         # 一時ファイルを削除
-        if os.path.exists(tmp_path):
+        if tmp_path and os.path.exists(tmp_path):
             os.unlink(tmp_path)
     
     # デモデータ（実際の分析が失敗した場合のフォールバック）
@@ -369,206 +195,11 @@ async def analyze(
             "detected_poses": 0
         }
     
-    html = f'''
-    <html>
-    <head>
-        <title>分析結果 - Javelink</title>
-        <style>
-            @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+JP:wght@400;700&display=swap');
-            
-            body {{
-                font-family: 'Noto Sans JP', sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-                padding: 20px;
-            }}
-            
-            .container {{
-                max-width: 900px;
-                margin: 0 auto;
-                background: white;
-                border-radius: 20px;
-                padding: 40px;
-                box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-            }}
-            
-            h1 {{
-                color: #333;
-                text-align: center;
-                margin-bottom: 30px;
-            }}
-            
-            .video-info {{
-                background: #f8f9ff;
-                padding: 20px;
-                border-radius: 10px;
-                margin-bottom: 30px;
-            }}
-            
-            .video-info p {{
-                color: #666;
-                margin: 5px 0;
-            }}
-            
-            .results-grid {{
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                gap: 20px;
-                margin-bottom: 30px;
-            }}
-            
-            .metric-card {{
-                background: linear-gradient(135deg, #f8f9ff, #ffffff);
-                border: 2px solid #e0e0ff;
-                border-radius: 15px;
-                padding: 20px;
-                text-align: center;
-                transition: all 0.3s;
-            }}
-            
-            .metric-card:hover {{
-                transform: translateY(-5px);
-                box-shadow: 0 10px 30px rgba(102, 126, 234, 0.2);
-            }}
-            
-            .metric-label {{
-                color: #666;
-                font-size: 12px;
-                margin-bottom: 10px;
-            }}
-            
-            .metric-value {{
-                font-size: 32px;
-                font-weight: bold;
-                background: linear-gradient(135deg, #667eea, #764ba2);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-            }}
-            
-            .metric-unit {{
-                color: #999;
-                font-size: 14px;
-            }}
-            
-            .quality-badge {{
-                display: inline-block;
-                padding: 5px 15px;
-                border-radius: 20px;
-                font-size: 12px;
-                font-weight: bold;
-                margin-top: 10px;
-            }}
-            
-            .quality-excellent {{
-                background: #d4f4dd;
-                color: #2e7d32;
-            }}
-            
-            .quality-good {{
-                background: #fff3cd;
-                color: #856404;
-            }}
-            
-            .quality-fair {{
-                background: #f8d7da;
-                color: #721c24;
-            }}
-            
-            .back-btn {{
-                display: block;
-                width: 200px;
-                margin: 30px auto 0;
-                padding: 12px;
-                background: #667eea;
-                color: white;
-                text-align: center;
-                text-decoration: none;
-                border-radius: 10px;
-                transition: all 0.3s;
-            }}
-            
-            .back-btn:hover {{
-                background: #5a6dd8;
-                transform: translateY(-2px);
-            }}
-            
-            .detection-status {{
-                text-align: center;
-                padding: 10px;
-                background: {"#d4f4dd" if analysis_result.get("detected_poses", 0) > 0 else "#f8d7da"};
-                color: {"#2e7d32" if analysis_result.get("detected_poses", 0) > 0 else "#721c24"};
-                border-radius: 10px;
-                margin-bottom: 20px;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>✨ 分析結果</h1>
-            
-            <div class="video-info">
-                <p>📹 ファイル名: {file.filename}</p>
-                <p>🎬 解像度: {analysis_result.get("resolution", "不明")}</p>
-                <p>⏱️ フレームレート: {analysis_result.get("fps", 30):.0f} fps</p>
-                <p>🎞️ 総フレーム数: {analysis_result.get("frames", 0)}</p>
-                <p>👁️ 撮影アングル: {"横から" if view == "side" else "後ろから"}</p>
-                <p>✋ 利き腕: {"右" if handedness == "right" else "左"}</p>
-            </div>
-            
-            <div class="detection-status">
-                {"✅ 姿勢検出成功: " + str(analysis_result.get("detected_poses", 0)) + "フレーム" if analysis_result.get("detected_poses", 0) > 0 else "⚠️ 姿勢検出はデモモードです（YOLOv8未使用）"}
-            </div>
-            
-            <div class="results-grid">
-                <div class="metric-card">
-                    <div class="metric-label">リリース角度</div>
-                    <div class="metric-value">{analysis_result.get("release_angle", 35.5):.1f}</div>
-                    <div class="metric-unit">度</div>
-                    <div class="quality-badge quality-excellent">最適範囲</div>
-                </div>
-                
-                <div class="metric-card">
-                    <div class="metric-label">リリース速度（推定）</div>
-                    <div class="metric-value">27.5</div>
-                    <div class="metric-unit">m/s</div>
-                    <div class="quality-badge quality-excellent">優秀</div>
-                </div>
-                
-                <div class="metric-card">
-                    <div class="metric-label">リリース高（推定）</div>
-                    <div class="metric-value">2.05</div>
-                    <div class="metric-unit">m</div>
-                    <div class="quality-badge quality-good">良好</div>
-                </div>
-                
-                <div class="metric-card">
-                    <div class="metric-label">ブロック時間（推定）</div>
-                    <div class="metric-value">0.22</div>
-                    <div class="metric-unit">秒</div>
-                    <div class="quality-badge quality-good">良好</div>
-                </div>
-                
-                <div class="metric-card">
-                    <div class="metric-label">予測飛距離</div>
-                    <div class="metric-value">75.8</div>
-                    <div class="metric-unit">m</div>
-                    <div class="quality-badge quality-excellent">上級者レベル</div>
-                </div>
-                
-                <div class="metric-card">
-                    <div class="metric-label">総合スコア</div>
-                    <div class="metric-value">8.5</div>
-                    <div class="metric-unit">/10</div>
-                    <div class="quality-badge quality-excellent">とても良い</div>
-                </div>
-            </div>
-            
-            <a href="/" class="back-btn">もう一度分析する</a>
-        </div>
-    </body>
-    </html>
-    '''
-    return HTMLResponse(content=html)
+    if debug == DEBUG_TIMINGS:
+        return with_server_timing(FastJSONResponse({"result": analysis_result, "debug": timings.debug_info()}), timings)
+    with timings.measure("render"):
+        html = result_template.render(filename=file.filename, result=analysis_result, view=view, handedness=handedness)
+    return with_server_timing(HTMLResponse(content=html), timings)
 
 if __name__ == "__main__":
     print("🎯 Javelink CV - Motion Analysis System")
@@ -1,28 +1,60 @@
-from fastapi import FastAPI, File, UploadFile, Form
+from fastapi import FastAPI, File, UploadFile, Form, Request
 from fastapi.responses import HTMLResponse
 import uvicorn
-import cv2
-import numpy as np
+import asyncio
 import tempfile
 import os
+from typing import Optional
 
-try:
-    from ultralytics import YOLO
-    YOLO_AVAILABLE = True
-except ImportError:
-    YOLO_AVAILABLE = False
+from app.assets import StaticAssets, create_template_env, prerender_page
+from app.monitoring import (
+    timed, mount_metrics, MODEL_LOADED, start_memory_tracing,
+    DEBUG_TIMINGS, start_request_timings, current_timings, with_server_timing
+)
+from app.config import TRACEMALLOC_FRAMES
+from app.responses import FastJSONResponse
+from app.routers import debug
+from app.loop_monitor import install_loop_monitor
+from app.readiness import analysis_jobs, model_state, mount_probes, install_warmup
 
 app = FastAPI(title="Javelink Gold - Advanced Motion Analysis")
 
+# Pages and CSS are built once at startup: the landing page is pre-rendered
+# and pre-compressed, the result template is compiled ahead of requests
+assets = StaticAssets()
+assets.mount(app)
+templates = create_template_env(assets)
+landing_page = prerender_page(templates, "gold/index.html")
+result_template = templates.get_template("gold/result.html")
+mount_metrics(app)
+app.include_router(debug.router)
+install_loop_monitor(app)
+start_memory_tracing(TRACEMALLOC_FRAMES)
+
 pose_model = None
-if YOLO_AVAILABLE:
+
+def load_pose_model():
+    """Load YOLO once the server is up; without it the app runs as before"""
+    global pose_model
     try:
-        pose_model = YOLO('yolov8n-pose.pt')
-    except:
+        from app.services.model_registry import load_yolo
+        pose_model = load_yolo('yolov8n-pose.pt')
+    except Exception:
         pass
+    MODEL_LOADED.set(pose_model is not None)
+
+# ultralytics and torch take longer to import than the rest of the app, so
+# they load in the background and /ready waits for them
+install_warmup(app, load_pose_model)
+mount_probes(app, lambda: model_state.ready)
 
+@timed("analyze_video_file")
 def analyze_video_file(video_path):
-    cap = cv2.VideoCapture(video_path)
+    import cv2
+    import numpy as np
+
+    with current_timings().measure("probe"):
+        cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         return None
     
@@ -45,646 +77,51 @@ def analyze_video_file(video_path):
     }
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
-    return '''
-    <html>
-    <head>
-        <title>Javelink Gold - 投擲動作分析システム</title>
-        <style>
-            @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900&family=Noto+Sans+JP:wght@400;700&display=swap');
-            
-            * { margin: 0; padding: 0; box-sizing: border-box; }
-            
-            body {
-                font-family: 'Noto Sans JP', sans-serif;
-                background: linear-gradient(135deg, #FFD700 0%, #FFA500 50%, #FF8C00 100%);
-                min-height: 100vh;
-                position: relative;
-                overflow-x: hidden;
-            }
-            
-            body::before {
-                content: "";
-                position: fixed;
-                top: 0;
-                left: 0;
-                right: 0;
-                bottom: 0;
-                background-image: 
-                    repeating-linear-gradient(45deg, 
-                        transparent, 
-                        transparent 25px, 
-                        rgba(255,255,255,0.05) 25px, 
-                        rgba(255,255,255,0.05) 50px),
-                    repeating-linear-gradient(-45deg, 
-                        transparent, 
-                        transparent 25px, 
-                        rgba(255,255,255,0.03) 25px, 
-                        rgba(255,255,255,0.03) 50px);
-                pointer-events: none;
-            }
-            
-            .circuit-pattern {
-                position: fixed;
-                top: 0;
-                left: 0;
-                right: 0;
-                bottom: 0;
-                opacity: 0.03;
-                background-image: 
-                    linear-gradient(0deg, transparent 24%, rgba(255,255,255,0.5) 25%, rgba(255,255,255,0.5) 26%, transparent 27%, transparent 74%, rgba(255,255,255,0.5) 75%, rgba(255,255,255,0.5) 76%, transparent 77%, transparent),
-                    linear-gradient(90deg, transparent 24%, rgba(255,255,255,0.5) 25%, rgba(255,255,255,0.5) 26%, transparent 27%, transparent 74%, rgba(255,255,255,0.5) 75%, rgba(255,255,255,0.5) 76%, transparent 77%, transparent);
-                background-size: 50px 50px;
-                pointer-events: none;
-            }
-            
-            .container {
-                max-width: 900px;
-                margin: 0 auto;
-                padding: 30px;
-                position: relative;
-                z-index: 1;
-            }
-            
-            .main-card {
-                background: rgba(255, 255, 255, 0.95);
-                border-radius: 20px;
-                padding: 40px;
-                box-shadow: 
-                    0 20px 60px rgba(0,0,0,0.2),
-                    inset 0 0 0 1px rgba(255,215,0,0.3);
-                backdrop-filter: blur(10px);
-                position: relative;
-                overflow: hidden;
-            }
-            
-            .main-card::before {
-                content: "";
-                position: absolute;
-                top: -2px;
-                left: -2px;
-                right: -2px;
-                bottom: -2px;
-                background: linear-gradient(45deg, #FFD700, #FFA500, #FFD700);
-                border-radius: 20px;
-                opacity: 0.3;
-                z-index: -1;
-                animation: glow 3s ease-in-out infinite;
-            }
-            
-            @keyframes glow {
-                0%, 100% { opacity: 0.3; }
-                50% { opacity: 0.5; }
-            }
-            
-            h1 {
-                font-family: 'Orbitron', monospace;
-                font-weight: 900;
-                font-size: 42px;
-                text-align: center;
-                background: linear-gradient(135deg, #FFD700, #FF8C00);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-                text-transform: uppercase;
-                letter-spacing: 3px;
-                margin-bottom: 10px;
-            }
-            
-            .subtitle {
-                text-align: center;
-                color: #666;
-                font-size: 14px;
-                margin-bottom: 30px;
-                font-family: 'Orbitron', monospace;
-                letter-spacing: 2px;
-            }
-            
-            .tech-line {
-                height: 2px;
-                background: linear-gradient(90deg, transparent, #FFD700, transparent);
-                margin: 20px 0;
-                position: relative;
-            }
-            
-            .tech-line::before {
-                content: "";
-                position: absolute;
-                width: 60px;
-                height: 2px;
-                background: #FFA500;
-                left: 50%;
-                transform: translateX(-50%);
-                animation: scan 2s linear infinite;
-            }
-            
-            @keyframes scan {
-                0% { left: 0%; }
-                100% { left: 100%; }
-            }
-            
-            form {
-                display: flex;
-                flex-direction: column;
-                gap: 25px;
-            }
-            
-            .form-group {
-                position: relative;
-            }
-            
-            label {
-                display: block;
-                color: #333;
-                font-weight: 700;
-                margin-bottom: 8px;
-                font-size: 14px;
-                text-transform: uppercase;
-                letter-spacing: 1px;
-            }
-            
-            input[type="file"], select {
-                width: 100%;
-                padding: 15px;
-                border: 2px solid #FFD700;
-                border-radius: 10px;
-                background: white;
-                font-size: 14px;
-                transition: all 0.3s;
-                position: relative;
-            }
-            
-            input[type="file"]:hover, select:hover {
-                border-color: #FFA500;
-                box-shadow: 0 0 20px rgba(255,165,0,0.2);
-            }
-            
-            select:focus {
-                outline: none;
-                border-color: #FF8C00;
-                box-shadow: 0 0 30px rgba(255,140,0,0.3);
-            }
-            
-            button {
-                background: linear-gradient(135deg, #FFD700, #FFA500);
-                color: white;
-                border: none;
-                padding: 18px;
-                border-radius: 10px;
-                font-size: 16px;
-                font-weight: 700;
-                font-family: 'Orbitron', monospace;
-                text-transform: uppercase;
-                letter-spacing: 2px;
-                cursor: pointer;
-                transition: all 0.3s;
-                position: relative;
-                overflow: hidden;
-            }
-            
-            button::before {
-                content: "";
-                position: absolute;
-                top: 0;
-                left: -100%;
-                width: 100%;
-                height: 100%;
-                background: linear-gradient(90deg, transparent, rgba(255,255,255,0.3), transparent);
-                transition: left 0.5s;
-            }
-            
-            button:hover::before {
-                left: 100%;
-            }
-            
-            button:hover {
-                transform: translateY(-2px);
-                box-shadow: 0 10px 30px rgba(255,165,0,0.4);
-            }
-            
-            .features {
-                display: grid;
-                grid-template-columns: repeat(3, 1fr);
-                gap: 15px;
-                margin-top: 30px;
-                padding-top: 20px;
-                border-top: 1px solid rgba(255,215,0,0.3);
-            }
-            
-            .feature {
-                text-align: center;
-                padding: 15px;
-                background: linear-gradient(135deg, rgba(255,215,0,0.1), rgba(255,165,0,0.1));
-                border-radius: 10px;
-                border: 1px solid rgba(255,215,0,0.2);
-            }
-            
-            .feature-icon {
-                font-size: 24px;
-                margin-bottom: 5px;
-            }
-            
-            .feature-text {
-                font-size: 12px;
-                color: #666;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="circuit-pattern"></div>
-        <div class="container">
-            <div class="main-card">
-                <h1>Javelink Gold</h1>
-                <p class="subtitle">ADVANCED MOTION ANALYSIS SYSTEM</p>
-                <div class="tech-line"></div>
-                
-                <form action="/api/analyze" method="post" enctype="multipart/form-data">
-                    <div class="form-group">
-                        <label>📹 動画ファイル</label>
-                        <input type="file" name="file" accept=".mp4,.mov,.avi" required>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>📐 撮影アングル</label>
-                        <select name="view" required>
-                            <option value="side">サイドビュー（横から）</option>
-                            <option value="rear">リアビュー（後ろから）</option>
-                        </select>
-                    </div>
-                    
-                    <div class="form-group">
-                        <label>✋ 利き腕</label>
-                        <select name="handedness" required>
-                            <option value="right">右利き</option>
-                            <option value="left">左利き</option>
-                        </select>
-                    </div>
-                    
-                    <button type="submit">分析開始</button>
-                </form>
-                
-                <div class="features">
-                    <div class="feature">
-                        <div class="feature-icon">⚡</div>
-                        <div class="feature-text">高速処理</div>
-                    </div>
-                    <div class="feature">
-                        <div class="feature-icon">🎯</div>
-                        <div class="feature-text">高精度</div>
-                    </div>
-                    <div class="feature">
-                        <div class="feature-icon">🔬</div>
-                        <div class="feature-text">科学的分析</div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    '''
+async def root(request: Request):
+    return landing_page.response(request)
 
 @app.post("/api/analyze")
 async def analyze(
     file: UploadFile = File(...),
     view: str = Form(...),
-    handedness: str = Form(...)
+    handedness: str = Form(...),
+    debug: Optional[str] = Form(None)
 ):
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-        contents = await file.read()
-        tmp_file.write(contents)
-        tmp_path = tmp_file.name
-    
+    timings = start_request_timings(frame_detail=debug == DEBUG_TIMINGS)
+    analysis_jobs.inc()
+    tmp_path = None
     try:
-        result = analyze_video_file(tmp_path)
-    except:
-        result = {
-            "fps": 30,
-            "frames": 150,
-            "resolution": "1920x1080",
-            "release_angle": 34.8,
-            "release_speed": 27.5,
-            "release_height": 2.05,
-            "plant_time": 0.22,
-            "hip_shoulder_separation": 45,
-            "foot_angle": 12
-        }
+        with timings.measure("upload"), tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
+            tmp_path = tmp_file.name
+            contents = await file.read()
+            tmp_file.write(contents)
+
+        # The analysis blocks, so it runs off the event loop; only
+        # Exception falls back to the demo result, cancellation propagates
+        try:
+            result = await asyncio.to_thread(analyze_video_file, tmp_path)
+        except Exception:
+            result = {
+                "fps": 30,
+                "frames": 150,
+                "resolution": "1920x1080",
+                "release_angle": 34.8,
+                "release_speed": 27.5,
+                "release_height": 2.05,
+                "plant_time": 0.22,
+                "hip_shoulder_separation": 45,
+                "foot_angle": 12
+            }
     finally:
-        if os.path.exists(tmp_path):
+        analysis_jobs.dec()
+        if tmp_path and os.path.exists(tmp_path):
             os.unlink(tmp_path)
     
-    html = f'''
-    <html>
-    <head>
-        <title>分析結果 - Javelink Gold</title>
-        <style>
-            @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@400;700;900&family=Noto+Sans+JP:wght@400;700&display=swap');
-            
-            body {{
-                font-family: 'Noto Sans JP', sans-serif;
-                background: linear-gradient(135deg, #FFD700 0%, #FFA500 50%, #FF8C00 100%);
-                min-height: 100vh;
-                position: relative;
-                padding: 30px;
-            }}
-            
-            body::before {{
-                content: "";
-                position: fixed;
-                top: 0;
-                left: 0;
-                right: 0;
-                bottom: 0;
-                background-image: 
-                    repeating-linear-gradient(45deg, 
-                        transparent, 
-                        transparent 25px, 
-                        rgba(255,255,255,0.05) 25px, 
-                        rgba(255,255,255,0.05) 50px);
-                pointer-events: none;
-            }}
-            
-            .container {{
-                max-width: 1200px;
-                margin: 0 auto;
-                position: relative;
-                z-index: 1;
-            }}
-            
-            h1 {{
-                font-family: 'Orbitron', monospace;
-                font-weight: 900;
-                font-size: 48px;
-                text-align: center;
-                color: white;
-                text-transform: uppercase;
-                letter-spacing: 3px;
-                margin-bottom: 30px;
-                text-shadow: 0 4px 10px rgba(0,0,0,0.3);
-            }}
-            
-            .info-bar {{
-                background: rgba(255,255,255,0.95);
-                padding: 20px;
-                border-radius: 15px;
-                margin-bottom: 30px;
-                display: flex;
-                justify-content: space-around;
-                box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-            }}
-            
-            .info-item {{
-                text-align: center;
-            }}
-            
-            .info-label {{
-                color: #666;
-                font-size: 12px;
-                text-transform: uppercase;
-                letter-spacing: 1px;
-            }}
-            
-            .info-value {{
-                color: #FF8C00;
-                font-weight: 700;
-                font-size: 18px;
-                margin-top: 5px;
-            }}
-            
-            .metrics-grid {{
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(350px, 1fr));
-                gap: 25px;
-            }}
-            
-            .metric-card {{
-                background: rgba(255,255,255,0.95);
-                border-radius: 15px;
-                padding: 25px;
-                box-shadow: 0 10px 30px rgba(0,0,0,0.2);
-                position: relative;
-                overflow: hidden;
-            }}
-            
-            .metric-card::before {{
-                content: "";
-                position: absolute;
-                top: 0;
-                left: 0;
-                right: 0;
-                height: 4px;
-                background: linear-gradient(90deg, #FFD700, #FFA500);
-            }}
-            
-            .metric-header {{
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-                margin-bottom: 15px;
-                padding-bottom: 15px;
-                border-bottom: 1px solid #eee;
-            }}
-            
-            .metric-title {{
-                font-weight: 700;
-                font-size: 16px;
-                color: #333;
-            }}
-            
-            .metric-value-box {{
-                text-align: right;
-            }}
-            
-            .metric-main-value {{
-                font-family: 'Orbitron', monospace;
-                font-size: 32px;
-                font-weight: 900;
-                background: linear-gradient(135deg, #FFD700, #FF8C00);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-            }}
-            
-            .metric-unit {{
-                color: #999;
-                font-size: 14px;
-                margin-left: 5px;
-            }}
-            
-            .metric-description {{
-                color: #666;
-                font-size: 14px;
-                line-height: 1.8;
-                padding: 15px;
-                background: #f9f9f9;
-                border-radius: 8px;
-                margin-top: 15px;
-            }}
-            
-            .metric-icon {{
-                font-size: 24px;
-                margin-right: 10px;
-            }}
-            
-            .back-btn {{
-                display: block;
-                width: 250px;
-                margin: 40px auto;
-                padding: 15px;
-                background: linear-gradient(135deg, #FFD700, #FFA500);
-                color: white;
-                text-align: center;
-                text-decoration: none;
-                border-radius: 10px;
-                font-weight: 700;
-                font-family: 'Orbitron', monospace;
-                text-transform: uppercase;
-                letter-spacing: 2px;
-                transition: all 0.3s;
-                box-shadow: 0 5px 20px rgba(255,165,0,0.3);
-            }}
-            
-            .back-btn:hover {{
-                transform: translateY(-2px);
-                box-shadow: 0 10px 30px rgba(255,165,0,0.5);
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>📊 分析結果</h1>
-            
-            <div class="info-bar">
-                <div class="info-item">
-                    <div class="info-label">ファイル名</div>
-                    <div class="info-value">{file.filename}</div>
-                </div>
-                <div class="info-item">
-                    <div class="info-label">解像度</div>
-                    <div class="info-value">{result.get("resolution", "1920x1080")}</div>
-                </div>
-                <div class="info-item">
-                    <div class="info-label">フレームレート</div>
-                    <div class="info-value">{result.get("fps", 30):.0f} fps</div>
-                </div>
-                <div class="info-item">
-                    <div class="info-label">総フレーム数</div>
-                    <div class="info-value">{result.get("frames", 0)}</div>
-                </div>
-            </div>
-            
-            <div class="metrics-grid">
-                <div class="metric-card">
-                    <div class="metric-header">
-                        <div>
-                            <span class="metric-icon">📐</span>
-                            <span class="metric-title">リリース角度</span>
-                        </div>
-                        <div class="metric-value-box">
-                            <span class="metric-main-value">{result.get("release_angle", 34.8):.1f}</span>
-                            <span class="metric-unit">度</span>
-                        </div>
-                    </div>
-                    <div class="metric-description">
-                        やりを投げる瞬間、やりがどのくらい上を向いているかを表す角度です。
-                        紙飛行機を飛ばすときと同じで、まっすぐ投げるより少し上向きに投げた方が遠くまで飛びます。
-                        でも上を向きすぎると、高く上がるけどすぐに落ちてしまいます。
-                    </div>
-                </div>
-                
-                <div class="metric-card">
-                    <div class="metric-header">
-                        <div>
-                            <span class="metric-icon">🚀</span>
-                            <span class="metric-title">リリース速度</span>
-                        </div>
-                        <div class="metric-value-box">
-                            <span class="metric-main-value">{result.get("release_speed", 27.5):.1f}</span>
-                            <span class="metric-unit">m/s</span>
-                        </div>
-                    </div>
-                    <div class="metric-description">
-                        やりが手から離れる瞬間の速さです。1秒間に何メートル進むかを表しています。
-                        例えば30m/sなら、1秒で学校のプール（25m）より長い距離を進む速さです。
-                        速く投げるほど遠くまで飛びますが、そのためには全身の力をうまく使う必要があります。
-                    </div>
-                </div>
-                
-                <div class="metric-card">
-                    <div class="metric-header">
-                        <div>
-                            <span class="metric-icon">📏</span>
-                            <span class="metric-title">リリース高</span>
-                        </div>
-                        <div class="metric-value-box">
-                            <span class="metric-main-value">{result.get("release_height", 2.05):.2f}</span>
-                            <span class="metric-unit">m</span>
-                        </div>
-                    </div>
-                    <div class="metric-description">
-                        やりを手から離すときの地面からの高さです。
-                        高い場所から投げると、やりが空中にいる時間が長くなるので、より遠くまで飛びます。
-                        バスケットボールのゴール（3.05m）より少し低いくらいの高さから投げています。
-                    </div>
-                </div>
-                
-                <div class="metric-card">
-                    <div class="metric-header">
-                        <div>
-                            <span class="metric-icon">⏱️</span>
-                            <span class="metric-title">ブロック時間</span>
-                        </div>
-                        <div class="metric-value-box">
-                            <span class="metric-main-value">{result.get("plant_time", 0.22):.2f}</span>
-                            <span class="metric-unit">秒</span>
-                        </div>
-                    </div>
-                    <div class="metric-description">
-                        最後の一歩を踏み込んでから、やりを投げるまでの時間です。
-                        まばたき2回分くらいの短い時間に、走ってきたスピードを投げる力に変えています。
-                        この瞬間に体全体がバネのように働いて、やりに力を伝えます。
-                    </div>
-                </div>
-                
-                <div class="metric-card">
-                    <div class="metric-header">
-                        <div>
-                            <span class="metric-icon">🔄</span>
-                            <span class="metric-title">肩腰分離角</span>
-                        </div>
-                        <div class="metric-value-box">
-                            <span class="metric-main-value">{result.get("hip_shoulder_separation", 45):.0f}</span>
-                            <span class="metric-unit">度</span>
-                        </div>
-                    </div>
-                    <div class="metric-description">
-                        投げる瞬間に、肩のラインと腰のラインがどれくらいねじれているかを表します。
-                        ゴムをねじって離すと勢いよく戻るように、体をねじることで強い力が生まれます。
-                        野球のピッチャーも同じように体をねじって速い球を投げています。
-                    </div>
-                </div>
-                
-                <div class="metric-card">
-                    <div class="metric-header">
-                        <div>
-                            <span class="metric-icon">👟</span>
-                            <span class="metric-title">前足進行角</span>
-                        </div>
-                        <div class="metric-value-box">
-                            <span class="metric-main-value">{result.get("foot_angle", 12):.0f}</span>
-                            <span class="metric-unit">度</span>
-                        </div>
-                    </div>
-                    <div class="metric-description">
-                        最後の一歩を踏み込むとき、足がまっすぐ前を向いているか、少し内側を向いているかを表します。
-                        サッカーでボールを蹴るときに軸足の向きが大切なように、やり投げでも足の向きが投げる方向や力の伝わり方に影響します。
-                    </div>
-                </div>
-            </div>
-            
-            <a href="/" class="back-btn">新規分析</a>
-        </div>
-    </body>
-    </html>
-    '''
-    return HTMLResponse(content=html)
+    if debug == DEBUG_TIMINGS:
+        return with_server_timing(FastJSONResponse({"result": result, "debug": timings.debug_info()}), timings)
+    with timings.measure("render"):
+        html = result_template.render(filename=file.filename, result=result)
+    return with_server_timing(HTMLResponse(content=html), timings)
 
 if __name__ == "__main__":
     print("🏆 Javelink Gold - Advanced Motion Analysis")
@@ -0,0 +1,41 @@
+"""Shared fixtures: isolated data directories and synthetic clips"""
+import pytest
+
+from benchmarks.synthetic import ThrowClip, write_throw_video
+
+@pytest.fixture(autouse=True)
+def data_dirs(tmp_path, monkeypatch):
+    """Uploads, outputs, keyframes and calibration profiles under tmp_path"""
+    from app.routers import analyze, calibration as calibration_router
+    from app.services import calibration, keyframes
+
+    dirs = {name: tmp_path / name for name in ("uploads", "outputs", "keyframes", "calibration")}
+    for path in dirs.values():
+        path.mkdir()
+    monkeypatch.setattr(analyze, "UPLOAD_DIR", dirs["uploads"])
+    monkeypatch.setattr(analyze, "OUTPUT_DIR", dirs["outputs"])
+    monkeypatch.setattr(calibration_router, "UPLOAD_DIR", dirs["uploads"])
+    monkeypatch.setattr(keyframes, "KEYFRAME_DIR", dirs["keyframes"])
+    monkeypatch.setattr(calibration, "CALIBRATION_DIR", dirs["calibration"])
+    return dirs
+
+def _clip(tmp_path, name: str, **params) -> str:
+    path, _ = write_throw_video(str(tmp_path / name), ThrowClip(width=640, height=360, duration=1.0, **params))
+    return path
+
+@pytest.fixture
+def marker_video(tmp_path) -> str:
+    """One second of a throw with red scale markers"""
+    return _clip(tmp_path, "markers.mp4")
+
+@pytest.fixture
+def plain_video(tmp_path) -> str:
+    """The same throw without markers"""
+    return _clip(tmp_path, "plain.mp4", markers=False)
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    return TestClient(app)
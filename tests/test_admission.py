@@ -0,0 +1,140 @@
+import asyncio
+import math
+
+import pytest
+from fastapi import HTTPException
+
+from app.admission import AdmissionController, JobCost
+from app.config import ANALYSIS_EXPECTED_SEC
+
+SMALL = JobCost(640, 360, 30)
+LARGE = JobCost(1920, 1080, 900)
+
+def _controller(max_queue: int = 2, timeout: float = 5.0, memory_check: bool = False, **kwargs):
+    """One slot, so every further job queues"""
+    return AdmissionController(1, max_queue, timeout, memory_check, **kwargs)
+
+async def _hold(controller: AdmissionController, cost: JobCost, release: asyncio.Event):
+    async with controller.slot(cost):
+        await release.wait()
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_full_queue_is_rejected_with_429():
+    async def main():
+        controller = _controller(max_queue=1)
+        release = asyncio.Event()
+        tasks = [asyncio.ensure_future(_hold(controller, SMALL, release)) for _ in range(2)]
+        await _settle()
+        assert (controller.running, controller.waiting) == (1, 1)
+
+        with pytest.raises(HTTPException) as rejected:
+            controller.check_queue()
+        release.set()
+        await asyncio.gather(*tasks)
+        return rejected.value, controller.running
+
+    error, running = asyncio.run(main())
+    assert error.status_code == 429
+    # Backlog of one running, one waiting and the new request, one slot
+    assert error.headers["Retry-After"] == str(math.ceil(3 * ANALYSIS_EXPECTED_SEC))
+    assert running == 0
+
+def test_queue_timeout_is_rejected_with_503():
+    async def main():
+        controller = _controller(timeout=0.05)
+        release = asyncio.Event()
+        holder = asyncio.ensure_future(_hold(controller, SMALL, release))
+        await _settle()
+        with pytest.raises(HTTPException) as rejected:
+            async with controller.slot(SMALL):
+                pass
+        waiting = controller.waiting
+        release.set()
+        await holder
+        return rejected.value, waiting
+
+    error, waiting = asyncio.run(main())
+    assert error.status_code == 503
+    assert error.detail == "Timed out waiting for an analysis slot"
+    assert int(error.headers["Retry-After"]) >= 1
+    assert waiting == 0
+
+def test_job_too_big_for_memory_is_rejected_with_503(monkeypatch):
+    monkeypatch.setattr("app.admission.available_memory_bytes", lambda: 64 * 2**20)
+
+    async def main():
+        controller = _controller(memory_check=True)
+        async with controller.slot(LARGE):
+            pass
+
+    with pytest.raises(HTTPException) as rejected:
+        asyncio.run(main())
+    assert rejected.value.status_code == 503
+    assert "Retry-After" in rejected.value.headers
+
+def test_deferred_slot_is_held_until_released():
+    async def main():
+        controller = _controller()
+        async with controller.slot(SMALL) as slot:
+            release = slot.defer()
+        held = controller.running
+        release()
+        release()  # only the first release counts
+        await _settle()
+        return held, controller.running
+
+    assert asyncio.run(main()) == (1, 0)
+
+async def _queue_in_order(controller: AdmissionController, costs, before_release=None):
+    """Queue jobs behind a held slot in the given order; the order they then run in"""
+    order = []
+
+    async def job(name: str, cost: JobCost):
+        async with controller.slot(cost):
+            order.append(name)
+
+    release = asyncio.Event()
+    holder = asyncio.ensure_future(_hold(controller, SMALL, release))
+    await _settle()
+    tasks = []
+    for name, cost in costs:
+        tasks.append(asyncio.ensure_future(job(name, cost)))
+        await _settle()
+    if before_release is not None:
+        before_release()
+    release.set()
+    await asyncio.gather(holder, *tasks)
+    return order
+
+def test_freed_slot_goes_to_shortest_job():
+    controller = _controller(aging=0.0)
+    order = asyncio.run(_queue_in_order(controller, [("large", LARGE), ("small", SMALL)]))
+    assert order == ["small", "large"]
+
+def test_aging_lets_a_long_wait_overtake():
+    controller = _controller(aging=1.0)
+
+    def age_first_waiter():
+        # The large job has waited longer than its own estimate
+        controller._waiters[0].enqueued -= controller.estimated_seconds(LARGE) + 1
+
+    order = asyncio.run(_queue_in_order(controller, [("large", LARGE), ("small", SMALL)], age_first_waiter))
+    assert order == ["large", "small"]
+
+def test_estimates_scale_with_clip_and_tier():
+    controller = _controller()
+    assert controller.estimated_seconds(LARGE) > controller.estimated_seconds(SMALL)
+    assert controller.estimated_seconds(JobCost(640, 360, 30, tier=8.8)) > controller.estimated_seconds(SMALL)
+    assert SMALL.job_class == "small"
+
+def test_unreadable_upload_is_rejected_before_admission(client):
+    response = client.post(
+        "/api/analyze",
+        files={"file": ("clip.mp4", b"not a video", "video/mp4")},
+        data={"view": "side", "handedness": "right"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cannot open video"
@@ -0,0 +1,72 @@
+import pytest
+
+from app.models.schemas import MarkerType, ScaleMethod
+from app.services.calibration import load_profile, save_profile
+from app.services.pipeline import analyze_video
+from app.services.scaling import MarkerScale
+
+STORED_M_PER_PX = 0.0123
+
+def _analyze(video: str, tmp_path, scale_method: str, **kwargs):
+    return analyze_video(
+        video, str(tmp_path / "out.mp4"), "side", "right", scale_method, output_mode="overlay", **kwargs
+    )
+
+@pytest.fixture
+def stored_profile():
+    return save_profile("Track A", "cam 1", MarkerScale(STORED_M_PER_PX, MarkerType.RED, 0), "side")
+
+def test_marker_detection_saves_profile(marker_video, tmp_path):
+    result = _analyze(marker_video, tmp_path, "marker", venue="Track A", camera="cam 1")
+
+    profile = load_profile("Track A", "cam 1")
+    assert profile is not None
+    assert profile.marker_type == MarkerType.RED.value
+    assert result.meta.m_per_px == pytest.approx(profile.m_per_px)
+    assert "Calibration profile saved: Track A/cam 1" in result.qc.notes
+
+def test_stored_profile_is_reused(stored_profile, plain_video, tmp_path):
+    result = _analyze(plain_video, tmp_path, "marker", venue="Track A", camera="cam 1")
+
+    assert result.meta.m_per_px == pytest.approx(STORED_M_PER_PX)
+    assert result.meta.scale_method == ScaleMethod.PROFILE.value
+
+def test_auto_ignores_stored_profile(stored_profile, plain_video, tmp_path):
+    result = _analyze(plain_video, tmp_path, "auto", venue="Track A", camera="cam 1")
+
+    assert result.meta.scale_method == ScaleMethod.AUTO.value
+    assert result.meta.m_per_px != pytest.approx(STORED_M_PER_PX)
+
+def test_marker_without_marker_reports_auto(plain_video, tmp_path):
+    result = _analyze(plain_video, tmp_path, "marker")
+
+    assert result.meta.scale_method == ScaleMethod.AUTO.value
+    assert load_profile("Track A", "cam 1") is None
+
+def _post(client, **form):
+    return client.post(
+        "/api/analyze",
+        files={"file": ("clip.mp4", b"not a video", "video/mp4")},
+        data=dict({"view": "side", "handedness": "right"}, **form)
+    )
+
+def test_analyze_rejects_unknown_enum_values(client):
+    assert _post(client, view="top").status_code == 422
+    assert _post(client, handedness="both").status_code == 422
+    assert _post(client, scale_method="laser").status_code == 422
+
+def test_profile_scale_needs_venue_and_camera(client):
+    response = _post(client, scale_method="profile")
+    assert response.status_code == 400
+
+def test_profile_scale_needs_stored_profile(client):
+    response = _post(client, scale_method="profile", venue="Track A", camera="cam 1")
+    assert response.status_code == 404
+
+def test_calibration_profile_round_trip(client, stored_profile):
+    response = client.get("/api/calibration/Track A/cam 1")
+    assert response.status_code == 200
+    assert response.json()["m_per_px"] == pytest.approx(STORED_M_PER_PX)
+
+    assert client.delete("/api/calibration/Track A/cam 1").status_code == 200
+    assert client.get("/api/calibration/Track A/cam 1").status_code == 404
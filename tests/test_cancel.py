@@ -0,0 +1,75 @@
+import contextvars
+import threading
+import time
+
+import pytest
+
+from app.services.jobs import AnalysisCancelled, check_cancelled, finish_job, start_job
+from app.services.pipeline import analyze_video
+
+def _partial_analysis(started: threading.Event):
+    """Stands in for analyze_video: leaves partial outputs, runs until cancelled"""
+    def analyze(video_path, output_path, *args, **kwargs):
+        with open(output_path, "wb") as f:
+            f.write(b"partial")
+        with open(output_path.replace("_annotated.mp4", "_annotated_overlay.json"), "w") as f:
+            f.write("{")
+        started.set()
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            check_cancelled()
+            time.sleep(0.01)
+        raise AssertionError("never cancelled")
+    return analyze
+
+def test_cancelled_analysis_returns_409_and_removes_partials(client, data_dirs, plain_video, monkeypatch):
+    started = threading.Event()
+    monkeypatch.setattr("app.routers.analyze.analyze_video", _partial_analysis(started))
+    responses = []
+
+    def submit():
+        with open(plain_video, "rb") as f:
+            responses.append(client.post(
+                "/api/analyze",
+                files={"file": ("clip.mp4", f, "video/mp4")},
+                data={"view": "side", "handedness": "right", "job_id": "throw-1"}
+            ))
+
+    worker = threading.Thread(target=submit)
+    worker.start()
+    assert started.wait(10)
+    assert client.delete("/api/jobs/throw-1").status_code == 202
+    worker.join(10)
+
+    assert responses[0].status_code == 409
+    assert responses[0].json()["detail"] == "Analysis cancelled: cancelled by client"
+    assert list(data_dirs["outputs"].iterdir()) == []
+    assert list(data_dirs["uploads"].iterdir()) == []
+    # Finished jobs can no longer be cancelled
+    assert client.delete("/api/jobs/throw-1").status_code == 404
+
+def test_cancel_unknown_job_is_404(client):
+    assert client.delete("/api/jobs/no-such-job").status_code == 404
+
+def test_pipeline_stops_for_a_cancelled_job(plain_video, tmp_path):
+    def run():
+        job = start_job("throw-2")
+        job.cancel("test")
+        try:
+            analyze_video(plain_video, str(tmp_path / "out.mp4"), "side", "right", "auto", output_mode="overlay")
+        finally:
+            finish_job(job)
+
+    with pytest.raises(AnalysisCancelled, match="test"):
+        contextvars.copy_context().run(run)
+
+def test_resubmission_supersedes_running_job():
+    def run():
+        first = start_job("throw-3")
+        second = start_job("throw-3")
+        finish_job(second)
+        return first, second
+
+    first, second = contextvars.copy_context().run(run)
+    assert first.cancelled and first.reason == "superseded by a new submission"
+    assert not second.cancelled
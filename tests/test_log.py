@@ -0,0 +1,70 @@
+import asyncio
+import contextvars
+import json
+import logging
+
+from app.log import RATE_LIMITED, ContextFilter, JSONFormatter, RateLimitFilter, job_id_var, request_id_var
+
+def _record(lineno: int = 10, rate_limited: bool = True) -> logging.LogRecord:
+    record = logging.LogRecord("test", logging.INFO, "hot_path.py", lineno, "frame %d", (1,), None)
+    if rate_limited:
+        record.__dict__.update(RATE_LIMITED)
+    return record
+
+def test_rate_limit_drops_repeats_within_interval(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.log.time.monotonic", lambda: now[0])
+    limiter = RateLimitFilter(interval=1.0)
+
+    first = _record()
+    assert limiter.filter(first)
+    assert first.suppressed == 0
+    assert not limiter.filter(_record())
+    assert not limiter.filter(_record())
+
+    now[0] += 1.5
+    after = _record()
+    assert limiter.filter(after)
+    assert after.suppressed == 2
+
+def test_rate_limit_is_per_call_site(monkeypatch):
+    monkeypatch.setattr("app.log.time.monotonic", lambda: 100.0)
+    limiter = RateLimitFilter(interval=1.0)
+
+    assert limiter.filter(_record(lineno=10))
+    assert limiter.filter(_record(lineno=20))
+    assert not limiter.filter(_record(lineno=10))
+
+def test_rate_limit_ignores_unmarked_records():
+    limiter = RateLimitFilter(interval=60.0)
+    assert all(limiter.filter(_record(rate_limited=False)) for _ in range(5))
+
+def test_context_filter_stamps_ids():
+    def emit():
+        request_id_var.set("req-1")
+        job_id_var.set("job-1")
+        record = _record(rate_limited=False)
+        ContextFilter().filter(record)
+        return record
+
+    record = contextvars.copy_context().run(emit)
+    assert (record.request_id, record.job_id) == ("req-1", "job-1")
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["request_id"] == "req-1"
+    assert entry["job_id"] == "job-1"
+    assert entry["message"] == "frame 1"
+
+def test_context_filter_keeps_concurrent_requests_apart():
+    async def handle(request_id: str) -> logging.LogRecord:
+        request_id_var.set(request_id)
+        await asyncio.sleep(0)
+        record = _record(rate_limited=False)
+        ContextFilter().filter(record)
+        return record
+
+    async def main():
+        return await asyncio.gather(handle("a"), handle("b"))
+
+    records = asyncio.run(main())
+    assert [r.request_id for r in records] == ["a", "b"]
+    assert all(r.job_id is None for r in records)
@@ -0,0 +1,56 @@
+import pytest
+
+from app import admission as admission_module
+from app.admission import AdmissionController, choose_pose_tier
+from app.config import ERROR_NO_POSE_MODEL, POSE_TIER_BUSY, POSE_TIER_IDLE, POSE_TIER_PEAK
+from app.models.schemas import QCStatus
+from app.services.pipeline import analyze_video
+from app.services.video import VideoInfo
+
+SHORT_CLIP = VideoInfo(fps=30.0, frame_count=90, width=1280, height=720)
+LONG_CLIP = VideoInfo(fps=30.0, frame_count=30 * 600, width=3840, height=2160)
+
+@pytest.fixture
+def controller(monkeypatch):
+    controller = AdmissionController(max_concurrent=2, max_queue=8, memory_check=False)
+    monkeypatch.setattr(admission_module, "admission", controller)
+    return controller
+
+@pytest.fixture
+def available(monkeypatch):
+    """Tiers whose weights count as loadable; all of them by default"""
+    names = set()
+    monkeypatch.setattr("app.services.detectors.tier_available", lambda name: not names or name in names)
+    return names
+
+def _load(controller: AdmissionController, running: int, waiting: int):
+    controller.running = running
+    controller._waiters = [object()] * waiting
+
+@pytest.mark.parametrize("running, waiting, expected", [
+    (0, 0, POSE_TIER_IDLE),
+    (1, 0, POSE_TIER_IDLE),
+    (2, 0, POSE_TIER_BUSY),
+    (2, 3, POSE_TIER_BUSY),
+    (2, 4, POSE_TIER_PEAK),
+    (2, 8, POSE_TIER_PEAK),
+])
+def test_tier_ceiling_follows_load(controller, available, running, waiting, expected):
+    _load(controller, running, waiting)
+    assert choose_pose_tier(SHORT_CLIP) == expected
+
+def test_tier_falls_back_to_cheapest_over_budget(controller, available):
+    assert choose_pose_tier(LONG_CLIP) == "n320"
+
+def test_only_loadable_tiers_are_chosen(controller, available):
+    available.update({"n320", "n480", "n640"})
+    assert choose_pose_tier(SHORT_CLIP) == "n640"
+
+def test_placeholder_keypoints_fail_qc(plain_video, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.detectors._load_model", lambda *args, **kwargs: None)
+    monkeypatch.setattr("app.services.detectors._pose_detectors", {})
+
+    result = analyze_video(plain_video, str(tmp_path / "out.mp4"), "side", "right", "auto", output_mode="overlay")
+
+    assert result.qc.overall_status == QCStatus.FAIL.value
+    assert result.qc.notes[0].startswith(ERROR_NO_POSE_MODEL)
@@ -0,0 +1,33 @@
+import json
+import math
+
+from app.models.schemas import MetaInfo
+from app.responses import compact_value, dump_json
+
+def test_compact_keeps_significant_digits_of_small_values():
+    assert compact_value(0.0096153846) == 0.009615
+    assert compact_value(0.00012345678) == 0.0001235
+
+def test_compact_rounds_large_values_to_significant_digits():
+    assert compact_value(27.54321) == 27.54
+    assert compact_value(1234.5678) == 1235.0
+
+def test_compact_digits_are_configurable():
+    assert compact_value(0.0096153846, digits=2) == 0.0096
+
+def test_compact_drops_nulls_recursively_and_leaves_other_types():
+    value = {"a": None, "b": [1.23456, None, {"c": None, "d": "x"}], "e": 3, "f": True}
+    assert compact_value(value) == {"b": [1.235, None, {"d": "x"}], "e": 3, "f": True}
+
+def test_compact_passes_non_finite_floats_through():
+    assert math.isinf(compact_value(float("inf")))
+
+def test_compact_json_keeps_scale():
+    meta = MetaInfo(
+        fps=29.97, frames=90, view="side", handedness="right",
+        scale_method="marker", m_per_px=0.0096153846, video_hash="abc"
+    )
+    compact = json.loads(dump_json(meta, compact=True))
+    assert compact["m_per_px"] == 0.009615
+    assert compact["fps"] == 29.97
+    assert "model_tier" not in compact